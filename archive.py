@@ -0,0 +1,325 @@
+from __future__ import annotations
+import os
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, List, Optional
+from flask import current_app
+from sqlalchemy import select, delete, and_, or_
+from models import db, WorkoutLog, ExerciseLog, NutritionLog, Meal, MonthlyRollup
+
+# pandas is imported where it is used, so booting the app doesn't load it
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Archived tables and the column each one is partitioned by
+ARCHIVED_TABLES = {
+    'workout_logs': (WorkoutLog, 'workout_date'),
+    'exercise_logs': (ExerciseLog, None),
+    'nutrition_logs': (NutritionLog, 'log_date'),
+    'meals': (Meal, 'meal_date')
+}
+
+def get_archiver() -> Optional[LogArchiver]:
+    """The app's LogArchiver when ARCHIVE_ENABLED, else None
+
+    Reads only look for archived months through this, so with archival off
+    (the default) they skip the monthly_rollups lookup altogether.
+    """
+    if not current_app.config['ARCHIVE_ENABLED']:
+        return None
+    return current_app.extensions.get('log_archiver')
+
+def month_start(day: date) -> date:
+    """First day of the month containing day"""
+    return day.replace(day=1)
+
+def next_month(day: date) -> date:
+    """First day of the month after day"""
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+class LogArchiver:
+    """Move old logs to compressed Parquet files and leave monthly rollups behind
+
+    Files are laid out as <ARCHIVE_FOLDER>/<user_id>/<YYYY-MM>/<table>.parquet.
+    Each archived month gets a MonthlyRollup row, which doubles as the index
+    of which months must be read from cold storage. Archived rows only exist
+    in those files, so the nightly job only runs with ARCHIVE_ENABLED, which
+    needs ARCHIVE_FOLDER on a persistent disk shared by every instance.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the archiver with the Flask app"""
+        self.app = app
+        app.extensions['log_archiver'] = self
+
+    @property
+    def folder(self):
+        return os.path.join(self.app.root_path, self.app.config['ARCHIVE_FOLDER'])
+
+    def get_month_path(self, user_id: int, month: date) -> str:
+        return os.path.join(self.folder, str(user_id), month.strftime('%Y-%m'))
+
+    def get_cutoff(self, today: Optional[date] = None) -> date:
+        """Rows before this date are archived; only whole months are moved"""
+        today = today or date.today()
+        return month_start(today - timedelta(days=self.app.config['ARCHIVE_HORIZON_DAYS']))
+
+    # Archival
+    def archive_old_logs(self, today: Optional[date] = None) -> int:
+        """Archive every (user, month) older than the horizon"""
+        cutoff = self.get_cutoff(today)
+        archived = 0
+
+        for user_id, month in self.find_archivable_months(cutoff):
+            try:
+                self.archive_month(user_id, month)
+                archived += 1
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error archiving logs for user {user_id} ({month:%Y-%m}): {e}")
+
+        return archived
+
+    def find_archivable_months(self, cutoff: date) -> List[tuple]:
+        """Get the (user_id, month) pairs with rows older than cutoff"""
+        months = set()
+        for model, date_column in ((WorkoutLog, WorkoutLog.workout_date),
+                                   (NutritionLog, NutritionLog.log_date),
+                                   (Meal, Meal.meal_date)):
+            rows = db.session.execute(
+                select(model.user_id, date_column).where(date_column < cutoff).distinct()
+            )
+            months.update((user_id, month_start(day)) for user_id, day in rows if day)
+        return sorted(months)
+
+    def archive_month(self, user_id: int, month: date):
+        """Move one user's month of logs to Parquet and replace it with a rollup"""
+        end = next_month(month)
+
+        workouts = query_frame(select(WorkoutLog.__table__).where(
+            WorkoutLog.user_id == user_id,
+            WorkoutLog.workout_date >= month,
+            WorkoutLog.workout_date < end
+        ))
+        exercises = query_frame(select(ExerciseLog.__table__).where(
+            ExerciseLog.workout_id.in_(workouts['id'].tolist())
+        ))
+        nutrition = query_frame(select(NutritionLog.__table__).where(
+            NutritionLog.user_id == user_id,
+            NutritionLog.log_date >= month,
+            NutritionLog.log_date < end
+        ))
+        # Meals go with their nutrition log, so one dated in this month but
+        # logged under a log that stays hot stays hot too
+        meals = query_frame(select(Meal.__table__).where(
+            Meal.user_id == user_id,
+            or_(
+                and_(Meal.nutrition_log_id.is_(None), Meal.meal_date >= month, Meal.meal_date < end),
+                Meal.nutrition_log_id.in_(nutrition['id'].tolist())
+            )
+        ))
+
+        hot_rows = {
+            'workout_logs': workouts,
+            'exercise_logs': exercises,
+            'nutrition_logs': nutrition,
+            'meals': meals
+        }
+
+        # Write first, delete second: if anything fails the rows stay hot and
+        # the next run merges them into the files again (deduplicated by id).
+        path = self.get_month_path(user_id, month)
+        os.makedirs(path, exist_ok=True)
+        archived = {
+            table: self.write_frame(os.path.join(path, f'{table}.parquet'), frame)
+            for table, frame in hot_rows.items()
+        }
+        for table, frame in hot_rows.items():
+            verify_archived(os.path.join(path, f'{table}.parquet'), frame)
+
+        rollup = MonthlyRollup.query.filter_by(user_id=user_id, month=month).first()
+        if not rollup:
+            rollup = MonthlyRollup(user_id=user_id, month=month)
+            db.session.add(rollup)
+        self.update_rollup(rollup, archived)
+        rollup.archive_path = os.path.relpath(path, self.folder)
+        rollup.archived_at = datetime.utcnow()
+
+        # Children before parents
+        for table in ('exercise_logs', 'meals', 'workout_logs', 'nutrition_logs'):
+            model = ARCHIVED_TABLES[table][0]
+            ids = hot_rows[table]['id'].tolist()
+            if ids:
+                db.session.execute(delete(model).where(model.id.in_(ids)))
+
+        db.session.commit()
+
+    def write_frame(self, file_path: str, frame: pd.DataFrame) -> pd.DataFrame:
+        """Merge frame into a Parquet file and return the merged contents"""
+        if os.path.exists(file_path):
+            frame = concat_frames([read_parquet(file_path), frame])
+        if frame.empty:
+            return frame
+
+        temp_path = f'{file_path}.tmp'
+        frame.to_parquet(temp_path, compression=self.app.config['ARCHIVE_COMPRESSION'], index=False)
+        os.replace(temp_path, file_path)
+        return frame
+
+    @staticmethod
+    def update_rollup(rollup: MonthlyRollup, archived: dict):
+        """Recompute rollup totals from the archived month"""
+        workouts = archived['workout_logs']
+        nutrition = archived['nutrition_logs']
+
+        rollup.workout_count = len(workouts)
+        rollup.exercise_count = len(archived['exercise_logs'])
+        rollup.total_workout_duration = float(_column_total(workouts, 'session_duration'))
+        rollup.total_calories_burned = int(_column_total(workouts, 'calories_burned'))
+        rollup.nutrition_log_count = len(nutrition)
+        rollup.meal_count = len(archived['meals'])
+        rollup.total_calories_consumed = int(_column_total(nutrition, 'calories'))
+        rollup.total_carbs = int(_column_total(nutrition, 'carbs'))
+        rollup.total_proteins = int(_column_total(nutrition, 'proteins'))
+        rollup.total_fats = int(_column_total(nutrition, 'fats'))
+        rollup.total_water_intake = float(_column_total(nutrition, 'water_intake'))
+
+    # Read-through
+    def get_rollups(self, user_id: int, start_date: Optional[date] = None,
+                    end_date: Optional[date] = None) -> List[MonthlyRollup]:
+        """Get archived months overlapping a date range, newest first"""
+        query = MonthlyRollup.query.filter_by(user_id=user_id)
+        if start_date:
+            query = query.filter(MonthlyRollup.month >= month_start(start_date))
+        if end_date:
+            query = query.filter(MonthlyRollup.month <= end_date)
+        return query.order_by(MonthlyRollup.month.desc()).all()
+
+    def get_user_rollups(self, user_ids: List[int], start_date: Optional[date] = None,
+                         end_date: Optional[date] = None) -> dict:
+        """get_rollups for several users in one query, keyed by user id"""
+        query = MonthlyRollup.query.filter(MonthlyRollup.user_id.in_(user_ids))
+        if start_date:
+            query = query.filter(MonthlyRollup.month >= month_start(start_date))
+        if end_date:
+            query = query.filter(MonthlyRollup.month <= end_date)
+        rollups = {}
+        for rollup in query.order_by(MonthlyRollup.month.desc()):
+            rollups.setdefault(rollup.user_id, []).append(rollup)
+        return rollups
+
+    def read_archived(self, user_id: int, table: str, rollups: List[MonthlyRollup],
+                      start_date: Optional[date] = None,
+                      end_date: Optional[date] = None) -> pd.DataFrame:
+        """Read archived rows of one table for the given months and date range"""
+        frames = []
+        for rollup in rollups:
+            file_path = os.path.join(self.folder, rollup.archive_path, f'{table}.parquet')
+            if os.path.exists(file_path):
+                frames.append(read_parquet(file_path))
+
+        if not frames:
+            return empty_frame(table)
+        import pandas as pd
+        frame = pd.concat(frames, ignore_index=True)
+
+        date_column = ARCHIVED_TABLES[table][1]
+        if date_column and start_date:
+            frame = frame[frame[date_column] >= start_date]
+        if date_column and end_date:
+            frame = frame[frame[date_column] <= end_date]
+        return frame.reset_index(drop=True)
+
+def verify_archived(file_path: str, frame: pd.DataFrame):
+    """Raise unless the file on disk holds every row of frame, so rows are
+    never deleted from the database before their archive is readable"""
+    if frame.empty:
+        return
+    import pandas as pd
+    stored = set(pd.read_parquet(file_path, columns=['id'])['id'].tolist())
+    missing = [row_id for row_id in frame['id'].tolist() if row_id not in stored]
+    if missing:
+        raise IOError(f"{len(missing)} rows missing from {file_path}")
+
+def _column_total(frame: pd.DataFrame, column: str):
+    return frame[column].fillna(0).sum() if column in frame and not frame.empty else 0
+
+def query_frame(statement) -> pd.DataFrame:
+    """Run a select and return its rows as a frame with nullable dtypes"""
+    import pandas as pd
+    result = db.session.execute(statement)
+    return pd.DataFrame(result.all(), columns=list(result.keys())).convert_dtypes()
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate frames of one table, keeping the last copy of each id"""
+    import pandas as pd
+    non_empty = [frame for frame in frames if not frame.empty]
+    if not non_empty:
+        return frames[-1]
+    return pd.concat(non_empty, ignore_index=True).drop_duplicates('id', keep='last')
+
+def empty_frame(table: str) -> pd.DataFrame:
+    """An empty frame with the table's columns"""
+    import pandas as pd
+    model = ARCHIVED_TABLES[table][0]
+    return pd.DataFrame(columns=[c.name for c in model.__table__.columns])
+
+def read_parquet(file_path: str) -> pd.DataFrame:
+    """Read an archive file back with Python values and None for nulls"""
+    import pandas as pd
+    frame = pd.read_parquet(file_path, dtype_backend='numpy_nullable')
+    return frame.astype(object).where(frame.notna(), None)
+
+def read_log_range(user_id: int, table: str, start_date: date, end_date: date,
+                   rollups: Optional[List[MonthlyRollup]] = None) -> pd.DataFrame:
+    """Read one user's logs for a date range from the hot table and cold storage
+
+    Pass rollups from LogArchiver.get_rollups to reuse them across tables.
+    """
+    model, date_column = ARCHIVED_TABLES[table]
+    column = getattr(model, date_column)
+
+    frame = query_frame(
+        select(model.__table__).where(model.user_id == user_id, column >= start_date, column <= end_date)
+    )
+
+    archiver = get_archiver()
+    if rollups is None:
+        rollups = archiver.get_rollups(user_id, start_date, end_date) if archiver else []
+    if rollups:
+        archived = archiver.read_archived(user_id, table, rollups, start_date, end_date)
+        frame = concat_frames([archived, frame])
+
+    return frame.sort_values([date_column, 'id']).reset_index(drop=True)
+
+def read_log_ranges(user_ids: List[int], table: str, start_date: date, end_date: date,
+                    rollups: Optional[dict] = None) -> dict:
+    """read_log_range for several users with one query of the hot table
+
+    Pass rollups from LogArchiver.get_user_rollups to reuse them across
+    tables. Returns a frame for every user id, empty if they have no logs.
+    """
+    model, date_column = ARCHIVED_TABLES[table]
+    column = getattr(model, date_column)
+
+    frame = query_frame(
+        select(model.__table__).where(model.user_id.in_(user_ids), column >= start_date, column <= end_date)
+    )
+    hot = dict(tuple(frame.groupby('user_id'))) if not frame.empty else {}
+
+    archiver = get_archiver()
+    if rollups is None:
+        rollups = archiver.get_user_rollups(user_ids, start_date, end_date) if archiver else {}
+
+    frames = {}
+    for user_id in user_ids:
+        user_frame = hot.get(user_id, frame.iloc[0:0])
+        if rollups.get(user_id):
+            archived = archiver.read_archived(user_id, table, rollups[user_id], start_date, end_date)
+            user_frame = concat_frames([archived, user_frame])
+        frames[user_id] = user_frame.sort_values([date_column, 'id']).reset_index(drop=True)
+    return frames
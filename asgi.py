@@ -0,0 +1,8 @@
+"""ASGI entrypoint for the async JSON API tier
+
+Run with: uvicorn asgi:app --workers 4
+"""
+
+from asgi_api import create_asgi_app
+
+app = create_asgi_app()
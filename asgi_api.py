@@ -0,0 +1,172 @@
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+from flask import Flask
+from itsdangerous import BadSignature
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from config import Config
+from models import db, User
+from queries import recent_workouts_stmt, recent_nutrition_stmt
+from routes import (build_workout, build_exercises, build_nutrition, build_meals,
+                    get_dashboard_payload, get_macro_breakdown_payload)
+from sqlite_profile import SQLiteProfile
+from utils import ChartDataGenerator
+
+# Async driver for each database backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+psycopg_async',
+    'mysql': 'mysql+aiomysql'
+}
+
+def get_async_url(url):
+    """Swap a database URL's driver for its async counterpart"""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"The async API tier does not support {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_config_app():
+    """A minimal Flask app carrying the shared config, database URL and session signing"""
+    flask_app = Flask(__name__)
+    flask_app.config.from_object(Config)
+    db.init_app(flask_app)
+    SQLiteProfile(flask_app)
+    return flask_app
+
+def create_asgi_app(flask_app=None):
+    """Create the ASGI app serving the JSON APIs with async SQLAlchemy
+
+    The app shares models, database and login sessions with the Flask app:
+    requests are authenticated with the Flask session cookie, so a user who
+    logged in through Flask can call these endpoints directly. Route /api/*
+    and the log endpoints here at the proxy; everything else stays on Flask.
+    """
+    flask_app = flask_app or create_config_app()
+
+    with flask_app.app_context():
+        url = db.engine.url
+    engine = create_async_engine(
+        get_async_url(url),
+        pool_size=flask_app.config['ASYNC_DB_POOL_SIZE'],
+        pool_pre_ping=True
+    )
+
+    # Share the SQLite pragmas, and keep a single writer per process like
+    # the Flask write queue does.
+    write_lock = None
+    sqlite_profile = flask_app.extensions.get('sqlite_profile')
+    if sqlite_profile and sqlite_profile.apply(engine.sync_engine):
+        write_lock = asyncio.Lock() if flask_app.config['SQLITE_WRITE_QUEUE'] else None
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    app = Starlette(routes=[
+        Route('/api/dashboard_data', dashboard_data),
+        Route('/api/chart_data/{chart_type}', chart_data),
+        Route('/log_workout', log_workout, methods=['POST']),
+        Route('/log_nutrition', log_nutrition, methods=['POST'])
+    ], lifespan=lifespan)
+
+    app.state.engine = engine
+    app.state.sessions = async_sessionmaker(engine, expire_on_commit=False)
+    app.state.write_lock = write_lock
+    app.state.session_cookie = flask_app.config['SESSION_COOKIE_NAME']
+    app.state.session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    app.state.session_max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+    return app
+
+def get_session_user_id(request):
+    """Read the logged-in user id from the Flask session cookie"""
+    state = request.app.state
+    cookie = request.cookies.get(state.session_cookie)
+    if not cookie:
+        return None
+    try:
+        session = state.session_serializer.loads(cookie, max_age=state.session_max_age)
+    except BadSignature:
+        return None
+    return session.get('_user_id')
+
+def login_required(view):
+    """Load the current user and a database session, or answer 401"""
+    @functools.wraps(view)
+    async def wrapper(request):
+        user_id = get_session_user_id(request)
+        if user_id is None:
+            return JSONResponse({'error': 'Authentication required'}, status_code=401)
+
+        async with request.app.state.sessions() as session:
+            user = await session.get(User, int(user_id))
+            if user is None:
+                return JSONResponse({'error': 'Authentication required'}, status_code=401)
+            return await view(request, session, user)
+    return wrapper
+
+async def scalars(session: AsyncSession, stmt):
+    return (await session.execute(stmt)).scalars().all()
+
+async def run_write(request, write):
+    lock = request.app.state.write_lock
+    if lock is None:
+        return await write()
+    async with lock:
+        return await write()
+
+@login_required
+async def dashboard_data(request, session, user):
+    """API endpoint for dashboard data"""
+    recent_workouts = await scalars(session, recent_workouts_stmt(user.id, 7))
+    recent_nutrition = await scalars(session, recent_nutrition_stmt(user.id, 7))
+    return JSONResponse(get_dashboard_payload(user, recent_workouts, recent_nutrition))
+
+@login_required
+async def chart_data(request, session, user):
+    """API endpoint for chart data"""
+    chart_type = request.path_params['chart_type']
+    if chart_type == 'bmi_trend':
+        return JSONResponse(ChartDataGenerator.generate_bmi_trend_data(user.id))
+    elif chart_type == 'calorie_balance':
+        return JSONResponse(ChartDataGenerator.generate_calorie_balance_data(user.id))
+    elif chart_type == 'macro_breakdown':
+        recent_nutrition = await scalars(session, recent_nutrition_stmt(user.id, 7))
+        if recent_nutrition:
+            return JSONResponse(get_macro_breakdown_payload(recent_nutrition))
+
+    return JSONResponse({'error': 'Invalid chart type'}, status_code=400)
+
+@login_required
+async def log_workout(request, session, user):
+    """Create a workout log with its exercises"""
+    data = await request.json()
+
+    async def write():
+        workout = build_workout(user.id, data)
+        session.add(workout)
+        await session.flush()  # Get the workout ID
+        session.add_all(build_exercises(workout.id, data))
+        await session.commit()
+
+    await run_write(request, write)
+    return JSONResponse({'success': True, 'message': 'Workout logged successfully!'})
+
+@login_required
+async def log_nutrition(request, session, user):
+    """Create a nutrition log with its meals"""
+    data = await request.json()
+
+    async def write():
+        nutrition = build_nutrition(user.id, data)
+        session.add(nutrition)
+        await session.flush()  # Get the nutrition log ID
+        session.add_all(build_meals(user.id, nutrition, data))
+        await session.commit()
+
+    await run_write(request, write)
+    return JSONResponse({'success': True, 'message': 'Nutrition logged successfully!'})
@@ -0,0 +1,166 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import update
+from werkzeug.security import generate_password_hash, check_password_hash
+from models import db, User
+
+class HasherBusy(Exception):
+    """Raised when too many password checks are already waiting"""
+
+class PasswordHasher:
+    """Password hashing with configurable cost, run on a bounded thread pool
+
+    PASSWORD_HASH_METHOD and PASSWORD_HASH_SALT_LENGTH are passed to
+    Werkzeug; hashes made with other parameters are upgraded on the user's
+    next login. scrypt and pbkdf2 release the GIL, so the pool hashes on
+    several cores at once. At most PASSWORD_HASH_THREADS checks run and
+    PASSWORD_HASH_QUEUE wait; beyond that HasherBusy is raised so a login
+    storm is shed instead of tying up every request thread.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.executor = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self._current_prefix = None
+        self._dummy_hash = None
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read hashing settings and register the hasher"""
+        self.app = app
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.salt_length = app.config['PASSWORD_HASH_SALT_LENGTH']
+        self.threads = app.config['PASSWORD_HASH_THREADS']
+        self.slots = threading.BoundedSemaphore(self.threads + app.config['PASSWORD_HASH_QUEUE'])
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        """Hash a password with the configured parameters"""
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash
+
+        A missing hash is checked against a dummy one, so unknown usernames
+        take as long as wrong passwords.
+        """
+        if password_hash is None:
+            self._run(check_password_hash, self.get_dummy_hash(), password)
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with different parameters"""
+        prefix, _, rest = password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return prefix != self.get_current_prefix() or len(salt) != self.salt_length
+
+    def get_current_prefix(self):
+        # Werkzeug expands defaults (e.g. "scrypt" -> "scrypt:32768:8:1"),
+        # so learn the canonical prefix from a real hash.
+        if self._current_prefix is None:
+            self._current_prefix = self.get_dummy_hash().partition('$')[0]
+        return self._current_prefix
+
+    def get_dummy_hash(self):
+        if self._dummy_hash is None:
+            self._dummy_hash = generate_password_hash(os.urandom(16).hex(), self.method, self.salt_length)
+        return self._dummy_hash
+
+    def _run(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+    def _get_executor(self):
+        # Threads do not survive fork, so each worker builds its own pool.
+        if self.executor and self.pid == os.getpid():
+            return self.executor
+        with self.lock:
+            if not self.executor or self.pid != os.getpid():
+                self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='password-hasher')
+                self.pid = os.getpid()
+        return self.executor
+
+class LoginRecorder:
+    """Batch last_login updates instead of committing one per login
+
+    Logins are collected in memory and written in a single bulk UPDATE every
+    LAST_LOGIN_FLUSH_SECONDS, through the SQLite write queue when it is
+    enabled. Pending updates are flushed at exit; a crash loses at most one
+    interval of last_login times.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.pending = {}  # user id -> last login time
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read flush settings and register the recorder"""
+        self.app = app
+        self.interval = app.config['LAST_LOGIN_FLUSH_SECONDS']
+        app.extensions['login_recorder'] = self
+        atexit.register(self.flush)
+
+    def record(self, user_id, when=None):
+        """Note a login, to be written on the next flush"""
+        with self.lock:
+            self.pending[user_id] = when or datetime.utcnow()
+        if self.interval <= 0:
+            self.flush()
+        else:
+            self._ensure_started()
+
+    def flush(self):
+        """Write pending last_login times, returning how many were written"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+
+        rows = [{'id': user_id, 'last_login': when} for user_id, when in pending.items()]
+        try:
+            with self.app.app_context():
+                self.app.extensions['write_queue'].submit(self._write, rows)
+        except Exception as e:
+            print(f"Error recording last logins: {e}")
+            with self.lock:
+                for user_id, when in pending.items():
+                    self.pending.setdefault(user_id, when)
+            return 0
+        return len(rows)
+
+    @staticmethod
+    def _write(rows):
+        db.session.execute(update(User), rows)
+        db.session.commit()
+
+    def _ensure_started(self):
+        if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, name='login-recorder', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
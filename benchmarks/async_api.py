@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Async API tier benchmark
+
+Serves the JSON APIs from the sync stack (gunicorn sync workers running the
+Flask app) and from the async tier (uvicorn running asgi:app) with the same
+number of worker processes, then drives both at increasing concurrency and
+reports throughput and latency percentiles.
+
+Every fifth request logs a workout; the rest read dashboard and chart data.
+Uses a temporary SQLite file unless DATABASE_TYPE and the matching
+connection variables are already set. SQLite has no network round trips
+for the async tier to overlap, so run against PostgreSQL or MySQL, on a
+machine with spare cores for the load generator, for representative numbers.
+
+Usage:
+    python benchmarks/async_api.py --workers 4 --concurrency 1 16 64
+    DATABASE_TYPE=postgresql POSTGRES_HOST=db python benchmarks/async_api.py
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def configure_environment():
+    """Point the app at the benchmark database before it is imported"""
+    sys.path.insert(0, ROOT)
+    if not os.environ.get('DATABASE_TYPE'):
+        os.environ['DATABASE_TYPE'] = 'sqlite'
+        os.environ['SQLITE_DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+    os.environ['QUERY_INSTRUMENTATION'] = 'false'
+
+def setup_database():
+    """Create the schema and a user, and return a signed session cookie for it"""
+    from app import create_app
+    from models import db, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        user = User.query.filter_by(username='bench').first()
+        if not user:
+            user = User(username='bench', email='bench@example.com', bmi=23.0)
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+        serializer = app.session_interface.get_signing_serializer(app)
+        return app.config['SESSION_COOKIE_NAME'], serializer.dumps({'_user_id': str(user.id), '_fresh': True})
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(stack, workers, port):
+    """Start a server process and wait until it accepts connections"""
+    if stack == 'sync':
+        command = [sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+                   '--worker-class', 'sync', '--bind', f'127.0.0.1:{port}', 'app:create_app()']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', '--workers', str(workers),
+                   '--port', str(port), '--log-level', 'warning', 'asgi:app']
+
+    process = subprocess.Popen(command, cwd=ROOT, env=os.environ.copy(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{stack} server did not start on port {port}")
+
+async def run_load(port, cookie, concurrency, requests):
+    """Send requests with at most concurrency in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', cookies=dict([cookie]),
+                                 limits=httpx.Limits(max_connections=concurrency), timeout=60) as client:
+        async def send(request_number):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    if request_number % 5 == 0:
+                        response = await client.post('/log_workout', json={
+                            'workout_type': 'Cardio', 'session_duration': 0.5, 'calories_burned': 250
+                        })
+                    elif request_number % 2 == 0:
+                        response = await client.get('/api/dashboard_data')
+                    else:
+                        response = await client.get('/api/chart_data/macro_breakdown')
+                    if response.status_code >= 500 or response.status_code == 401:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(n) for n in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return sorted(latencies), errors, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Async API tier benchmark')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--requests', type=int, default=500, help='requests per concurrency level')
+    args = parser.parse_args()
+
+    configure_environment()
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        cookie = pool.apply(setup_database)
+
+    print("ASYNC API BENCHMARK")
+    print("=" * 70)
+    print(f"Database: {os.environ['DATABASE_TYPE']}")
+    print(f"Workers: {args.workers}")
+    print(f"{'Stack':<8}{'Concurrency':>12}{'Req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'Errors':>10}")
+
+    for stack in ('sync', 'async'):
+        port = get_free_port()
+        server = start_server(stack, args.workers, port)
+        try:
+            asyncio.run(run_load(port, cookie, 1, 20))  # warm up workers
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = asyncio.run(run_load(port, cookie, concurrency, args.requests))
+                print(f"{stack:<8}{concurrency:>12}{len(latencies) / elapsed:>10.1f}"
+                      f"{statistics.median(latencies) * 1000:>10.1f}"
+                      f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>10.1f}"
+                      f"{latencies[-1] * 1000:>10.1f}{errors:>10}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark
+
+Runs N worker processes, each with T request threads posting /login through
+the Flask test client, for every password hash method given, and reports
+logins per second overall and per core. Users are created with the method
+under test, so no rehashing happens during the run.
+
+Usage:
+    python benchmarks/login_throughput.py --workers 2 --threads 4 --seconds 10
+    python benchmarks/login_throughput.py --methods scrypt:16384:8:1 pbkdf2:sha256:600000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def configure_environment(db_path, method, threads):
+    """Point the app at the benchmark database before it is imported"""
+    sys.path.insert(0, ROOT)
+    os.environ['DATABASE_TYPE'] = 'sqlite'
+    os.environ['SQLITE_DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['QUERY_INSTRUMENTATION'] = 'false'
+    os.environ['SCHEDULER_LEADER_ELECTION'] = 'false'
+    os.environ['PASSWORD_HASH_METHOD'] = method
+    os.environ['PASSWORD_HASH_THREADS'] = str(threads)
+
+def setup_database(db_path, method, users):
+    """Create the schema and users hashed with the method under test"""
+    configure_environment(db_path, method, 1)
+    from app import create_app
+    from cli import init_database
+    from models import db, User
+
+    app = create_app()
+    password_hash = app.extensions['password_hasher'].hash('password123')
+    with app.app_context():
+        init_database(seed=False)
+        for index in range(users):
+            db.session.add(User(username=f'bench{index}', email=f'bench{index}@example.com',
+                                password_hash=password_hash))
+        db.session.commit()
+
+def run_worker(args):
+    """Log in repeatedly from several threads until the deadline"""
+    index, db_path, method, threads, users, seconds = args
+    configure_environment(db_path, method, threads)
+    from app import create_app
+
+    app = create_app()
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.time() + seconds
+
+    def run_thread(thread_index):
+        client = app.test_client()
+        username = f'bench{(index * threads + thread_index) % users}'
+        while time.time() < deadline:
+            response = client.post('/login', data={'username': username, 'password': 'password123'})
+            if response.status_code == 200:
+                counts[thread_index] += 1
+            else:
+                errors[thread_index] += 1
+
+    workers = [threading.Thread(target=run_thread, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    app.extensions['login_recorder'].flush()
+    return sum(counts), sum(errors)
+
+def main():
+    parser = argparse.ArgumentParser(description='Login throughput benchmark')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--threads', type=int, default=4, help='request threads per worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--methods', nargs='+', default=['scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000'])
+    args = parser.parse_args()
+
+    cores = min(args.workers, multiprocessing.cpu_count())
+    context = multiprocessing.get_context('spawn')
+
+    print("LOGIN THROUGHPUT BENCHMARK")
+    print("=" * 70)
+    print(f"Workers: {args.workers} x {args.threads} threads on {cores} cores, {args.seconds:g}s per method")
+    print(f"{'Method':<28}{'Logins':>10}{'Logins/s':>12}{'Per core':>12}{'Errors':>8}")
+
+    for method in args.methods:
+        db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+        with context.Pool(1) as pool:
+            pool.apply(setup_database, (db_path, method, args.users))
+
+        with context.Pool(args.workers) as pool:
+            results = pool.map(run_worker, [
+                (index, db_path, method, args.threads, args.users, args.seconds)
+                for index in range(args.workers)
+            ])
+
+        # Each worker starts its clock after creating the app
+        logins = sum(count for count, _ in results)
+        errors = sum(error for _, error in results)
+        rate = logins / args.seconds
+        print(f"{method:<28}{logins:>10}{rate:>12.1f}{rate / cores:>12.1f}{errors:>8}")
+
+if __name__ == '__main__':
+    main()
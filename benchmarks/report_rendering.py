@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Report rendering benchmark
+
+Renders reports for synthetic datasets of increasing length, without a
+database, and reports the time taken and the peak Python memory of each
+render. Reports are rendered from a preloaded dataset, as bulk workers do, so
+the peak is measured on top of its frames. Excel reports rendered in the app
+without a dataset stream their logs from the database cursor instead, and keep
+only per-day totals, so their memory doesn't grow with the number of logs.
+
+With --reports N it then renders N monthly PDF reports back to back, each
+with a fresh ReportGenerator as the job queue does, and reports PDFs per
+second and the peak RSS of the process.
+
+Usage:
+    python benchmarks/report_rendering.py --years 1 3 10 --workouts-per-day 2
+    python benchmarks/report_rendering.py --formats pdf --years 1 --reports 200
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_dataset(days, workouts_per_day):
+    """A ReportDataset of synthetic logs for the days up to today"""
+    import numpy as np
+    import pandas as pd
+    from report_data import ReportDataset, WORKOUT_COLUMNS, NUTRITION_COLUMNS
+
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    days = pd.date_range(start_date, end_date, freq='D').date
+    rng = np.random.default_rng(0)
+
+    workout_days = np.repeat(days, workouts_per_day)
+    workouts = pd.DataFrame({
+        'workout_date': workout_days,
+        'workout_type': rng.choice(['Cardio', 'Strength', 'HIIT', 'Yoga'], len(workout_days)),
+        'session_duration': rng.uniform(0.25, 1.5, len(workout_days)),
+        'calories_burned': rng.integers(150, 800, len(workout_days)).astype(float),
+        'max_bpm': rng.integers(150, 190, len(workout_days)).astype(float),
+        'avg_bpm': rng.integers(110, 150, len(workout_days)).astype(float),
+        'resting_bpm': rng.integers(50, 75, len(workout_days)).astype(float)
+    }, columns=WORKOUT_COLUMNS)
+    nutrition = pd.DataFrame({
+        'log_date': days,
+        'daily_meals_frequency': rng.integers(2, 6, len(days)).astype(float),
+        'calories': rng.integers(1500, 3000, len(days)).astype(float),
+        'carbs': rng.integers(150, 350, len(days)).astype(float),
+        'proteins': rng.integers(60, 180, len(days)).astype(float),
+        'fats': rng.integers(40, 120, len(days)).astype(float),
+        'water_intake': rng.uniform(1.0, 4.0, len(days))
+    }, columns=NUTRITION_COLUMNS)
+
+    user = SimpleNamespace(id=1, username='bench', email='bench@example.com', age=30, gender='Other',
+                           weight=70.0, height=1.75, bmi=22.9, fat_percentage=18.0, experience_level=2)
+    return ReportDataset(user, start_date, end_date, workouts, nutrition)
+
+def render(dataset, report_format):
+    """Render one report, returning (seconds, peak bytes, file bytes)"""
+    from report_generator import ReportGenerator
+
+    generator = ReportGenerator(dataset.user, dataset.start_date, dataset.end_date, dataset)
+    handle, path = tempfile.mkstemp(suffix='.xlsx' if report_format == 'excel' else '.pdf')
+    os.close(handle)
+    try:
+        tracemalloc.start()
+        started = time.perf_counter()
+        if report_format == 'excel':
+            generator.generate_excel_report(path)
+        else:
+            generator.generate_pdf_report(path)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return seconds, peak, os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+def render_batch(count, workouts_per_day):
+    """Render count monthly PDFs, returning (seconds, PDFs per second)"""
+    from report_generator import ReportGenerator
+
+    dataset = make_dataset(30, workouts_per_day)
+    handle, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(handle)
+    try:
+        started = time.perf_counter()
+        for _ in range(count):
+            generator = ReportGenerator(dataset.user, dataset.start_date, dataset.end_date, dataset)
+            generator.generate_pdf_report(path)
+        seconds = time.perf_counter() - started
+    finally:
+        os.remove(path)
+    return seconds, count / seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 3, 10])
+    parser.add_argument('--workouts-per-day', type=int, default=2)
+    parser.add_argument('--formats', nargs='+', default=['excel'], choices=['excel', 'pdf'])
+    parser.add_argument('--reports', type=int, default=0, help='monthly PDFs to render for throughput')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    render(make_dataset(30, 1), args.formats[0])  # warm up imports
+
+    print(f"{'format':<8}{'years':>6}{'rows':>9}{'seconds':>10}{'peak MiB':>10}{'file KiB':>10}")
+    for report_format in args.formats:
+        for years in args.years:
+            dataset = make_dataset(365 * years, args.workouts_per_day)
+            rows = len(dataset.workouts) + len(dataset.nutrition) + len(dataset.daily)
+            seconds, peak, size = render(dataset, report_format)
+            print(f"{report_format:<8}{years:>6}{rows:>9}{seconds:>10.2f}{peak / 2**20:>10.1f}{size / 2**10:>10.0f}")
+
+    if args.reports:
+        seconds, rate = render_batch(args.reports, args.workouts_per_day)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        print(f"\n{args.reports} PDFs in {seconds:.2f}s: {rate:.1f} PDFs/s, peak RSS {peak_rss:.0f} MiB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+SQLite concurrency benchmark
+
+Runs N worker processes against one SQLite file, each logging workouts and
+reading history through the Flask test client, and reports throughput,
+latency percentiles and lock errors.
+
+Usage:
+    python benchmarks/sqlite_concurrency.py --workers 4 --requests 200
+    python benchmarks/sqlite_concurrency.py --workers 4 --requests 200 --no-profile
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def configure_environment(db_path, profile):
+    """Point the app at the benchmark database before it is imported"""
+    sys.path.insert(0, ROOT)
+    os.environ['DATABASE_TYPE'] = 'sqlite'
+    os.environ['SQLITE_DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['SQLITE_PRODUCTION_PROFILE'] = 'true' if profile else 'false'
+    os.environ['QUERY_INSTRUMENTATION'] = 'false'
+
+def setup_database(db_path, profile, workers):
+    """Create the schema and one user per worker"""
+    configure_environment(db_path, profile)
+    from app import create_app
+    from models import db, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for index in range(workers):
+            user = User(username=f'bench{index}', email=f'bench{index}@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+        db.session.commit()
+
+def run_worker(args):
+    """Log workouts and read history as one user"""
+    index, db_path, profile, requests = args
+    configure_environment(db_path, profile)
+    from app import create_app
+
+    app = create_app()
+    client = app.test_client()
+    client.post('/login', data={'username': f'bench{index}', 'password': 'password123'})
+
+    latencies = []
+    errors = 0
+    started = time.time()
+    for request_number in range(requests):
+        start = time.perf_counter()
+        if request_number % 2 == 0:
+            response = client.post('/log_workout', json={
+                'workout_type': 'Strength',
+                'session_duration': 1,
+                'calories_burned': 300,
+                'exercises': [{'name': 'Squats', 'sets': 3, 'reps': 10}]
+            })
+        else:
+            response = client.get('/api/workouts?per_page=20')
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors += 1
+
+    return latencies, errors, started, time.time()
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite concurrency benchmark')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--requests', type=int, default=200, help='requests per worker')
+    parser.add_argument('--no-profile', action='store_true', help='run with default SQLite settings')
+    args = parser.parse_args()
+
+    profile = not args.no_profile
+    db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    context = multiprocessing.get_context('spawn')
+
+    setup = context.Process(target=setup_database, args=(db_path, profile, args.workers))
+    setup.start()
+    setup.join()
+
+    with context.Pool(args.workers) as pool:
+        results = pool.map(run_worker, [(i, db_path, profile, args.requests) for i in range(args.workers)])
+
+    # Measure from the first worker starting requests to the last finishing,
+    # so app start-up in each process is excluded.
+    elapsed = max(r[3] for r in results) - min(r[2] for r in results)
+    latencies = sorted(latency for r in results for latency in r[0])
+    errors = sum(r[1] for r in results)
+
+    print("SQLITE CONCURRENCY BENCHMARK")
+    print("=" * 50)
+    print(f"Profile: {'production' if profile else 'default'}")
+    print(f"Workers: {args.workers}")
+    print(f"Requests: {len(latencies)} ({errors} errors)")
+    print(f"Elapsed: {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency p50: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latency p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"Latency max: {latencies[-1] * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime
+from types import SimpleNamespace
+from models import db, User, Report
+from report_cache import get_data_versions, get_download_name
+from report_data import ReportDataset, get_report_range, get_row_values
+
+class BulkReportRun:
+    """Progress of one bulk send: counts, throughput and per-user failures"""
+
+    def __init__(self, report_type, total):
+        self.report_type = report_type
+        self.total = total
+        self.cached = 0
+        self.rendered = 0
+        self.sent = 0
+        self.failures = {}  # user id -> error
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self):
+        """Reports sent per second"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def fail(self, user_id, error):
+        with self.lock:
+            self.failures[user_id] = str(error)[:500]
+        print(f"Error sending {self.report_type} report to user {user_id}: {error}")
+
+    def summary(self):
+        return (f"{self.report_type.title()} reports: {self.sent}/{self.total} sent "
+                f"({self.rendered} rendered, {self.cached} cached), {len(self.failures)} failed "
+                f"in {self.elapsed:.1f}s, {self.throughput:.1f} reports/s")
+
+class BulkReportSender:
+    """Send a scheduled report to every opted-in user as a three-stage pipeline
+
+    Users are taken REPORT_BULK_BATCH_SIZE at a time. A batch's datasets are
+    fetched with a fixed set of queries (ReportDataset.load_many); reports
+    not already in the ReportCache are rendered on a process pool, one
+    worker per CPU unless REPORT_BULK_WORKERS says otherwise; and finished
+    reports go to a sender thread that mails them over one SMTP connection.
+    The stages overlap, so the next batch is fetched while earlier ones
+    render and send. Failures are recorded per user and never stop the run;
+    the cache is trimmed once at the end rather than after every file.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read bulk report settings and register the sender"""
+        self.app = app
+        self.workers = app.config['REPORT_BULK_WORKERS'] or os.cpu_count() or 1
+        self.batch_size = app.config['REPORT_BULK_BATCH_SIZE']
+        app.extensions['bulk_reports'] = self
+
+    @property
+    def cache(self):
+        return self.app.extensions['report_cache']
+
+    def send(self, report_type, users_query, report_format='pdf'):
+        """Send report_type to every user matched by users_query; returns the
+        run's BulkReportRun. Call within an app context."""
+        start_date, end_date = get_report_range(report_type, date.today())
+        user_ids = [user_id for (user_id,) in users_query.with_entities(User.id).order_by(User.id)]
+        run = BulkReportRun(report_type, len(user_ids))
+        if not user_ids:
+            return run
+
+        outbox = queue.Queue()
+        sender = threading.Thread(target=self.send_reports, args=(outbox, run, start_date, end_date),
+                                  name='report-sender', daemon=True)
+        sender.start()
+        pending = {}  # render future -> job
+        try:
+            # spawn, as forking would copy the scheduler's and web server's threads
+            with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                for offset in range(0, len(user_ids), self.batch_size):
+                    batch = user_ids[offset:offset + self.batch_size]
+                    try:
+                        self.submit_batch(pool, batch, report_format, start_date, end_date, pending, outbox, run)
+                    except Exception as e:
+                        db.session.rollback()
+                        for user_id in batch:
+                            run.fail(user_id, e)
+                    # Keep the pool busy, but don't hold more than a batch of datasets
+                    self.collect(pending, outbox, run, limit=self.workers * 2)
+                self.collect(pending, outbox, run, limit=0)
+        finally:
+            outbox.put(None)
+            sender.join()
+        self.cache.evict()
+        print(run.summary())
+        return run
+
+    def submit_batch(self, pool, user_ids, report_format, start_date, end_date, pending, outbox, run):
+        """Fetch stage: queue cached reports for sending and the rest for rendering"""
+        users = User.query.filter(User.id.in_(user_ids)).all()
+        versions = get_data_versions(user_ids)
+
+        misses = []
+        for user in users:
+            storage_key = self.cache.get_storage_key(user.id, start_date, end_date, report_format,
+                                                     versions[user.id])
+            if self.cache.touch(storage_key):
+                run.cached += 1
+                outbox.put(SimpleNamespace(user=get_row_values(user), report_format=report_format,
+                                           storage_key=storage_key, data=None))
+            else:
+                misses.append((user, storage_key))
+        if not misses:
+            return
+
+        datasets = ReportDataset.load_many([user for user, _ in misses], start_date, end_date)
+        for user, storage_key in misses:
+            dataset = datasets[user.id].detach()
+            job = SimpleNamespace(user=dataset.user, report_format=report_format, storage_key=storage_key, data=None)
+            try:
+                pending[pool.submit(render_report, dataset, report_format, self.cache.spool_size)] = job
+            except Exception as e:
+                run.fail(user.id, e)
+
+    def collect(self, pending, outbox, run, limit):
+        """Store finished renders and pass them on until at most limit are pending"""
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                try:
+                    job.data = future.result()
+                    self.cache.store(io.BytesIO(job.data), job.storage_key, evict=False)
+                except Exception as e:
+                    run.fail(job.user.id, e)
+                    continue
+                run.rendered += 1
+                outbox.put(job)
+
+    def send_reports(self, outbox, run, start_date, end_date):
+        """Sender stage: mail reports as they arrive until None is received
+
+        Fresh renders are attached from the bytes the pool returned; only
+        cached reports are read from storage.
+        """
+        email_service = self.app.extensions['email_service']
+        with self.app.app_context():
+            sender = self.app.config['MAIL_USERNAME']
+            server = None
+            sent = []
+            while True:
+                job = outbox.get()
+                if job is None:
+                    break
+                recipients = [job.user.email]
+                try:
+                    if job.data is None:
+                        with self.cache.storage.open(job.storage_key) as stream:
+                            job.data = stream.read()
+                    attachment = (get_download_name(run.report_type, end_date, job.report_format), job.data)
+                    msg = email_service.build_report_email(job.user, run.report_type, recipients, attachment)
+                    server = server or email_service.connect()
+                    server.sendmail(sender, recipients, msg.as_string())
+                except Exception as e:
+                    run.fail(job.user.id, e)
+                    server = self.disconnect(server)  # reconnect for the next report
+                    continue
+
+                run.sent += 1
+                sent.append(Report(user_id=job.user.id, report_type=run.report_type, report_format=job.report_format,
+                                   storage_key=job.storage_key, email_sent=True, email_recipients=job.user.email,
+                                   start_date=start_date, end_date=end_date, status='ready',
+                                   completed_at=datetime.utcnow()))
+                if len(sent) >= self.batch_size:
+                    self.log_sent(sent)
+                    sent = []
+                    print(run.summary())
+            self.log_sent(sent)
+            self.disconnect(server)
+
+    @staticmethod
+    def log_sent(reports):
+        """Record a batch of sent reports"""
+        if not reports:
+            return
+        try:
+            db.session.add_all(reports)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error logging sent reports: {e}")
+
+    @staticmethod
+    def disconnect(server):
+        if server:
+            try:
+                server.quit()
+            except Exception:
+                pass
+        return None
+
+def render_report(dataset, report_format, spool_size):
+    """Render a detached dataset's report and return its bytes; runs in a
+    pool process"""
+    from report_generator import ReportGenerator
+    generator = ReportGenerator(dataset.user, dataset.start_date, dataset.end_date, dataset, spool_size)
+    with generator.render(report_format) as buffer:
+        return buffer.read()
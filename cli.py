@@ -0,0 +1,146 @@
+import click
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from models import db, Exercise, Report, User
+from archive import ARCHIVED_TABLES
+from exports import EXPORT_FORMATS, iter_export_batches, stream_export
+from summary_views import create_summary_views
+from exercise_search import create_search_index
+from exercise_catalog import seed_version
+
+SAMPLE_EXERCISES = [
+    {
+        'name': 'Push-ups',
+        'benefit': 'Builds upper body strength, improves core stability',
+        'burns_calories_per_30min': 200,
+        'target_muscle_group': 'Chest, Shoulders, Triceps',
+        'equipment_needed': 'None',
+        'difficulty_level': 'Beginner',
+        'body_part': 'Arms',
+        'type_of_muscle': 'Upper',
+        'instructions': 'Start in plank position, lower body to ground, push back up'
+    },
+    {
+        'name': 'Squats',
+        'benefit': 'Builds leg strength, improves mobility',
+        'burns_calories_per_30min': 180,
+        'target_muscle_group': 'Quadriceps, Glutes, Hamstrings',
+        'equipment_needed': 'None',
+        'difficulty_level': 'Beginner',
+        'body_part': 'Legs',
+        'type_of_muscle': 'Lower',
+        'instructions': 'Stand with feet shoulder-width apart, lower as if sitting in chair, return to standing'
+    },
+    {
+        'name': 'Plank',
+        'benefit': 'Strengthens core, improves posture',
+        'burns_calories_per_30min': 150,
+        'target_muscle_group': 'Core, Shoulders',
+        'equipment_needed': 'None',
+        'difficulty_level': 'Beginner',
+        'body_part': 'Core',
+        'type_of_muscle': 'Core',
+        'instructions': 'Hold plank position with straight body line, engage core'
+    },
+    {
+        'name': 'Burpees',
+        'benefit': 'Full body workout, improves cardiovascular fitness',
+        'burns_calories_per_30min': 300,
+        'target_muscle_group': 'Full Body',
+        'equipment_needed': 'None',
+        'difficulty_level': 'Intermediate',
+        'body_part': 'Full Body',
+        'type_of_muscle': 'Full Body',
+        'instructions': 'Squat down, jump back to plank, do push-up, jump feet forward, jump up'
+    },
+    {
+        'name': 'Mountain Climbers',
+        'benefit': 'Cardio workout, strengthens core and shoulders',
+        'burns_calories_per_30min': 250,
+        'target_muscle_group': 'Core, Shoulders, Legs',
+        'equipment_needed': 'None',
+        'difficulty_level': 'Intermediate',
+        'body_part': 'Full Body',
+        'type_of_muscle': 'Full Body',
+        'instructions': 'Start in plank, alternate bringing knees to chest rapidly'
+    }
+]
+
+# Columns added to tables after they first shipped. create_all() never
+# alters an existing table, so init-db adds any an older database lacks.
+ADDED_COLUMNS = [
+    (User, 'report_data_version'),
+    (Report, 'status'),
+    (Report, 'error'),
+    (Report, 'completed_at'),
+    (Report, 'status_changed_at')
+]
+
+def init_database(seed=True):
+    """Create tables, summary views and the exercise search index, and
+    optionally seed sample exercises"""
+    db.create_all()
+    add_missing_columns()
+    seed_version()
+    create_summary_views()
+    create_search_index()
+    print("Database tables created successfully!")
+
+    if seed:
+        seed_exercises()
+
+def add_missing_columns():
+    """Add the ADDED_COLUMNS that existing tables don't have yet"""
+    dialect = db.engine.dialect
+    inspector = inspect(db.engine)
+    add = 'ADD' if dialect.name == 'mssql' else 'ADD COLUMN'
+    with db.engine.begin() as connection:
+        for model, name in ADDED_COLUMNS:
+            table = model.__table__
+            if name in {column['name'] for column in inspector.get_columns(table.name)}:
+                continue
+            column = CreateColumn(table.c[name]).compile(dialect=dialect)
+            connection.execute(text(f'ALTER TABLE {dialect.identifier_preparer.format_table(table)} {add} {column}'))
+            print(f"Added column {table.name}.{name}")
+
+def seed_exercises():
+    """Add the sample exercises if the exercise library is empty"""
+    seed_version()  # so adding them bumps the catalog version
+    if Exercise.query.first():
+        print("Sample exercises already exist in database")
+        return
+
+    for exercise_data in SAMPLE_EXERCISES:
+        db.session.add(Exercise(**exercise_data))
+    db.session.commit()
+    print("Sample exercises added to database")
+
+def register_commands(app):
+    """Register database management commands with the Flask CLI"""
+
+    @app.cli.command('init-db')
+    @click.option('--seed/--no-seed', default=True, help='Add sample exercises to an empty library.')
+    def init_db_command(seed):
+        """Create tables, summary views and search indexes."""
+        init_database(seed)
+
+    @app.cli.command('seed-db')
+    def seed_db_command():
+        """Add sample exercises to an empty exercise library."""
+        seed_exercises()
+
+    @app.cli.command('export-logs')
+    @click.argument('table', type=click.Choice(list(ARCHIVED_TABLES)))
+    @click.argument('output', type=click.Path(dir_okay=False))
+    @click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='parquet')
+    @click.option('--start', type=click.DateTime(['%Y-%m-%d']), help='First day to export.')
+    @click.option('--end', type=click.DateTime(['%Y-%m-%d']), help='Last day to export.')
+    @click.option('--user-id', type=int, help='Export one user instead of everyone.')
+    def export_logs_command(table, output, export_format, start, end, user_id):
+        """Export raw logs of every user, archived months included."""
+        batches = iter_export_batches(table, start and start.date(), end and end.date(), user_id)
+        mode, encoding = ('w', 'utf-8') if export_format == 'csv' else ('wb', None)
+        with open(output, mode, encoding=encoding, newline='' if encoding else None) as f:
+            for chunk in stream_export(table, export_format, batches):
+                f.write(chunk)
+        print(f"Exported {table} to {output}")
@@ -24,11 +24,82 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     
     # Report settings
-    REPORTS_FOLDER = 'reports'
+    REPORT_STORAGE = os.environ.get('REPORT_STORAGE') or 'local'  # local or s3
+    REPORTS_FOLDER = os.environ.get('REPORTS_FOLDER') or 'reports'  # local storage
+    REPORT_S3_BUCKET = os.environ.get('REPORT_S3_BUCKET')
+    REPORT_S3_PREFIX = os.environ.get('REPORT_S3_PREFIX', 'reports/')
+    REPORT_S3_ENDPOINT_URL = os.environ.get('REPORT_S3_ENDPOINT_URL')  # MinIO and other S3-compatible servers
+    REPORT_S3_REGION = os.environ.get('REPORT_S3_REGION')
+    REPORT_S3_ACCESS_KEY = os.environ.get('REPORT_S3_ACCESS_KEY')
+    REPORT_S3_SECRET_KEY = os.environ.get('REPORT_S3_SECRET_KEY')
+    REPORT_S3_PRESIGNED = os.environ.get('REPORT_S3_PRESIGNED', 'true').lower() in ['true', 'on', '1']
+    REPORT_URL_EXPIRY_SECONDS = int(os.environ.get('REPORT_URL_EXPIRY_SECONDS') or 300)
+    SUMMARY_REFRESH_MINUTES = int(os.environ.get('SUMMARY_REFRESH_MINUTES') or 15)
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS') or 2)  # concurrent renders per process
+    REPORT_QUEUE_SIZE = int(os.environ.get('REPORT_QUEUE_SIZE') or 16)  # waiting reports before 503
+    REPORT_STALE_MINUTES = int(os.environ.get('REPORT_STALE_MINUTES') or 15)  # then lost jobs are recovered
+    REPORT_CACHE_MAX_MB = int(os.environ.get('REPORT_CACHE_MAX_MB') or 512)
+    REPORT_CACHE_MAX_AGE_DAYS = int(os.environ.get('REPORT_CACHE_MAX_AGE_DAYS') or 30)
+    REPORT_SPOOL_MAX_MB = int(os.environ.get('REPORT_SPOOL_MAX_MB') or 16)  # render in memory up to this
+    REPORT_BULK_WORKERS = int(os.environ.get('REPORT_BULK_WORKERS') or 0)  # 0: one per CPU
+    REPORT_BULK_BATCH_SIZE = int(os.environ.get('REPORT_BULK_BATCH_SIZE') or 200)  # users per fetch
+    
+    # Raw log exports: rows per database round trip and per Parquet row group
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE') or 5000)
+    
+    # Cold storage for old logs. Off by default: the folder must be a
+    # persistent disk shared by every instance, or archived logs are lost.
+    # Reads only look in it while this is on.
+    ARCHIVE_ENABLED = os.environ.get('ARCHIVE_ENABLED', 'false').lower() in ['true', 'on', '1']
+    ARCHIVE_FOLDER = os.environ.get('ARCHIVE_FOLDER') or 'archive'
+    ARCHIVE_HORIZON_DAYS = int(os.environ.get('ARCHIVE_HORIZON_DAYS') or 365)
+    ARCHIVE_COMPRESSION = os.environ.get('ARCHIVE_COMPRESSION') or 'zstd'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     
+    # SQLite production profile (single-node deployments)
+    SQLITE_PRODUCTION_PROFILE = os.environ.get('SQLITE_PRODUCTION_PROFILE', 'true').lower() in ['true', 'on', '1']
+    SQLITE_WRITE_QUEUE = os.environ.get('SQLITE_WRITE_QUEUE', 'true').lower() in ['true', 'on', '1']
+    SQLITE_WRITE_QUEUE_SIZE = int(os.environ.get('SQLITE_WRITE_QUEUE_SIZE') or 1000)
+    SQLITE_WRITE_TIMEOUT = int(os.environ.get('SQLITE_WRITE_TIMEOUT') or 30)  # seconds
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)  # bytes
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE') or -64000)  # negative = KiB
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    
+    # Query instrumentation
+    QUERY_INSTRUMENTATION = os.environ.get('QUERY_INSTRUMENTATION', 'true').lower() in ['true', 'on', '1']
+    QUERY_LOG = os.environ.get('QUERY_LOG', 'false').lower() in ['true', 'on', '1']
+    QUERY_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_N_PLUS_ONE_THRESHOLD') or 5)
+    
+    # Scheduled jobs, started in each serving process (off for tests and one-off scripts)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    
+    # Scheduler leader election (one process runs scheduled jobs)
+    SCHEDULER_LEADER_ELECTION = os.environ.get('SCHEDULER_LEADER_ELECTION', 'true').lower() in ['true', 'on', '1']
+    SCHEDULER_LEADER_INTERVAL = int(os.environ.get('SCHEDULER_LEADER_INTERVAL') or 30)  # seconds
+    SCHEDULER_LOCK_NAME = os.environ.get('SCHEDULER_LOCK_NAME') or 'lifestyle-analytics-scheduler'
+    SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.environ.get('SCHEDULER_MISFIRE_GRACE_SECONDS') or 300)
+    
+    # Password hashing and login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_HASH_SALT_LENGTH = int(os.environ.get('PASSWORD_HASH_SALT_LENGTH') or 16)
+    PASSWORD_HASH_THREADS = int(os.environ.get('PASSWORD_HASH_THREADS') or os.cpu_count() or 1)
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 32)  # waiting checks before 503
+    LAST_LOGIN_FLUSH_SECONDS = int(os.environ.get('LAST_LOGIN_FLUSH_SECONDS') or 5)
+    
+    # Per-process cache of the logged-in user
+    USER_CACHE = os.environ.get('USER_CACHE', 'true').lower() in ['true', 'on', '1']
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 60)  # seconds
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 10000)
+    
+    # In-memory exercise catalog
+    EXERCISE_CATALOG_CHECK_SECONDS = int(os.environ.get('EXERCISE_CATALOG_CHECK_SECONDS') or 5)
+    RECOMMENDATION_HISTORY_DAYS = int(os.environ.get('RECOMMENDATION_HISTORY_DAYS') or 28)
+    
+    # Async API tier (asgi.py)
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE') or 10)
+    
     # Pagination
     POSTS_PER_PAGE = 20
\ No newline at end of file
@@ -1,6 +1,15 @@
 import pymysql
 import os
 
+# Columns added to tables after they first shipped, as (table, column, definition)
+ADDED_COLUMNS = [
+    ('users', 'report_data_version', 'INT NOT NULL DEFAULT 0'),
+    ('reports', 'status', "VARCHAR(20) DEFAULT 'ready'"),
+    ('reports', 'error', 'TEXT'),
+    ('reports', 'completed_at', 'DATETIME'),
+    ('reports', 'status_changed_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP')
+]
+
 def create_mysql_database():
     """Create MySQL database for the lifestyle analytics project"""
 
@@ -47,7 +56,8 @@ def create_mysql_database():
                     last_login DATETIME,
                     daily_reports BOOLEAN DEFAULT FALSE,
                     weekly_reports BOOLEAN DEFAULT TRUE,
-                    monthly_reports BOOLEAN DEFAULT TRUE
+                    monthly_reports BOOLEAN DEFAULT TRUE,
+                    report_data_version INT NOT NULL DEFAULT 0
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
                 """,
 
@@ -63,7 +73,9 @@ def create_mysql_database():
                     body_part VARCHAR(30),
                     type_of_muscle VARCHAR(30),
                     instructions TEXT,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FULLTEXT KEY ft_exercises_name (name),
+                    FULLTEXT KEY ft_exercises_search (name, target_muscle_group, benefit, instructions)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
                 """,
 
@@ -181,6 +193,10 @@ def create_mysql_database():
                     file_path VARCHAR(255),
                     email_sent BOOLEAN DEFAULT FALSE,
                     email_recipients TEXT,
+                    status VARCHAR(20) DEFAULT 'ready',
+                    error TEXT,
+                    completed_at DATETIME,
+                    status_changed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     start_date DATE,
                     end_date DATE,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -196,6 +212,17 @@ def create_mysql_database():
 
             print("✓ All tables created successfully!")
 
+            # Add columns that tables created by an older version lack
+            for table, column, definition in ADDED_COLUMNS:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM information_schema.COLUMNS"
+                    " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+                    (table, column)
+                )
+                if not cursor.fetchone()[0]:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                    print(f"✓ Added column {table}.{column}")
+
             # Insert sample exercises
             sample_exercises = [
                 ('Push-ups', 'Builds upper body strength, improves core stability', 200, 'Chest, Shoulders, Triceps', 'None', 'Beginner', 'Arms', 'Upper', 'Start in plank position, lower body to ground, push back up'),
@@ -11,6 +11,7 @@ class DatabaseConfig:
     - Windows: SQL Server (local development)
     - Linux: PostgreSQL (deployment)
     - Fallback: MySQL
+    - DATABASE_TYPE=sqlite: SQLite (single-node edge installs)
     """
     
     # Auto-detect platform and database type
@@ -31,7 +32,7 @@ class DatabaseConfig:
         
         # Check environment variable first (for deployment)
         env_db_type = os.environ.get('DATABASE_TYPE', '').lower()
-        if env_db_type in ['sqlserver', 'postgresql', 'mysql']:
+        if env_db_type in ['sqlserver', 'postgresql', 'mysql', 'sqlite']:
             return env_db_type
         
         # Check for Render.com environment variables
@@ -82,8 +83,8 @@ class DatabaseConfig:
         elif db_type == 'postgresql':
             return cls._get_postgresql_url()
         else:
-            # Fallback to SQLite for development
-            return 'sqlite:///instance/lifestyle_analytics.db'
+            # SQLite for development and single-node deployments
+            return os.environ.get('SQLITE_DATABASE_URL', 'sqlite:///instance/lifestyle_analytics.db')
     
     @classmethod
     def _get_mysql_url(cls):
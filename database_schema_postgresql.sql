@@ -27,9 +27,13 @@ CREATE TABLE IF NOT EXISTS users (
     last_login TIMESTAMP,
     daily_reports BOOLEAN DEFAULT FALSE,
     weekly_reports BOOLEAN DEFAULT TRUE,
-    monthly_reports BOOLEAN DEFAULT TRUE
+    monthly_reports BOOLEAN DEFAULT TRUE,
+    report_data_version INTEGER NOT NULL DEFAULT 0
 );
 
+-- Columns added to users after it first shipped
+ALTER TABLE users ADD COLUMN IF NOT EXISTS report_data_version INTEGER NOT NULL DEFAULT 0;
+
 -- Create indexes for users table
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
@@ -54,6 +58,16 @@ CREATE INDEX IF NOT EXISTS idx_exercises_name ON exercises(name);
 CREATE INDEX IF NOT EXISTS idx_exercises_difficulty ON exercises(difficulty_level);
 CREATE INDEX IF NOT EXISTS idx_exercises_body_part ON exercises(body_part);
 
+-- Full-text search over exercises (see exercise_search.py)
+ALTER TABLE exercises ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(target_muscle_group, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(benefit, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(instructions, '')), 'D')
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_exercises_search ON exercises USING GIN (search_vector);
+
 -- Workout logs table
 CREATE TABLE IF NOT EXISTS workout_logs (
     id SERIAL PRIMARY KEY,
@@ -177,16 +191,84 @@ CREATE TABLE IF NOT EXISTS reports (
     file_path VARCHAR(255),
     email_sent BOOLEAN DEFAULT FALSE,
     email_recipients TEXT,
+    status VARCHAR(20) DEFAULT 'ready',
+    error TEXT,
+    completed_at TIMESTAMP,
+    status_changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     start_date DATE,
     end_date DATE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Columns added to reports after it first shipped
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'ready';
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS error TEXT;
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP;
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS status_changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
 -- Create indexes for reports table
 CREATE INDEX IF NOT EXISTS idx_reports_user_created ON reports(user_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_reports_type ON reports(report_type);
 
+-- Monthly rollups of logs moved to cold storage
+CREATE TABLE IF NOT EXISTS monthly_rollups (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    month DATE NOT NULL,
+    workout_count INTEGER DEFAULT 0,
+    exercise_count INTEGER DEFAULT 0,
+    total_workout_duration REAL DEFAULT 0,
+    total_calories_burned INTEGER DEFAULT 0,
+    nutrition_log_count INTEGER DEFAULT 0,
+    meal_count INTEGER DEFAULT 0,
+    total_calories_consumed INTEGER DEFAULT 0,
+    total_carbs INTEGER DEFAULT 0,
+    total_proteins INTEGER DEFAULT 0,
+    total_fats INTEGER DEFAULT 0,
+    total_water_intake REAL DEFAULT 0,
+    archive_path VARCHAR(255),
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT uq_monthly_rollups_user_month UNIQUE(user_id, month)
+);
+
+-- Job execution records (one row per scheduled job run)
+CREATE TABLE IF NOT EXISTS job_executions (
+    id SERIAL PRIMARY KEY,
+    job_id VARCHAR(100) NOT NULL,
+    scheduled_for TIMESTAMP NOT NULL,
+    worker VARCHAR(100),
+    status VARCHAR(20) DEFAULT 'running',
+    error TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    CONSTRAINT uq_job_executions_job_slot UNIQUE(job_id, scheduled_for)
+);
+
+-- Recurring reports scheduled by users (turned into jobs by the scheduler leader)
+CREATE TABLE IF NOT EXISTS scheduled_reports (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    report_type VARCHAR(20) NOT NULL,
+    frequency VARCHAR(20) NOT NULL,
+    recipients TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT uq_scheduled_reports_user_type_frequency UNIQUE(user_id, report_type, frequency)
+);
+
+-- Catalog versions (bumped when a cached catalog such as exercises changes)
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Catalog changes only ever update their row
+INSERT INTO catalog_versions (name, version) VALUES ('exercises', 0)
+ON CONFLICT (name) DO NOTHING;
+
 -- Insert sample exercises
 INSERT INTO exercises (name, benefit, burns_calories_per_30min, target_muscle_group, equipment_needed, difficulty_level, body_part, type_of_muscle, instructions)
 VALUES
@@ -202,31 +284,84 @@ VALUES
 ('Tricep Dips', 'Builds tricep strength', 170, 'Triceps, Shoulders', 'Chair or bench', 'Intermediate', 'Arms', 'Upper', 'Sit on edge of chair, lower body by bending elbows, push back up')
 ON CONFLICT (name) DO NOTHING;
 
--- Create views for common queries
-CREATE OR REPLACE VIEW user_workout_summary AS
-SELECT 
+-- Summary views for common queries
+-- Materialized so reads don't re-aggregate every log row. They are refreshed
+-- CONCURRENTLY by the application scheduler (see summary_views.py), which
+-- requires the unique indexes below.
+
+-- Older schemas created these as plain views, or without archived months
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'user_workout_summary' AND relkind = 'v') THEN
+        DROP VIEW user_workout_summary;
+    ELSIF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'user_workout_summary' AND relkind = 'm'
+                  AND obj_description(oid, 'pg_class') IS DISTINCT FROM 'lifestyle summary v2') THEN
+        DROP MATERIALIZED VIEW user_workout_summary;
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'user_nutrition_summary' AND relkind = 'v') THEN
+        DROP VIEW user_nutrition_summary;
+    ELSIF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'user_nutrition_summary' AND relkind = 'm'
+                  AND obj_description(oid, 'pg_class') IS DISTINCT FROM 'lifestyle summary v2') THEN
+        DROP MATERIALIZED VIEW user_nutrition_summary;
+    END IF;
+END $$;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_workout_summary AS
+SELECT
     u.id as user_id,
     u.username,
-    COUNT(wl.id) as total_workouts,
-    SUM(wl.session_duration) as total_duration_hours,
-    SUM(wl.calories_burned) as total_calories_burned,
-    AVG(wl.calories_burned) as avg_calories_per_workout
+    COALESCE(wl.workouts, 0) + COALESCE(mr.workouts, 0) as total_workouts,
+    COALESCE(wl.duration, 0) + COALESCE(mr.duration, 0) as total_duration_hours,
+    COALESCE(wl.calories, 0) + COALESCE(mr.calories, 0) as total_calories_burned,
+    (COALESCE(wl.calories, 0) + COALESCE(mr.calories, 0))::float
+        / NULLIF(COALESCE(wl.calorie_logs, 0) + COALESCE(mr.workouts, 0), 0) as avg_calories_per_workout,
+    (now() AT TIME ZONE 'utc') as refreshed_at
 FROM users u
-LEFT JOIN workout_logs wl ON u.id = wl.user_id
-GROUP BY u.id, u.username;
+LEFT JOIN (
+    SELECT user_id, COUNT(id) as workouts, SUM(session_duration) as duration,
+           SUM(calories_burned) as calories, COUNT(calories_burned) as calorie_logs
+    FROM workout_logs GROUP BY user_id
+) wl ON u.id = wl.user_id
+LEFT JOIN (
+    SELECT user_id, SUM(workout_count) as workouts, SUM(total_workout_duration) as duration,
+           SUM(total_calories_burned) as calories
+    FROM monthly_rollups GROUP BY user_id
+) mr ON u.id = mr.user_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_workout_summary_user ON user_workout_summary(user_id);
+COMMENT ON MATERIALIZED VIEW user_workout_summary IS 'lifestyle summary v2';
 
-CREATE OR REPLACE VIEW user_nutrition_summary AS
-SELECT 
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_nutrition_summary AS
+SELECT
     u.id as user_id,
     u.username,
-    COUNT(nl.id) as total_nutrition_logs,
-    AVG(nl.calories) as avg_daily_calories,
-    AVG(nl.carbs) as avg_daily_carbs,
-    AVG(nl.proteins) as avg_daily_proteins,
-    AVG(nl.fats) as avg_daily_fats
+    COALESCE(nl.logs, 0) + COALESCE(mr.logs, 0) as total_nutrition_logs,
+    (COALESCE(nl.calories, 0) + COALESCE(mr.calories, 0))::float
+        / NULLIF(COALESCE(nl.calorie_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_calories,
+    (COALESCE(nl.carbs, 0) + COALESCE(mr.carbs, 0))::float
+        / NULLIF(COALESCE(nl.carb_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_carbs,
+    (COALESCE(nl.proteins, 0) + COALESCE(mr.proteins, 0))::float
+        / NULLIF(COALESCE(nl.protein_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_proteins,
+    (COALESCE(nl.fats, 0) + COALESCE(mr.fats, 0))::float
+        / NULLIF(COALESCE(nl.fat_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_fats,
+    (now() AT TIME ZONE 'utc') as refreshed_at
 FROM users u
-LEFT JOIN nutrition_logs nl ON u.id = nl.user_id
-GROUP BY u.id, u.username;
+LEFT JOIN (
+    SELECT user_id, COUNT(id) as logs,
+           SUM(calories) as calories, COUNT(calories) as calorie_logs,
+           SUM(carbs) as carbs, COUNT(carbs) as carb_logs,
+           SUM(proteins) as proteins, COUNT(proteins) as protein_logs,
+           SUM(fats) as fats, COUNT(fats) as fat_logs
+    FROM nutrition_logs GROUP BY user_id
+) nl ON u.id = nl.user_id
+LEFT JOIN (
+    SELECT user_id, SUM(nutrition_log_count) as logs, SUM(total_calories_consumed) as calories,
+           SUM(total_carbs) as carbs, SUM(total_proteins) as proteins, SUM(total_fats) as fats
+    FROM monthly_rollups GROUP BY user_id
+) mr ON u.id = mr.user_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_nutrition_summary_user ON user_nutrition_summary(user_id);
+COMMENT ON MATERIALIZED VIEW user_nutrition_summary IS 'lifestyle summary v2';
 
 -- Show completion message
 SELECT 'Database schema created successfully!' as status;
@@ -30,7 +30,8 @@ BEGIN
         [last_login] DATETIME2,
         [daily_reports] BIT DEFAULT 0,
         [weekly_reports] BIT DEFAULT 1,
-        [monthly_reports] BIT DEFAULT 1
+        [monthly_reports] BIT DEFAULT 1,
+        [report_data_version] INT NOT NULL DEFAULT 0
     );
     
     CREATE INDEX [IX_users_username] ON [dbo].[users] ([username]);
@@ -38,6 +39,11 @@ BEGIN
 END
 GO
 
+-- Columns added to users after it first shipped
+IF COL_LENGTH(N'dbo.users', N'report_data_version') IS NULL
+    ALTER TABLE [dbo].[users] ADD [report_data_version] INT NOT NULL DEFAULT 0;
+GO
+
 -- Exercises reference table
 IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[exercises]') AND type in (N'U'))
 BEGIN
@@ -201,6 +207,10 @@ BEGIN
         [file_path] NVARCHAR(255),
         [email_sent] BIT DEFAULT 0,
         [email_recipients] NVARCHAR(MAX),
+        [status] NVARCHAR(20) DEFAULT 'ready',
+        [error] NVARCHAR(MAX),
+        [completed_at] DATETIME2,
+        [status_changed_at] DATETIME2 DEFAULT GETDATE(),
         [start_date] DATE,
         [end_date] DATE,
         [created_at] DATETIME2 DEFAULT GETDATE(),
@@ -212,6 +222,89 @@ BEGIN
 END
 GO
 
+-- Columns added to reports after it first shipped
+IF COL_LENGTH(N'dbo.reports', N'status') IS NULL
+    ALTER TABLE [dbo].[reports] ADD [status] NVARCHAR(20) DEFAULT 'ready' WITH VALUES;
+IF COL_LENGTH(N'dbo.reports', N'error') IS NULL
+    ALTER TABLE [dbo].[reports] ADD [error] NVARCHAR(MAX);
+IF COL_LENGTH(N'dbo.reports', N'completed_at') IS NULL
+    ALTER TABLE [dbo].[reports] ADD [completed_at] DATETIME2;
+IF COL_LENGTH(N'dbo.reports', N'status_changed_at') IS NULL
+    ALTER TABLE [dbo].[reports] ADD [status_changed_at] DATETIME2 DEFAULT GETDATE();
+GO
+
+-- Monthly rollups of logs moved to cold storage
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[monthly_rollups]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[monthly_rollups] (
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [user_id] INT NOT NULL,
+        [month] DATE NOT NULL,
+        [workout_count] INT DEFAULT 0,
+        [exercise_count] INT DEFAULT 0,
+        [total_workout_duration] FLOAT DEFAULT 0,
+        [total_calories_burned] INT DEFAULT 0,
+        [nutrition_log_count] INT DEFAULT 0,
+        [meal_count] INT DEFAULT 0,
+        [total_calories_consumed] INT DEFAULT 0,
+        [total_carbs] INT DEFAULT 0,
+        [total_proteins] INT DEFAULT 0,
+        [total_fats] INT DEFAULT 0,
+        [total_water_intake] FLOAT DEFAULT 0,
+        [archive_path] NVARCHAR(255),
+        [archived_at] DATETIME2 DEFAULT GETDATE(),
+        FOREIGN KEY ([user_id]) REFERENCES [dbo].[users]([id]) ON DELETE CASCADE,
+        CONSTRAINT [uq_monthly_rollups_user_month] UNIQUE ([user_id], [month])
+    );
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[job_executions]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[job_executions] (
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [job_id] NVARCHAR(100) NOT NULL,
+        [scheduled_for] DATETIME2 NOT NULL,
+        [worker] NVARCHAR(100),
+        [status] NVARCHAR(20) DEFAULT 'running',
+        [error] NVARCHAR(MAX),
+        [started_at] DATETIME2 DEFAULT GETDATE(),
+        [finished_at] DATETIME2,
+        CONSTRAINT [uq_job_executions_job_slot] UNIQUE ([job_id], [scheduled_for])
+    );
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[scheduled_reports]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[scheduled_reports] (
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [user_id] INT NOT NULL,
+        [report_type] NVARCHAR(20) NOT NULL,
+        [frequency] NVARCHAR(20) NOT NULL,
+        [recipients] NVARCHAR(MAX),
+        [created_at] DATETIME2 DEFAULT GETDATE(),
+        CONSTRAINT [uq_scheduled_reports_user_type_frequency] UNIQUE ([user_id], [report_type], [frequency]),
+        FOREIGN KEY ([user_id]) REFERENCES [dbo].[users]([id]) ON DELETE CASCADE
+    );
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[catalog_versions]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[catalog_versions] (
+        [name] NVARCHAR(50) PRIMARY KEY,
+        [version] INT NOT NULL DEFAULT 0,
+        [updated_at] DATETIME2 DEFAULT GETDATE()
+    );
+END
+GO
+
+-- Catalog changes only ever update their row
+IF NOT EXISTS (SELECT * FROM [dbo].[catalog_versions] WHERE [name] = N'exercises')
+    INSERT INTO [dbo].[catalog_versions] ([name], [version]) VALUES (N'exercises', 0);
+GO
+
 -- Insert sample exercises
 INSERT INTO [dbo].[exercises] ([name], [benefit], [burns_calories_per_30min], [target_muscle_group], [equipment_needed], [difficulty_level], [body_part], [type_of_muscle], [instructions])
 VALUES
@@ -227,40 +320,44 @@ VALUES
 ('Tricep Dips', 'Builds tricep strength', 170, 'Triceps, Shoulders', 'Chair or bench', 'Intermediate', 'Arms', 'Upper', 'Sit on edge of chair, lower body by bending elbows, push back up');
 GO
 
--- Create views for common queries
+-- Summary tables for common queries
+-- Plain-table fallback for the PostgreSQL materialized views. The application
+-- scheduler repopulates them periodically (see summary_views.py).
 IF EXISTS (SELECT * FROM sys.views WHERE name = 'user_workout_summary')
     DROP VIEW [dbo].[user_workout_summary];
 GO
 
-CREATE VIEW [dbo].[user_workout_summary] AS
-SELECT 
-    u.[id] as [user_id],
-    u.[username],
-    COUNT(wl.[id]) as [total_workouts],
-    SUM(wl.[session_duration]) as [total_duration_hours],
-    SUM(wl.[calories_burned]) as [total_calories_burned],
-    AVG(CAST(wl.[calories_burned] AS FLOAT)) as [avg_calories_per_workout]
-FROM [dbo].[users] u
-LEFT JOIN [dbo].[workout_logs] wl ON u.[id] = wl.[user_id]
-GROUP BY u.[id], u.[username];
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[user_workout_summary]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[user_workout_summary] (
+        [user_id] INT PRIMARY KEY,
+        [username] NVARCHAR(80),
+        [total_workouts] INT,
+        [total_duration_hours] FLOAT,
+        [total_calories_burned] INT,
+        [avg_calories_per_workout] FLOAT,
+        [refreshed_at] DATETIME2
+    );
+END
 GO
 
 IF EXISTS (SELECT * FROM sys.views WHERE name = 'user_nutrition_summary')
     DROP VIEW [dbo].[user_nutrition_summary];
 GO
 
-CREATE VIEW [dbo].[user_nutrition_summary] AS
-SELECT 
-    u.[id] as [user_id],
-    u.[username],
-    COUNT(nl.[id]) as [total_nutrition_logs],
-    AVG(CAST(nl.[calories] AS FLOAT)) as [avg_daily_calories],
-    AVG(CAST(nl.[carbs] AS FLOAT)) as [avg_daily_carbs],
-    AVG(CAST(nl.[proteins] AS FLOAT)) as [avg_daily_proteins],
-    AVG(CAST(nl.[fats] AS FLOAT)) as [avg_daily_fats]
-FROM [dbo].[users] u
-LEFT JOIN [dbo].[nutrition_logs] nl ON u.[id] = nl.[user_id]
-GROUP BY u.[id], u.[username];
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[user_nutrition_summary]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[user_nutrition_summary] (
+        [user_id] INT PRIMARY KEY,
+        [username] NVARCHAR(80),
+        [total_nutrition_logs] INT,
+        [avg_daily_calories] FLOAT,
+        [avg_daily_carbs] FLOAT,
+        [avg_daily_proteins] FLOAT,
+        [avg_daily_fats] FLOAT,
+        [refreshed_at] DATETIME2
+    );
+END
 GO
 
 -- Show completion message
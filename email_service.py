@@ -6,12 +6,24 @@ from email import encoders
 from flask import current_app
 from datetime import datetime, timedelta
 import os
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+import threading
 import atexit
-from models import User, Report
-from report_generator import ReportGenerator
+from models import db, User, Report, ScheduledReport
+from scheduler_leader import SchedulerLeader, get_scheduled_time, claim_job_run, finish_job_run, to_utc
 from utils import EmailTemplate
+from summary_views import refresh_summary_views
+from report_data import get_report_range
+from report_cache import get_download_name
+
+# Cron fields for each frequency of user-requested reports
+USER_REPORT_TRIGGERS = {
+    'daily': dict(hour=8, minute=0),
+    'weekly': dict(day_of_week=0, hour=9, minute=0),
+    'monthly': dict(day=1, hour=10, minute=0)
+}
+
+def get_user_job_id(user_id, report_type, frequency):
+    return f"user_{user_id}_{report_type}_{frequency}"
 
 class EmailService:
     """Service for sending email reports"""
@@ -19,93 +31,193 @@ class EmailService:
     def __init__(self, app=None):
         self.app = app
         self.scheduler = None
+        self.leader = None
+        self.pid = None
+        self.lock = threading.Lock()
         if app:
             self.init_app(app)
     
     def init_app(self, app):
         """Initialize email service with Flask app"""
         self.app = app
-        self.scheduler = BackgroundScheduler()
-        self.scheduler.start()
+        app.extensions['email_service'] = self
+        
+        # Processes with the scheduler off (tests, one-off tools, the ASGI
+        # tier) never load APScheduler
+        if not app.config['SCHEDULER_ENABLED']:
+            return
+        
+        from apscheduler.schedulers.background import BackgroundScheduler
+        self.scheduler = BackgroundScheduler(job_defaults={
+            'coalesce': True,
+            'misfire_grace_time': app.config['SCHEDULER_MISFIRE_GRACE_SECONDS']
+        })
         
-        # Register cleanup function
-        atexit.register(lambda: self.scheduler.shutdown())
+        # The scheduler is started in the processes that serve requests, not
+        # here: with gunicorn's preload_app this runs in the master, and its
+        # threads would not survive the fork. gunicorn starts it in each
+        # worker from post_fork; other servers start it on the first request.
+        # CLI commands never start it.
+        app.before_request(self.start_scheduler)
         
         # Schedule email reports
         self.schedule_email_reports()
+
+        # Keep summary views fresh
+        self.schedule_summary_refresh()
+
+        # Move old logs to cold storage
+        self.schedule_log_archival()
+
+        # Remove expired reports from report storage
+        self.schedule_report_retention()
+
+        # Recover report jobs lost with their worker
+        self.schedule_report_recovery()
+
+        # Pick up reports users scheduled through any worker
+        self.schedule_user_report_sync()
+    
+    def start_scheduler(self):
+        """Start this process's scheduler, once per process
+        
+        With leader election only the elected process runs jobs; the others
+        keep their scheduler paused until they take over.
+        """
+        if self.scheduler is None or self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            if self.app.config['SCHEDULER_LEADER_ELECTION']:
+                self.scheduler.start(paused=True)
+                self.leader = SchedulerLeader(self.app, on_elected=self.resume_scheduler,
+                                              on_deposed=self.scheduler.pause)
+                self.leader.start()
+            else:
+                self.scheduler.start()
+            atexit.register(self.shutdown)
+    
+    def resume_scheduler(self):
+        """Load the current user schedules, then start running jobs"""
+        self.sync_user_reports()
+        self.scheduler.resume()
+    
+    def shutdown(self):
+        """Stop the scheduler and give up leadership"""
+        if self.leader:
+            self.leader.stop()
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+    
+    def add_job(self, func, trigger, id, name, args=None, **trigger_args):
+        """Schedule func so each scheduled run executes at most once across processes
+        
+        trigger is an APScheduler trigger alias ('cron', 'interval') with its
+        fields as keyword arguments.
+        """
+        self.scheduler.add_job(
+            func=self.run_job,
+            trigger=trigger,
+            args=[id, func] + list(args or []),
+            id=id,
+            name=name,
+            replace_existing=True,
+            **trigger_args
+        )
+    
+    def run_job(self, job_id, func, *args):
+        """Claim this run in job_executions, then run func and record the outcome"""
+        job = self.scheduler.get_job(job_id)
+        now = datetime.now().astimezone()
+        grace = timedelta(seconds=self.app.config['SCHEDULER_MISFIRE_GRACE_SECONDS'])
+        scheduled_for = to_utc(get_scheduled_time(job.trigger, now, grace) if job else now.replace(second=0, microsecond=0))
+        
+        with self.app.app_context():
+            execution = claim_job_run(job_id, scheduled_for)
+            if execution is None:
+                print(f"Skipping {job_id} for {scheduled_for}: already run")
+                return
+            
+            try:
+                func(*args)
+            except Exception as e:
+                finish_job_run(execution, error=str(e))
+                print(f"Error running {job_id}: {e}")
+            else:
+                finish_job_run(execution)
     
     def send_email_report(self, user, report_type='weekly', recipients=None, file_path=None):
         """Send email report to specified recipients"""
         try:
             # Generate report if file_path not provided
-            if not file_path:
-                file_path = self.generate_report_file(user, report_type)
-            
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = current_app.config['MAIL_USERNAME']
-            msg['To'] = ', '.join(recipients) if recipients else user.email
-            msg['Subject'] = f"Your {report_type.title()} Lifestyle Report - {datetime.now().strftime('%B %d, %Y')}"
-            
-            # Get report data for email template
-            report_data = self.get_report_data(user, report_type)
+            storage_key = None
+            if file_path:
+                with open(file_path, 'rb') as f:
+                    attachment = (os.path.basename(file_path), f.read())
+            else:
+                storage_key, attachment = self.render_report_attachment(user, report_type)
             
-            # Create HTML email body
-            html_body = EmailTemplate.generate_weekly_report_email(user.username, report_data)
-            msg.attach(MIMEText(html_body, 'html'))
-            
-            # Attach PDF report
-            if file_path and os.path.exists(file_path):
-                with open(file_path, "rb") as attachment:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(attachment.read())
-                
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {os.path.basename(file_path)}'
-                )
-                msg.attach(part)
+            msg = self.build_report_email(user, report_type, recipients, attachment)
             
             # Send email
-            server = smtplib.SMTP(current_app.config['MAIL_SERVER'], current_app.config['MAIL_PORT'])
-            server.starttls()
-            server.login(current_app.config['MAIL_USERNAME'], current_app.config['MAIL_PASSWORD'])
-            
-            text = msg.as_string()
-            server.sendmail(current_app.config['MAIL_USERNAME'], recipients, text)
+            server = self.connect()
+            server.sendmail(current_app.config['MAIL_USERNAME'], recipients, msg.as_string())
             server.quit()
             
             # Log email sent
-            self.log_email_sent(user.id, report_type, recipients, file_path)
+            self.log_email_sent(user.id, report_type, recipients, storage_key)
             
             return True, "Email sent successfully"
             
         except Exception as e:
             return False, f"Failed to send email: {str(e)}"
     
-    def generate_report_file(self, user, report_type):
-        """Generate report file and return path"""
-        # Calculate date range
-        end_date = datetime.now().date()
-        if report_type == 'daily':
-            start_date = end_date
-        elif report_type == 'weekly':
-            start_date = end_date - timedelta(days=7)
-        else:  # monthly
-            start_date = end_date - timedelta(days=30)
+    def build_report_email(self, user, report_type, recipients, attachment=None):
+        """Create the email message for a report; attachment is a
+        (file name, bytes) pair"""
+        msg = MIMEMultipart()
+        msg['From'] = current_app.config['MAIL_USERNAME']
+        msg['To'] = ', '.join(recipients) if recipients else user.email
+        msg['Subject'] = f"Your {report_type.title()} Lifestyle Report - {datetime.now().strftime('%B %d, %Y')}"
         
-        # Create reports directory if it doesn't exist
-        reports_dir = os.path.join(current_app.root_path, 'reports')
-        if not os.path.exists(reports_dir):
-            os.makedirs(reports_dir)
+        # Get report data for email template
+        report_data = self.get_report_data(user, report_type)
         
-        # Generate PDF report
-        file_path = os.path.join(reports_dir, f"{user.id}_{report_type}_{end_date}.pdf")
-        generator = ReportGenerator(user, start_date, end_date)
-        generator.generate_pdf_report(file_path)
+        # Create HTML email body
+        html_body = EmailTemplate.generate_weekly_report_email(user.username, report_data)
+        msg.attach(MIMEText(html_body, 'html'))
         
-        return file_path
+        # Attach the report
+        if attachment:
+            filename, data = attachment
+            part = MIMEBase('application', 'octet-stream')
+            part.set_payload(data)
+            
+            encoders.encode_base64(part)
+            part.add_header(
+                'Content-Disposition',
+                f'attachment; filename= {filename}'
+            )
+            msg.attach(part)
+        return msg
+    
+    def connect(self):
+        """Open a logged-in connection to the mail server"""
+        server = smtplib.SMTP(current_app.config['MAIL_SERVER'], current_app.config['MAIL_PORT'])
+        server.starttls()
+        server.login(current_app.config['MAIL_USERNAME'], current_app.config['MAIL_PASSWORD'])
+        return server
+    
+    def render_report_attachment(self, user, report_type):
+        """Get the report's PDF from the report cache, rendering it if needed;
+        returns its storage key and a (file name, bytes) attachment. A fresh
+        render is attached from memory rather than read back from storage."""
+        start_date, end_date = get_report_range(report_type, datetime.now().date())
+        storage_key, stream = current_app.extensions['report_cache'].open(user, start_date, end_date, 'pdf')
+        with stream:
+            return storage_key, (get_download_name(report_type, end_date, 'pdf'), stream.read())
     
     def get_report_data(self, user, report_type):
         """Get report data for email template"""
@@ -139,14 +251,14 @@ class EmailService:
         else:
             return "Obese"
     
-    def log_email_sent(self, user_id, report_type, recipients, file_path):
+    def log_email_sent(self, user_id, report_type, recipients, storage_key=None):
         """Log email sent in database"""
         try:
             report = Report(
                 user_id=user_id,
                 report_type=report_type,
                 report_format='pdf',
-                file_path=file_path,
+                storage_key=storage_key,
                 email_sent=True,
                 email_recipients=','.join(recipients) if recipients else '',
                 start_date=datetime.now().date() - timedelta(days=7),
@@ -162,67 +274,111 @@ class EmailService:
     def schedule_email_reports(self):
         """Schedule automatic email reports"""
         # Schedule daily reports at 8 AM
-        self.scheduler.add_job(
+        self.add_job(
             func=self.send_daily_reports,
-            trigger=CronTrigger(hour=8, minute=0),
+            trigger='cron', hour=8, minute=0,
             id='daily_reports',
-            name='Send daily reports',
-            replace_existing=True
+            name='Send daily reports'
         )
         
         # Schedule weekly reports on Mondays at 9 AM
-        self.scheduler.add_job(
+        self.add_job(
             func=self.send_weekly_reports,
-            trigger=CronTrigger(day_of_week=0, hour=9, minute=0),
+            trigger='cron', day_of_week=0, hour=9, minute=0,
             id='weekly_reports',
-            name='Send weekly reports',
-            replace_existing=True
+            name='Send weekly reports'
         )
         
         # Schedule monthly reports on the 1st at 10 AM
-        self.scheduler.add_job(
+        self.add_job(
             func=self.send_monthly_reports,
-            trigger=CronTrigger(day=1, hour=10, minute=0),
+            trigger='cron', day=1, hour=10, minute=0,
             id='monthly_reports',
-            name='Send monthly reports',
-            replace_existing=True
+            name='Send monthly reports'
         )
     
+    def schedule_summary_refresh(self):
+        """Schedule periodic refresh of the summary views"""
+        self.add_job(
+            func=self.refresh_summary_views,
+            trigger='interval', minutes=self.app.config.get('SUMMARY_REFRESH_MINUTES', 15),
+            id='refresh_summary_views',
+            name='Refresh summary views'
+        )
+
+    def refresh_summary_views(self):
+        """Refresh the workout and nutrition summary views"""
+        with self.app.app_context():
+            try:
+                refresh_summary_views()
+            except Exception as e:
+                print(f"Error refreshing summary views: {e}")
+
+    def schedule_log_archival(self):
+        """Schedule nightly archival of logs older than the horizon, if enabled"""
+        if not self.app.config['ARCHIVE_ENABLED']:
+            return
+        self.add_job(
+            func=self.archive_old_logs,
+            trigger='cron', hour=3, minute=0,
+            id='archive_old_logs',
+            name='Archive old logs'
+        )
+
+    def archive_old_logs(self):
+        """Archive old workout and nutrition logs to cold storage"""
+        with self.app.app_context():
+            archiver = self.app.extensions.get('log_archiver')
+            if archiver:
+                archived = archiver.archive_old_logs()
+                print(f"Archived {archived} user-months of logs")
+
+    def schedule_report_retention(self):
+        """Schedule nightly removal of expired and surplus reports"""
+        self.add_job(
+            func=self.apply_report_retention,
+            trigger='cron', hour=4, minute=0,
+            id='report_retention',
+            name='Apply report retention'
+        )
+
+    def apply_report_retention(self):
+        """Remove reports past REPORT_CACHE_MAX_AGE_DAYS, then the least
+        recently used over REPORT_CACHE_MAX_MB"""
+        with self.app.app_context():
+            removed = self.app.extensions['report_cache'].evict()
+            print(f"Removed {removed} reports from report storage")
+
+    def schedule_report_recovery(self):
+        """Schedule a sweep for report jobs lost by recycled or crashed workers"""
+        self.add_job(
+            func=self.recover_stale_reports,
+            trigger='interval', minutes=5,
+            id='report_recovery',
+            name='Recover stale report jobs'
+        )
+
+    def recover_stale_reports(self):
+        """Requeue or fail reports stuck queued or running"""
+        with self.app.app_context():
+            recovered = self.app.extensions['report_jobs'].recover_stale()
+            if recovered:
+                print(f"Recovered {recovered} stale report jobs")
+
     def send_daily_reports(self):
         """Send daily reports to all users who have opted in"""
         with self.app.app_context():
-            # Get users who want daily reports
-            users = User.query.filter_by(daily_reports=True).all()
-            
-            for user in users:
-                try:
-                    self.send_email_report(user, 'daily', [user.email])
-                except Exception as e:
-                    print(f"Error sending daily report to {user.username}: {e}")
+            self.app.extensions['bulk_reports'].send('daily', User.query.filter_by(daily_reports=True))
     
     def send_weekly_reports(self):
         """Send weekly reports to all users who have opted in"""
         with self.app.app_context():
-            # Get users who want weekly reports
-            users = User.query.filter_by(weekly_reports=True).all()
-            
-            for user in users:
-                try:
-                    self.send_email_report(user, 'weekly', [user.email])
-                except Exception as e:
-                    print(f"Error sending weekly report to {user.username}: {e}")
+            self.app.extensions['bulk_reports'].send('weekly', User.query.filter_by(weekly_reports=True))
     
     def send_monthly_reports(self):
         """Send monthly reports to all users who have opted in"""
         with self.app.app_context():
-            # Get users who want monthly reports
-            users = User.query.filter_by(monthly_reports=True).all()
-            
-            for user in users:
-                try:
-                    self.send_email_report(user, 'monthly', [user.email])
-                except Exception as e:
-                    print(f"Error sending monthly report to {user.username}: {e}")
+            self.app.extensions['bulk_reports'].send('monthly', User.query.filter_by(monthly_reports=True))
     
     def send_custom_email_report(self, user_id, report_type, recipients, frequency='once'):
         """Send custom email report"""
@@ -241,27 +397,68 @@ class EmailService:
             return success, message
     
     def schedule_user_reports(self, user_id, report_type, recipients, frequency):
-        """Schedule recurring reports for a specific user"""
-        if frequency == 'daily':
-            trigger = CronTrigger(hour=8, minute=0)
-        elif frequency == 'weekly':
-            trigger = CronTrigger(day_of_week=0, hour=9, minute=0)
-        elif frequency == 'monthly':
-            trigger = CronTrigger(day=1, hour=10, minute=0)
-        else:
-            return
+        """Schedule recurring reports for a specific user
         
-        job_id = f"user_{user_id}_{report_type}_{frequency}"
+        The schedule is saved in scheduled_reports rather than added to this
+        process's scheduler, which may be a paused non-leader; the leader
+        picks it up on its next sync.
+        """
+        if frequency not in USER_REPORT_TRIGGERS:
+            return
         
+        with self.app.app_context():
+            schedule = ScheduledReport.query.filter_by(user_id=user_id, report_type=report_type,
+                                                       frequency=frequency).first()
+            if schedule is None:
+                schedule = ScheduledReport(user_id=user_id, report_type=report_type, frequency=frequency)
+                db.session.add(schedule)
+            schedule.recipients = ','.join(recipients) if recipients else ''
+            db.session.commit()
+    
+    def schedule_user_report_sync(self):
+        """Schedule the leader's sync of user schedules into jobs"""
+        # Added directly: only the leader runs it, and a missed or repeated
+        # sync is harmless, so it is not recorded in job_executions
         self.scheduler.add_job(
-            func=self.send_user_report,
-            trigger=trigger,
-            args=[user_id, report_type, recipients],
-            id=job_id,
-            name=f"Send {frequency} {report_type} report to user {user_id}",
+            func=self.sync_user_reports,
+            trigger='interval',
+            minutes=1,
+            id='sync_user_reports',
+            name='Sync user report schedules',
             replace_existing=True
         )
     
+    def sync_user_reports(self):
+        """Add a job for each scheduled_reports row and remove jobs whose row is gone"""
+        with self.app.app_context():
+            try:
+                schedules = ScheduledReport.query.all()
+            except Exception as e:
+                print(f"Error loading user report schedules: {e}")
+                return
+        
+        job_ids = set()
+        for schedule in schedules:
+            job_id = get_user_job_id(schedule.user_id, schedule.report_type, schedule.frequency)
+            job_ids.add(job_id)
+            recipients = schedule.recipients.split(',') if schedule.recipients else []
+            job = self.scheduler.get_job(job_id)
+            # Re-adding an unchanged job would reset its next run time
+            if job and job.args[-1] == recipients:
+                continue
+            self.add_job(
+                func=self.send_user_report,
+                trigger='cron',
+                args=[schedule.user_id, schedule.report_type, recipients],
+                id=job_id,
+                name=f"Send {schedule.frequency} {schedule.report_type} report to user {schedule.user_id}",
+                **USER_REPORT_TRIGGERS[schedule.frequency]
+            )
+        
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith('user_') and job.id not in job_ids:
+                self.scheduler.remove_job(job.id)
+    
     def send_user_report(self, user_id, report_type, recipients):
         """Send report to specific user"""
         with self.app.app_context():
@@ -270,10 +467,14 @@ class EmailService:
                 self.send_email_report(user, report_type, recipients)
     
     def cancel_user_reports(self, user_id, report_type, frequency):
-        """Cancel scheduled reports for a user"""
-        job_id = f"user_{user_id}_{report_type}_{frequency}"
+        """Cancel scheduled reports for a user; the leader drops the job on its next sync"""
         try:
-            self.scheduler.remove_job(job_id)
+            with self.app.app_context():
+                deleted = ScheduledReport.query.filter_by(user_id=user_id, report_type=report_type,
+                                                          frequency=frequency).delete()
+                db.session.commit()
+            if not deleted:
+                return False, "No such scheduled report"
             return True, "Reports cancelled successfully"
         except Exception as e:
             return False, f"Error cancelling reports: {e}"
@@ -281,13 +482,18 @@ class EmailService:
     def get_scheduled_reports(self, user_id):
         """Get scheduled reports for a user"""
         jobs = []
-        for job in self.scheduler.get_jobs():
-            if f"user_{user_id}_" in job.id:
-                jobs.append({
-                    'id': job.id,
-                    'name': job.name,
-                    'next_run': job.next_run_time.isoformat() if job.next_run_time else None
-                })
+        with self.app.app_context():
+            schedules = ScheduledReport.query.filter_by(user_id=user_id).order_by(ScheduledReport.id).all()
+        for schedule in schedules:
+            job_id = get_user_job_id(user_id, schedule.report_type, schedule.frequency)
+            # Only the leader's scheduler knows the next run
+            job = self.scheduler.get_job(job_id) if self.scheduler else None
+            next_run = getattr(job, 'next_run_time', None)  # unset until the scheduler starts
+            jobs.append({
+                'id': job_id,
+                'name': f"Send {schedule.frequency} {schedule.report_type} report to user {user_id}",
+                'next_run': next_run.isoformat() if next_run else None
+            })
         return jobs
 
 # Email templates
@@ -0,0 +1,257 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+import weakref
+from collections import Counter, defaultdict, namedtuple
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from models import db, Exercise, CatalogVersion
+
+CATALOG_NAME = 'exercises'
+
+CATALOG_COLUMNS = (
+    Exercise.id, Exercise.name, Exercise.benefit, Exercise.burns_calories_per_30min,
+    Exercise.target_muscle_group, Exercise.equipment_needed, Exercise.difficulty_level,
+    Exercise.body_part, Exercise.type_of_muscle
+)
+
+CatalogExercise = namedtuple('CatalogExercise', [c.key for c in CATALOG_COLUMNS])
+
+# Filter name -> exercise field; equipment holds comma-separated items
+INDEXED_FIELDS = {
+    'body_part': 'body_part',
+    'difficulty_level': 'difficulty_level',
+    'type_of_muscle': 'type_of_muscle',
+    'equipment': 'equipment_needed'
+}
+
+_WORD = re.compile(r'\w+')
+
+# first_positions walks positions in order once every set is larger than this
+SCAN_THRESHOLD = 512
+
+def normalize(value):
+    return (value or '').strip().lower()
+
+def get_index_values(field, value):
+    if field == 'equipment':
+        return {normalize(item) for item in (value or '').split(',') if item.strip()}
+    return {normalize(value)} if value else set()
+
+def get_trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CatalogSnapshot:
+    """Immutable, indexed copy of the exercise catalog
+
+    Exercises are sorted by name, so positions double as alphabetical order.
+    Filters are inverted indexes (value -> set of positions), prefix search
+    bisects the sorted distinct name words and intersects their position
+    sets, and trigrams catch matches inside words and small typos.
+    """
+
+    def __init__(self, version, exercises):
+        self.version = version
+        self.exercises = sorted(exercises, key=lambda exercise: normalize(exercise.name))
+        self.indexes = {name: defaultdict(set) for name in INDEXED_FIELDS}
+        self.word_positions = defaultdict(set)
+        self.trigrams = defaultdict(set)
+
+        for position, exercise in enumerate(self.exercises):
+            for name, field in INDEXED_FIELDS.items():
+                for value in get_index_values(name, getattr(exercise, field)):
+                    self.indexes[name][value].add(position)
+            name = normalize(exercise.name)
+            for word in _WORD.findall(name):
+                self.word_positions[word].add(position)
+            for trigram in get_trigrams(name):
+                self.trigrams[trigram].add(position)
+        self.words = sorted(self.word_positions)
+
+    def filter(self, **filters):
+        """Position sets for each given filter; a position must be in all of them"""
+        sets = []
+        for name, value in filters.items():
+            if name in INDEXED_FIELDS and value:
+                sets.append(self.indexes[name].get(normalize(value), set()))
+        return sets
+
+    def prefix_search(self, query):
+        """Positions whose name has a word starting with each query word"""
+        term_matches = []
+        for term in set(_WORD.findall(query)):
+            index = bisect.bisect_left(self.words, term)
+            sets = []
+            while index < len(self.words) and self.words[index].startswith(term):
+                sets.append(self.word_positions[self.words[index]])
+                index += 1
+            if not sets:
+                return set()
+            term_matches.append(sets[0] if len(sets) == 1 else set().union(*sets))
+        if not term_matches:
+            return set()
+        if len(term_matches) == 1:
+            return term_matches[0]  # shared with the index; callers must not mutate it
+        term_matches.sort(key=len)
+        return term_matches[0].intersection(*term_matches[1:])
+
+    def first_positions(self, limit, sets):
+        """The lowest positions present in every set
+
+        Small sets are intersected and the lowest taken directly. When every
+        set is large, matches are dense, so walking positions in order finds
+        the first few sooner than materializing the whole intersection.
+        """
+        sets = sorted(sets, key=len)
+        smallest = sets[0]
+        if len(smallest) > SCAN_THRESHOLD:
+            total = len(self.exercises)
+            density = 1.0
+            for positions in sets:
+                density *= len(positions) / total
+            budget = min(total, int(limit * 2 / density) + 1)
+            found = []
+            for position in range(budget):
+                if all(position in positions for positions in sets):
+                    found.append(position)
+                    if len(found) == limit:
+                        return found
+            if budget == total:
+                return found
+        return heapq.nsmallest(limit, smallest.intersection(*sets[1:]))
+
+    def trigram_search(self, query, limit, exclude):
+        """Best positions by shared trigrams with the query"""
+        # Trigrams shared by a large part of the catalog say little about a
+        # match and are the expensive ones to count, so only rarer ones vote.
+        common = max(SCAN_THRESHOLD, len(self.exercises) // 20)
+        postings = [self.trigrams.get(trigram, ()) for trigram in get_trigrams(query)]
+        postings = [positions for positions in postings if len(positions) <= common]
+        scores = Counter()
+        for positions in postings:
+            scores.update(positions)
+        threshold = max(2, len(postings) // 2)
+        ranked = sorted(
+            (position for position, score in scores.items() if score >= threshold and position not in exclude),
+            key=lambda position: (-scores[position], position)
+        )
+        return ranked[:limit]
+
+    def autocomplete(self, query, limit=10, **filters):
+        """Exercises whose names match query, best matches first"""
+        query = normalize(query)
+        allowed = self.filter(**filters)
+
+        if not query:
+            if not allowed:
+                return list(self.exercises[:limit])
+            return [self.exercises[position] for position in self.first_positions(limit, allowed)]
+
+        positions = self.first_positions(limit, [self.prefix_search(query), *allowed])
+
+        if len(positions) < limit and len(query) >= 3:
+            candidates = self.trigram_search(query, len(self.exercises), set(positions))
+            candidates = [position for position in candidates
+                          if all(position in allowed_positions for allowed_positions in allowed)]
+            positions += candidates[:limit - len(positions)]
+
+        return [self.exercises[position] for position in positions]
+
+class ExerciseCatalog:
+    """Per-process exercise catalog, reloaded when its version changes
+
+    Any ORM change to an Exercise bumps the 'exercises' row in
+    catalog_versions in the same transaction. Each process checks that
+    version at most every EXERCISE_CATALOG_CHECK_SECONDS and rebuilds its
+    snapshot when it moved; changes committed in this process are picked up
+    on the next request. Bulk SQL that bypasses the ORM should bump the
+    version itself (see bump_version).
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.snapshot = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read catalog settings and register the catalog"""
+        self.app = app
+        self.check_interval = app.config['EXERCISE_CATALOG_CHECK_SECONDS']
+        app.extensions['exercise_catalog'] = self
+        _catalogs.add(self)
+
+    def get_snapshot(self):
+        """The current snapshot, reloading it if the version changed"""
+        snapshot = self.snapshot
+        if snapshot is not None and time.monotonic() - self.checked_at < self.check_interval:
+            return snapshot
+
+        with self.lock:
+            if self.snapshot is not snapshot:
+                return self.snapshot  # another thread just refreshed it
+            version = get_version()
+            if snapshot is None or snapshot.version != version:
+                rows = db.session.execute(select(*CATALOG_COLUMNS)).all()
+                snapshot = CatalogSnapshot(version, [CatalogExercise(*row) for row in rows])
+            self.snapshot = snapshot
+            self.checked_at = time.monotonic()
+            return snapshot
+
+    def autocomplete(self, query, limit=10, **filters):
+        return self.get_snapshot().autocomplete(query, limit, **filters)
+
+    def mark_stale(self):
+        self.checked_at = 0.0
+
+def get_version():
+    version = db.session.execute(
+        select(CatalogVersion.version).where(CatalogVersion.name == CATALOG_NAME)
+    ).scalar()
+    return version or 0
+
+def seed_version():
+    """Create the catalog's version row if it is missing; init-db and
+    seed-db call this so bumps only ever update"""
+    if db.session.get(CatalogVersion, CATALOG_NAME) is None:
+        db.session.add(CatalogVersion(name=CATALOG_NAME, version=0))
+        db.session.commit()
+
+def bump_version(session):
+    """Advance the catalog version in the session's transaction
+    
+    A single UPDATE, so concurrent writers serialize on the row instead of
+    racing to insert it.
+    """
+    result = session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == CATALOG_NAME)
+        .values(version=CatalogVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        print(f"No {CATALOG_NAME} row in catalog_versions; run flask init-db so catalog changes reach other processes")
+
+_catalogs = weakref.WeakSet()
+
+@event.listens_for(Session, 'before_flush')
+def _bump_on_exercise_change(session, flush_context, instances):
+    changed = any(isinstance(obj, Exercise) for obj in (*session.new, *session.dirty, *session.deleted))
+    if changed and not session.info.get('exercise_catalog_bumped'):
+        session.info['exercise_catalog_bumped'] = True
+        bump_version(session)
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_after_commit(session):
+    if session.info.pop('exercise_catalog_bumped', False):
+        for catalog in list(_catalogs):
+            catalog.mark_stale()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('exercise_catalog_bumped', None)
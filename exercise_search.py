@@ -0,0 +1,177 @@
+import re
+from sqlalchemy import text, select, func, case, or_, and_
+from models import db, Exercise
+from exercise_catalog import CATALOG_COLUMNS, CatalogExercise
+
+# Searched columns and their rank weights, best first
+SEARCH_COLUMNS = ('name', 'target_muscle_group', 'benefit', 'instructions')
+SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+MAX_TERMS = 10
+
+_WORD = re.compile(r'\w+')
+
+SELECT_COLUMNS = ', '.join(f'e.{c.key}' for c in CATALOG_COLUMNS)
+
+# SQLite: an external-content FTS5 table kept in step with exercises by triggers
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5(
+        name, target_muscle_group, benefit, instructions,
+        content='exercises', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS exercises_fts_insert AFTER INSERT ON exercises BEGIN
+        INSERT INTO exercises_fts(rowid, name, target_muscle_group, benefit, instructions)
+        VALUES (new.id, new.name, new.target_muscle_group, new.benefit, new.instructions);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS exercises_fts_delete AFTER DELETE ON exercises BEGIN
+        INSERT INTO exercises_fts(exercises_fts, rowid, name, target_muscle_group, benefit, instructions)
+        VALUES ('delete', old.id, old.name, old.target_muscle_group, old.benefit, old.instructions);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS exercises_fts_update AFTER UPDATE ON exercises BEGIN
+        INSERT INTO exercises_fts(exercises_fts, rowid, name, target_muscle_group, benefit, instructions)
+        VALUES ('delete', old.id, old.name, old.target_muscle_group, old.benefit, old.instructions);
+        INSERT INTO exercises_fts(rowid, name, target_muscle_group, benefit, instructions)
+        VALUES (new.id, new.name, new.target_muscle_group, new.benefit, new.instructions);
+    END
+    """,
+    # Index rows that existed before the FTS table
+    "INSERT INTO exercises_fts(exercises_fts) VALUES ('rebuild')"
+]
+
+# PostgreSQL: a weighted tsvector generated column with a GIN index.
+# Keep in sync with database_schema_postgresql.sql.
+POSTGRES_DDL = [
+    """
+    ALTER TABLE exercises ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(target_muscle_group, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(benefit, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(instructions, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_exercises_search ON exercises USING GIN (search_vector)"
+]
+
+# MySQL: FULLTEXT indexes on the name alone (for boosting) and on all columns
+MYSQL_INDEXES = {
+    'ft_exercises_name': 'name',
+    'ft_exercises_search': ', '.join(SEARCH_COLUMNS)
+}
+
+def create_search_index(engine=None):
+    """Create the full-text index for the database backend"""
+    engine = engine or db.engine
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        if dialect == 'sqlite':
+            for statement in SQLITE_DDL:
+                conn.execute(text(statement))
+        elif dialect == 'postgresql':
+            for statement in POSTGRES_DDL:
+                conn.execute(text(statement))
+        elif dialect == 'mysql':
+            existing = set(conn.execute(text(
+                "SELECT DISTINCT index_name FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = 'exercises'"
+            )).scalars())
+            for name, columns in MYSQL_INDEXES.items():
+                if name not in existing:
+                    conn.execute(text(f"CREATE FULLTEXT INDEX {name} ON exercises ({columns})"))
+        else:
+            print(f"No full-text index for {dialect}; exercise search will scan the table")
+
+def get_search_terms(query):
+    """Words of a user query, lower-cased; anything else is dropped so it
+    cannot be read as full-text query syntax"""
+    return _WORD.findall((query or '').lower())[:MAX_TERMS]
+
+def search_exercises(query, page=1, per_page=20):
+    """Ranked page of exercises matching every word of query (as a prefix)
+
+    Returns (exercises, total). Matching and ranking run against the
+    backend's full-text index and only the requested page is fetched.
+    """
+    terms = get_search_terms(query)
+    if not terms:
+        return [], 0
+
+    dialect = db.engine.dialect.name
+    offset = (page - 1) * per_page
+    if dialect == 'sqlite':
+        rows, total = _search_sqlite(terms, per_page, offset)
+    elif dialect == 'postgresql':
+        rows, total = _search_postgresql(terms, per_page, offset)
+    elif dialect == 'mysql':
+        rows, total = _search_mysql(terms, per_page, offset)
+    else:
+        rows, total = _search_like(terms, per_page, offset)
+    return [CatalogExercise(*row) for row in rows], total
+
+def _search_sqlite(terms, limit, offset):
+    params = {'query': ' '.join(f'"{term}"*' for term in terms), 'limit': limit, 'offset': offset}
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    rows = db.session.execute(text(f"""
+        SELECT {SELECT_COLUMNS}
+        FROM exercises_fts
+        JOIN exercises e ON e.id = exercises_fts.rowid
+        WHERE exercises_fts MATCH :query
+        ORDER BY bm25(exercises_fts, {weights}), e.name
+        LIMIT :limit OFFSET :offset
+    """), params).all()
+    total = db.session.execute(
+        text("SELECT count(*) FROM exercises_fts WHERE exercises_fts MATCH :query"), params
+    ).scalar()
+    return rows, total
+
+def _search_postgresql(terms, limit, offset):
+    params = {'query': ' & '.join(f'{term}:*' for term in terms), 'limit': limit, 'offset': offset}
+    rows = db.session.execute(text(f"""
+        SELECT {SELECT_COLUMNS}
+        FROM exercises e, to_tsquery('english', :query) query
+        WHERE e.search_vector @@ query
+        ORDER BY ts_rank_cd(e.search_vector, query) DESC, e.name
+        LIMIT :limit OFFSET :offset
+    """), params).all()
+    total = db.session.execute(text(
+        "SELECT count(*) FROM exercises WHERE search_vector @@ to_tsquery('english', :query)"
+    ), params).scalar()
+    return rows, total
+
+def _search_mysql(terms, limit, offset):
+    # InnoDB ignores words shorter than innodb_ft_min_token_size (3) and
+    # its stopwords, so those terms match everything rather than nothing.
+    params = {'query': ' '.join(f'+{term}*' for term in terms), 'limit': limit, 'offset': offset}
+    match_all = f"MATCH(e.{', e.'.join(SEARCH_COLUMNS)}) AGAINST (:query IN BOOLEAN MODE)"
+    match_name = "MATCH(e.name) AGAINST (:query IN BOOLEAN MODE)"
+    rows = db.session.execute(text(f"""
+        SELECT {SELECT_COLUMNS}
+        FROM exercises e
+        WHERE {match_all}
+        ORDER BY {SEARCH_WEIGHTS[0]} * {match_name} + {match_all} DESC, e.name
+        LIMIT :limit OFFSET :offset
+    """), params).all()
+    total = db.session.execute(text(f"SELECT count(*) FROM exercises e WHERE {match_all}"), params).scalar()
+    return rows, total
+
+def _search_like(terms, limit, offset):
+    # No full-text index (e.g. SQL Server without a full-text catalog):
+    # match with LIKE, which scans the table, ranking name matches first.
+    columns = [getattr(Exercise, name) for name in SEARCH_COLUMNS]
+    condition = and_(*(or_(*(column.icontains(term, autoescape=True) for column in columns)) for term in terms))
+    name_hits = sum(case((Exercise.name.icontains(term, autoescape=True), 1), else_=0) for term in terms)
+    rows = db.session.execute(
+        select(*CATALOG_COLUMNS).where(condition)
+        .order_by(name_hits.desc(), Exercise.name)
+        .limit(limit).offset(offset)
+    ).all()
+    total = db.session.execute(select(func.count()).select_from(Exercise).where(condition)).scalar()
+    return rows, total
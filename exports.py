@@ -0,0 +1,192 @@
+from __future__ import annotations
+import csv
+import io
+import os
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional
+from flask import current_app
+from sqlalchemy import select
+from archive import ARCHIVED_TABLES, get_archiver, month_start, read_parquet
+from models import db, WorkoutLog, ExerciseLog, MonthlyRollup
+
+# Formats raw logs can be exported in, with their content types
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+def get_export_columns(table: str) -> List[str]:
+    """Columns of an exported table, in table order"""
+    return [column.name for column in ARCHIVED_TABLES[table][0].__table__.columns]
+
+def build_export_query(table: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                       user_id: Optional[int] = None):
+    """Select a table's hot rows in a date range, optionally for one user.
+    Exercises have neither, so they go by their workout's."""
+    model, date_column = ARCHIVED_TABLES[table]
+    statement = select(model.__table__)
+    if model is ExerciseLog:
+        statement = statement.join(WorkoutLog, ExerciseLog.workout_id == WorkoutLog.id)
+        owner, column = WorkoutLog.user_id, WorkoutLog.workout_date
+    else:
+        owner, column = model.user_id, getattr(model, date_column)
+
+    if user_id is not None:
+        statement = statement.where(owner == user_id)
+    if start_date:
+        statement = statement.where(column >= start_date)
+    if end_date:
+        statement = statement.where(column <= end_date)
+    return statement.order_by(model.id)
+
+def iter_export_batches(table: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                        user_id: Optional[int] = None, batch_size: Optional[int] = None) -> Iterator[List[tuple]]:
+    """Yield a table's rows in a date range as lists of at most batch_size tuples
+
+    Archived months come first, read one user-month file at a time, then the
+    hot rows from a server-side cursor (yield_per), so only one batch is held
+    in memory however many rows there are.
+    """
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    yield from iter_archived_batches(table, start_date, end_date, user_id, batch_size)
+
+    statement = build_export_query(table, start_date, end_date, user_id)
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+def iter_archived_batches(table: str, start_date: Optional[date], end_date: Optional[date],
+                          user_id: Optional[int], batch_size: int) -> Iterator[List[tuple]]:
+    """Yield a table's archived rows in a date range, one month's file at a time"""
+    archiver = get_archiver()
+    if not archiver:
+        return
+
+    query = MonthlyRollup.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    if start_date:
+        query = query.filter(MonthlyRollup.month >= month_start(start_date))
+    if end_date:
+        query = query.filter(MonthlyRollup.month <= end_date)
+    archive_paths = [rollup.archive_path for rollup in query.order_by(MonthlyRollup.user_id, MonthlyRollup.month)]
+
+    columns = get_export_columns(table)
+    for archive_path in archive_paths:
+        frame = read_archived_month(os.path.join(archiver.folder, archive_path), table, start_date, end_date)
+        if frame is None or frame.empty:
+            continue
+        rows = frame.reindex(columns=columns).itertuples(index=False, name=None)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+def read_archived_month(path: str, table: str, start_date: Optional[date], end_date: Optional[date]):
+    """One archived month of a table within the date range, or None"""
+    date_column = ARCHIVED_TABLES[table][1]
+    if date_column is None:
+        # Exercises are archived with their workouts, so filter by those
+        workouts = read_archived_month(path, 'workout_logs', start_date, end_date)
+        if workouts is None or workouts.empty:
+            return None
+        frame = read_archived_file(path, table)
+        return frame[frame['workout_id'].isin(workouts['id'])] if frame is not None else None
+
+    frame = read_archived_file(path, table)
+    if frame is None:
+        return None
+    if start_date:
+        frame = frame[frame[date_column] >= start_date]
+    if end_date:
+        frame = frame[frame[date_column] <= end_date]
+    return frame
+
+def read_archived_file(path: str, table: str):
+    file_path = os.path.join(path, f'{table}.parquet')
+    return read_parquet(file_path) if os.path.exists(file_path) else None
+
+def stream_export(table: str, export_format: str, batches: Iterable[List[tuple]]) -> Iterator:
+    """Encode batches of a table's rows as CSV text or Parquet bytes, chunk by chunk"""
+    if export_format == 'parquet':
+        return stream_parquet(table, batches)
+    return stream_csv(table, batches)
+
+def stream_csv(table: str, batches: Iterable[List[tuple]]) -> Iterator[str]:
+    """CSV with a header row; the header is yielded before any row is read"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(get_export_columns(table))
+    yield buffer.getvalue()
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+def stream_parquet(table: str, batches: Iterable[List[tuple]], compression: Optional[str] = None) -> Iterator[bytes]:
+    """Parquet with one row group per batch, yielded as each group is written"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = get_arrow_schema(table)
+    sink = ChunkSink()
+    compression = compression or current_app.config['ARCHIVE_COMPRESSION']
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    try:
+        yield sink.drain()
+        for batch in batches:
+            columns = zip(*batch)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()  # the footer
+
+def get_arrow_schema(table: str):
+    """Arrow schema matching a table's columns"""
+    import pyarrow as pa
+
+    arrow_types = {
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        date: pa.date32(),
+        datetime: pa.timestamp('us'),
+        str: pa.string()
+    }
+    return pa.schema([
+        pa.field(column.name, arrow_types.get(column.type.python_type, pa.string()))
+        for column in ARCHIVED_TABLES[table][0].__table__.columns
+    ])
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
@@ -0,0 +1,46 @@
+"""Gunicorn settings for production
+
+Every setting can be overridden with the usual environment variables,
+e.g. WEB_CONCURRENCY for the number of worker processes.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Load the app once in the master and fork workers from it, so imported
+# libraries are shared copy-on-write.
+preload_app = True
+
+# Threaded workers: one process per core, a few threads each to overlap
+# database and SMTP waits.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY') or max(2, multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+
+# Recycle workers periodically to cap memory growth from leaks; the jitter
+# stops all workers restarting at once.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 1000)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 100)
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 120)
+graceful_timeout = 30
+keepalive = 5
+
+# Heartbeat files on tmpfs, so a slow container disk cannot stall workers
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master, then start this
+    worker's scheduler so it campaigns for leadership"""
+    from wsgi import app
+    from models import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+    if app.config['SCHEDULER_ENABLED']:
+        app.extensions['email_service'].start_scheduler()
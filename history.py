@@ -0,0 +1,191 @@
+from collections import defaultdict, namedtuple
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from sqlalchemy import select
+from archive import get_archiver
+from models import db, WorkoutLog, ExerciseLog, NutritionLog, Meal
+
+# Columns loaded for history pages. Rows come back as lightweight tuples
+# rather than ORM instances, so nothing is added to the session identity map.
+WORKOUT_COLUMNS = (
+    WorkoutLog.id, WorkoutLog.workout_type, WorkoutLog.session_duration,
+    WorkoutLog.calories_burned, WorkoutLog.max_bpm, WorkoutLog.avg_bpm,
+    WorkoutLog.resting_bpm, WorkoutLog.workout_frequency, WorkoutLog.workout_date
+)
+
+EXERCISE_COLUMNS = (
+    ExerciseLog.id, ExerciseLog.workout_id, ExerciseLog.name_of_exercise,
+    ExerciseLog.sets, ExerciseLog.reps, ExerciseLog.burns_calories_per_30min,
+    ExerciseLog.target_muscle_group, ExerciseLog.equipment_needed,
+    ExerciseLog.difficulty_level, ExerciseLog.body_part, ExerciseLog.type_of_muscle
+)
+
+NUTRITION_COLUMNS = (
+    NutritionLog.id, NutritionLog.daily_meals_frequency, NutritionLog.carbs,
+    NutritionLog.proteins, NutritionLog.fats, NutritionLog.calories,
+    NutritionLog.water_intake, NutritionLog.log_date
+)
+
+MEAL_COLUMNS = (
+    Meal.id, Meal.nutrition_log_id, Meal.meal_name, Meal.meal_type, Meal.diet_type,
+    Meal.sugar, Meal.sodium, Meal.cholesterol, Meal.serving_size, Meal.calories,
+    Meal.carbs, Meal.proteins, Meal.fats, Meal.cooking_method, Meal.prep_time,
+    Meal.cook_time, Meal.is_healthy, Meal.meal_date
+)
+
+# Row types for archived rows, field-compatible with the query rows above
+ArchivedWorkout = namedtuple('ArchivedWorkout', [c.key for c in WORKOUT_COLUMNS])
+ArchivedExercise = namedtuple('ArchivedExercise', [c.key for c in EXERCISE_COLUMNS])
+ArchivedNutritionLog = namedtuple('ArchivedNutritionLog', [c.key for c in NUTRITION_COLUMNS])
+ArchivedMeal = namedtuple('ArchivedMeal', [c.key for c in MEAL_COLUMNS])
+
+WORKOUT_HISTORY = {
+    'parent_model': WorkoutLog,
+    'parent_table': 'workout_logs',
+    'parent_columns': WORKOUT_COLUMNS,
+    'parent_row': ArchivedWorkout,
+    'date_column': 'workout_date',
+    'child_table': 'exercise_logs',
+    'child_columns': EXERCISE_COLUMNS,
+    'child_key': ExerciseLog.workout_id,
+    'child_row': ArchivedExercise
+}
+
+NUTRITION_HISTORY = {
+    'parent_model': NutritionLog,
+    'parent_table': 'nutrition_logs',
+    'parent_columns': NUTRITION_COLUMNS,
+    'parent_row': ArchivedNutritionLog,
+    'date_column': 'log_date',
+    'child_table': 'meals',
+    'child_columns': MEAL_COLUMNS,
+    'child_key': Meal.nutrition_log_id,
+    'child_row': ArchivedMeal
+}
+
+class WorkoutEntry(NamedTuple):
+    workout: tuple
+    exercises: List[tuple]
+
+class NutritionEntry(NamedTuple):
+    log: tuple
+    meals: List[tuple]
+
+class HistoryLoader:
+    """Load workout and nutrition history with their children in batched queries"""
+
+    @staticmethod
+    def _load_children(columns: Sequence, parent_key, parent_ids: List[int]) -> Dict[int, List[tuple]]:
+        """Load all children for a page of parents with a single IN query"""
+        children = defaultdict(list)
+        if not parent_ids:
+            return children
+
+        rows = db.session.execute(
+            select(*columns).where(parent_key.in_(parent_ids)).order_by(columns[0])
+        )
+        for row in rows:
+            children[getattr(row, parent_key.key)].append(row)
+        return children
+
+    @staticmethod
+    def get_workout_history(user_id: int, page: int = 1, per_page: int = 20,
+                            start_date: Optional[date] = None,
+                            end_date: Optional[date] = None) -> List[WorkoutEntry]:
+        """Get a page of workouts with their exercises (two queries; with
+        ARCHIVE_ENABLED, a third for archived months and their file reads)"""
+        entries = HistoryLoader._get_history(
+            WORKOUT_HISTORY, user_id, page, per_page, start_date, end_date
+        )
+        return [WorkoutEntry(*entry) for entry in entries]
+
+    @staticmethod
+    def get_nutrition_history(user_id: int, page: int = 1, per_page: int = 20,
+                              start_date: Optional[date] = None,
+                              end_date: Optional[date] = None) -> List[NutritionEntry]:
+        """Get a page of nutrition logs with their meals (two queries; with
+        ARCHIVE_ENABLED, a third for archived months and their file reads)"""
+        entries = HistoryLoader._get_history(
+            NUTRITION_HISTORY, user_id, page, per_page, start_date, end_date
+        )
+        return [NutritionEntry(*entry) for entry in entries]
+
+    @staticmethod
+    def _get_history(spec: Dict, user_id: int, page: int, per_page: int,
+                     start_date: Optional[date], end_date: Optional[date]) -> List[tuple]:
+        """Load a page of parents and their children, reading through to cold storage"""
+        parent_model = spec['parent_model']
+        date_column = getattr(parent_model, spec['date_column'])
+        offset = (page - 1) * per_page
+
+        filters = [parent_model.user_id == user_id]
+        if start_date:
+            filters.append(date_column >= start_date)
+        if end_date:
+            filters.append(date_column <= end_date)
+        query = select(*spec['parent_columns']).where(*filters).order_by(date_column.desc(), parent_model.id.desc())
+
+        archiver = get_archiver()
+        rollups = archiver.get_rollups(user_id, start_date, end_date) if archiver else []
+        if not rollups:
+            parents = db.session.execute(query.limit(per_page).offset(offset)).all()
+            children = HistoryLoader._load_children(
+                spec['child_columns'], spec['child_key'], [p.id for p in parents]
+            )
+            return [(p, children.get(p.id, [])) for p in parents]
+
+        # Logs can be back-dated into a month that is already archived, so the
+        # two sources interleave: take the first offset + per_page rows of
+        # each, merge them by date and cut the page from the result.
+        window = offset + per_page
+        hot_parents = db.session.execute(query.limit(window)).all()
+        archived_parents = archiver.read_archived(
+            user_id, spec['parent_table'], rollups, start_date, end_date
+        ).sort_values([spec['date_column'], 'id'], ascending=False).head(window)
+
+        parent_row = spec['parent_row']
+        merged = hot_parents + [
+            parent_row(*(record[f] for f in parent_row._fields)) for record in archived_parents.to_dict('records')
+        ]
+        merged.sort(key=lambda row: (getattr(row, spec['date_column']), row.id), reverse=True)
+        parents = merged[offset:window]
+
+        archived_ids = [p.id for p in parents if isinstance(p, parent_row)]
+        children = HistoryLoader._load_children(
+            spec['child_columns'], spec['child_key'], [p.id for p in parents if not isinstance(p, parent_row)]
+        )
+        if archived_ids:
+            archived_children = archiver.read_archived(user_id, spec['child_table'], rollups)
+            child_key = spec['child_key'].key
+            archived_children = archived_children[archived_children[child_key].isin(archived_ids)]
+            child_row = spec['child_row']
+            for record in archived_children.sort_values('id').to_dict('records'):
+                children[record[child_key]].append(child_row(*(record[f] for f in child_row._fields)))
+
+        return [(p, children.get(p.id, [])) for p in parents]
+
+    @staticmethod
+    def row_to_dict(row) -> Dict:
+        """Convert a history row to a JSON-serializable dict"""
+        return {
+            key: value.isoformat() if isinstance(value, (date, datetime)) else value
+            for key, value in row._asdict().items()
+        }
+
+    @staticmethod
+    def serialize_workouts(entries: List[WorkoutEntry]) -> List[Dict]:
+        """Serialize workout history for the JSON API"""
+        return [
+            dict(HistoryLoader.row_to_dict(entry.workout),
+                 exercises=[HistoryLoader.row_to_dict(e) for e in entry.exercises])
+            for entry in entries
+        ]
+
+    @staticmethod
+    def serialize_nutrition(entries: List[NutritionEntry]) -> List[Dict]:
+        """Serialize nutrition history for the JSON API"""
+        return [
+            dict(HistoryLoader.row_to_dict(entry.log),
+                 meals=[HistoryLoader.row_to_dict(m) for m in entry.meals])
+            for entry in entries
+        ]
@@ -1,21 +1,12 @@
 from app import create_app
-from models import db
+from cli import init_database
 
-def init_database():
-    """Initialize the database and create all tables"""
+def init_database_with_app():
+    """Initialize the database, create all tables and add sample exercises"""
     app = create_app()
 
     with app.app_context():
-        # Create all tables
-        db.create_all()
-        print("Database tables created successfully!")
-
-        # Check if sample data was added
-        from models import Exercise
-        if Exercise.query.first():
-            print("Sample exercises already exist in database")
-        else:
-            print("No sample exercises found - they will be added when app starts")
+        init_database()
 
 if __name__ == '__main__':
-    init_database()
+    init_database_with_app()
@@ -31,11 +31,16 @@ class User(UserMixin, db.Model):
     weekly_reports = db.Column(db.Boolean, default=True)
     monthly_reports = db.Column(db.Boolean, default=True)
 
+    # Bumped whenever data drawn into the user's reports changes, so cached
+    # reports of older data are not served
+    report_data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Relationships
     workouts = db.relationship('WorkoutLog', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     nutrition_logs = db.relationship('NutritionLog', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     meals = db.relationship('Meal', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     daily_stats = db.relationship('DailyStats', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    monthly_rollups = db.relationship('MonthlyRollup', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -225,10 +230,16 @@ class Report(db.Model):
     # Report Details
     report_type = db.Column(db.String(20))  # daily, weekly, monthly
     report_format = db.Column(db.String(10))  # pdf, excel
-    file_path = db.Column(db.String(255))
+    storage_key = db.Column('file_path', db.String(255))  # key in the report storage backend
     email_sent = db.Column(db.Boolean, default=False)
     email_recipients = db.Column(db.Text)  # JSON list of emails
     
+    # Background rendering: queued, running, ready or failed
+    status = db.Column(db.String(20), default='ready', server_default='ready')
+    error = db.Column(db.Text)
+    completed_at = db.Column(db.DateTime)
+    status_changed_at = db.Column(db.DateTime, default=datetime.utcnow)  # finds jobs lost by a dead worker
+    
     # Date Range
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
@@ -236,4 +247,126 @@ class Report(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Report {self.report_type} - {self.created_at}>'
\ No newline at end of file
+        return f'<Report {self.report_type} - {self.created_at}>'
+
+class MonthlyRollup(db.Model):
+    __tablename__ = 'monthly_rollups'
+    __table_args__ = (db.UniqueConstraint('user_id', 'month', name='uq_monthly_rollups_user_month'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    month = db.Column(db.Date, nullable=False)  # first day of the archived month
+    
+    # Workout Totals
+    workout_count = db.Column(db.Integer, default=0)
+    exercise_count = db.Column(db.Integer, default=0)
+    total_workout_duration = db.Column(db.Float, default=0)  # hours
+    total_calories_burned = db.Column(db.Integer, default=0)
+    
+    # Nutrition Totals
+    nutrition_log_count = db.Column(db.Integer, default=0)
+    meal_count = db.Column(db.Integer, default=0)
+    total_calories_consumed = db.Column(db.Integer, default=0)
+    total_carbs = db.Column(db.Integer, default=0)
+    total_proteins = db.Column(db.Integer, default=0)
+    total_fats = db.Column(db.Integer, default=0)
+    total_water_intake = db.Column(db.Float, default=0)  # liters
+    
+    # Cold storage location of the archived rows
+    archive_path = db.Column(db.String(255))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<MonthlyRollup {self.user_id} - {self.month}>'
+
+class JobExecution(db.Model):
+    __tablename__ = 'job_executions'
+    # One row per job per scheduled run; the constraint is what stops two
+    # processes from running the same slot.
+    __table_args__ = (db.UniqueConstraint('job_id', 'scheduled_for', name='uq_job_executions_job_slot'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(100), nullable=False)
+    scheduled_for = db.Column(db.DateTime, nullable=False)  # UTC
+    worker = db.Column(db.String(100))  # host:pid that ran the job
+    status = db.Column(db.String(20), default='running')  # running, succeeded, failed
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<JobExecution {self.job_id} - {self.scheduled_for}>'
+
+class ScheduledReport(db.Model):
+    __tablename__ = 'scheduled_reports'
+    # Recurring reports requested by users. Any worker may add one; the
+    # scheduler leader turns the rows into jobs.
+    __table_args__ = (db.UniqueConstraint('user_id', 'report_type', 'frequency',
+                                          name='uq_scheduled_reports_user_type_frequency'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    report_type = db.Column(db.String(20), nullable=False)  # daily, weekly, monthly
+    frequency = db.Column(db.String(20), nullable=False)  # daily, weekly, monthly
+    recipients = db.Column(db.Text)  # comma-separated emails
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ScheduledReport {self.user_id} - {self.report_type} {self.frequency}>'
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_versions'
+    # Bumped whenever a catalog table changes, so per-process caches of it
+    # know when to reload.
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CatalogVersion {self.name} v{self.version}>'
+
+# Summary views
+# These are materialized views on PostgreSQL and plain tables elsewhere, so
+# they live on their own metadata and are never touched by db.create_all().
+# summary_views.create_summary_views() builds them and the scheduler keeps
+# them fresh.
+summary_metadata = db.MetaData()
+
+class UserWorkoutSummary(db.Model):
+    __table__ = db.Table(
+        'user_workout_summary', summary_metadata,
+        db.Column('user_id', db.Integer, primary_key=True),
+        db.Column('username', db.String(80)),
+        db.Column('total_workouts', db.Integer),
+        db.Column('total_duration_hours', db.Float),
+        db.Column('total_calories_burned', db.Integer),
+        db.Column('avg_calories_per_workout', db.Float),
+        db.Column('refreshed_at', db.DateTime)
+    )
+
+    def __repr__(self):
+        return f'<UserWorkoutSummary {self.username}>'
+
+class UserNutritionSummary(db.Model):
+    __table__ = db.Table(
+        'user_nutrition_summary', summary_metadata,
+        db.Column('user_id', db.Integer, primary_key=True),
+        db.Column('username', db.String(80)),
+        db.Column('total_nutrition_logs', db.Integer),
+        db.Column('avg_daily_calories', db.Float),
+        db.Column('avg_daily_carbs', db.Float),
+        db.Column('avg_daily_proteins', db.Float),
+        db.Column('avg_daily_fats', db.Float),
+        db.Column('refreshed_at', db.DateTime)
+    )
+
+    def __repr__(self):
+        return f'<UserNutritionSummary {self.username}>'
+
+def _reject_summary_write(mapper, connection, target):
+    raise RuntimeError(f'{target.__class__.__name__} is a read-only summary view')
+
+for _summary_model in (UserWorkoutSummary, UserNutritionSummary):
+    for _event in ('before_insert', 'before_update', 'before_delete'):
+        db.event.listen(_summary_model, _event, _reject_summary_write)
@@ -0,0 +1,84 @@
+from datetime import date
+from typing import List
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.sql import StatementLambdaElement
+from models import db, WorkoutLog, ExerciseLog, NutritionLog, Meal
+
+# Hot statements are built as lambda statements. SQLAlchemy caches the
+# construct and its compiled SQL keyed on the lambda's code location, and
+# turns the closure variables (user_id, limit, since) into bound parameters,
+# so repeated calls skip both statement building and SQL compilation.
+# The builders are shared by the Flask views and the async API tier.
+
+def recent_workouts_stmt(user_id: int, limit: int) -> StatementLambdaElement:
+    stmt = lambda_stmt(lambda: select(WorkoutLog))
+    stmt += lambda s: s.where(WorkoutLog.user_id == user_id)
+    stmt += lambda s: s.order_by(WorkoutLog.workout_date.desc()).limit(limit)
+    return stmt
+
+def recent_nutrition_stmt(user_id: int, limit: int) -> StatementLambdaElement:
+    stmt = lambda_stmt(lambda: select(NutritionLog))
+    stmt += lambda s: s.where(NutritionLog.user_id == user_id)
+    stmt += lambda s: s.order_by(NutritionLog.log_date.desc()).limit(limit)
+    return stmt
+
+def recent_meals_stmt(user_id: int, limit: int) -> StatementLambdaElement:
+    stmt = lambda_stmt(lambda: select(Meal))
+    stmt += lambda s: s.where(Meal.user_id == user_id)
+    stmt += lambda s: s.order_by(Meal.meal_date.desc()).limit(limit)
+    return stmt
+
+def workouts_since_stmt(user_id: int, since: date) -> StatementLambdaElement:
+    stmt = lambda_stmt(lambda: select(WorkoutLog))
+    stmt += lambda s: s.where(WorkoutLog.user_id == user_id, WorkoutLog.workout_date >= since)
+    return stmt
+
+def nutrition_since_stmt(user_id: int, since: date) -> StatementLambdaElement:
+    stmt = lambda_stmt(lambda: select(NutritionLog))
+    stmt += lambda s: s.where(NutritionLog.user_id == user_id, NutritionLog.log_date >= since)
+    return stmt
+
+def exercise_logs_since_stmt(user_id: int, since: date) -> StatementLambdaElement:
+    stmt = lambda_stmt(lambda: select(
+        ExerciseLog.name_of_exercise, ExerciseLog.sets, ExerciseLog.body_part,
+        ExerciseLog.target_muscle_group, ExerciseLog.type_of_muscle
+    ).join(WorkoutLog, WorkoutLog.id == ExerciseLog.workout_id))
+    stmt += lambda s: s.where(WorkoutLog.user_id == user_id, WorkoutLog.workout_date >= since)
+    return stmt
+
+class HotQueries:
+    """Registry of the per-request queries behind the dashboard, trackers and chart APIs"""
+
+    @staticmethod
+    def _scalars(stmt) -> List:
+        return db.session.execute(stmt).scalars().all()
+
+    @staticmethod
+    def recent_workouts(user_id: int, limit: int) -> List[WorkoutLog]:
+        """Most recent workouts for a user"""
+        return HotQueries._scalars(recent_workouts_stmt(user_id, limit))
+
+    @staticmethod
+    def recent_nutrition(user_id: int, limit: int) -> List[NutritionLog]:
+        """Most recent nutrition logs for a user"""
+        return HotQueries._scalars(recent_nutrition_stmt(user_id, limit))
+
+    @staticmethod
+    def recent_meals(user_id: int, limit: int) -> List[Meal]:
+        """Most recent meals for a user"""
+        return HotQueries._scalars(recent_meals_stmt(user_id, limit))
+
+    @staticmethod
+    def workouts_since(user_id: int, since: date) -> List[WorkoutLog]:
+        """Workouts for a user on or after a date"""
+        return HotQueries._scalars(workouts_since_stmt(user_id, since))
+
+    @staticmethod
+    def nutrition_since(user_id: int, since: date) -> List[NutritionLog]:
+        """Nutrition logs for a user on or after a date"""
+        return HotQueries._scalars(nutrition_since_stmt(user_id, since))
+
+    @staticmethod
+    def exercise_logs_since(user_id: int, since: date) -> List:
+        """Name, sets and muscle fields of a user's exercises on or after a date"""
+        return db.session.execute(exercise_logs_since_stmt(user_id, since)).all()
@@ -0,0 +1,155 @@
+import json
+import logging
+import time
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine.default import DefaultDialect
+from models import db
+
+logger = logging.getLogger('lifestyle.queries')
+
+class QueryInstrumentation:
+    """Per-request SQL query counter, timer and N+1 detector
+
+    Also tracks the SQL compilation cache: a hit means the statement's
+    compiled form was reused, a miss means it was compiled for this call.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.cache_totals = Counter()
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Attach engine event listeners and request hooks"""
+        self.app = app
+        app.extensions['query_instrumentation'] = self
+        if not app.config['QUERY_INSTRUMENTATION']:
+            return
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+
+    def start_request(self):
+        """Reset query stats for the incoming request"""
+        g.query_stats = {
+            'count': 0,
+            'duration': 0.0,
+            'statements': Counter(),
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'started': time.perf_counter()
+        }
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['query_start_time'].pop()
+        cache = self.get_cache_outcome(context)
+        if cache:
+            self.cache_totals[cache] += 1
+        if not has_request_context() or 'query_stats' not in g:
+            return
+
+        stats = g.query_stats
+        stats['count'] += 1
+        stats['duration'] += time.perf_counter() - start
+        stats['statements'][statement] += 1
+        if cache:
+            stats[cache] += 1
+
+    @staticmethod
+    def get_cache_outcome(context):
+        """Classify an execution as a compile-cache hit or miss"""
+        cache_hit = getattr(context, 'cache_hit', None)
+        if cache_hit == DefaultDialect.CACHE_HIT:
+            return 'cache_hits'
+        if cache_hit == DefaultDialect.CACHE_MISS:
+            return 'cache_misses'
+        # Raw SQL and uncacheable constructs are not counted
+        return None
+
+    @staticmethod
+    def get_hit_rate(hits, misses):
+        lookups = hits + misses
+        return round(hits / lookups * 100, 1) if lookups else None
+
+    def get_cache_stats(self):
+        """Get process-wide compile-cache counters since startup"""
+        hits = self.cache_totals['cache_hits']
+        misses = self.cache_totals['cache_misses']
+        return {
+            'cache_hits': hits,
+            'cache_misses': misses,
+            'cache_hit_rate': self.get_hit_rate(hits, misses)
+        }
+
+    def get_stats(self):
+        """Get a summary of the current request's query stats"""
+        stats = g.get('query_stats')
+        if stats is None:
+            return None
+
+        threshold = self.app.config['QUERY_N_PLUS_ONE_THRESHOLD']
+        repeated = {
+            statement: count
+            for statement, count in stats['statements'].items()
+            if count >= threshold
+        }
+        return {
+            'queries': stats['count'],
+            'db_ms': round(stats['duration'] * 1000, 2),
+            'total_ms': round((time.perf_counter() - stats['started']) * 1000, 2),
+            'cache_hits': stats['cache_hits'],
+            'cache_misses': stats['cache_misses'],
+            'cache_hit_rate': self.get_hit_rate(stats['cache_hits'], stats['cache_misses']),
+            'repeated_statements': repeated
+        }
+
+    def finish_request(self, response):
+        """Emit Server-Timing and optionally log the request's query stats"""
+        stats = self.get_stats()
+        if stats is None:
+            return response
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats["db_ms"]};desc="{stats["queries"]} queries"'
+        )
+        response.headers.add('Server-Timing', f'app;dur={stats["total_ms"]}')
+        if stats['cache_hit_rate'] is not None:
+            response.headers.add(
+                'Server-Timing',
+                f'sqlcache;desc="{stats["cache_hits"]} hits, {stats["cache_misses"]} misses"'
+            )
+
+        if stats['repeated_statements']:
+            for statement, count in stats['repeated_statements'].items():
+                logger.warning("Possible N+1 on %s %s: %d x %s",
+                               request.method, request.path, count, ' '.join(statement.split()))
+
+        if self.app.config['QUERY_LOG']:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'queries': stats['queries'],
+                'db_ms': stats['db_ms'],
+                'total_ms': stats['total_ms'],
+                'cache_hits': stats['cache_hits'],
+                'cache_misses': stats['cache_misses'],
+                'cache_hit_rate': stats['cache_hit_rate'],
+                'process_cache_hit_rate': self.get_cache_stats()['cache_hit_rate'],
+                'n_plus_one': len(stats['repeated_statements'])
+            }))
+
+        return response
@@ -0,0 +1,151 @@
+import threading
+from datetime import date, timedelta
+from exercise_catalog import normalize
+from queries import HotQueries
+
+DIFFICULTY_LEVELS = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
+
+# How well an exercise's difficulty suits a user's experience level, by
+# (difficulty - experience). Exercises of unknown difficulty get UNKNOWN_FIT.
+DIFFICULTY_FIT = {-2: 0.3, -1: 0.6, 0: 1.0, 1: 0.5}
+UNKNOWN_FIT = 0.6
+
+def get_features(body_part, target_muscle_group, type_of_muscle):
+    """(feature, weight) pairs describing what an exercise trains"""
+    features = []
+    if body_part:
+        features.append((f'body:{normalize(body_part)}', 1.0))
+    muscles = [normalize(muscle) for muscle in (target_muscle_group or '').split(',') if muscle.strip()]
+    for muscle in muscles:
+        features.append((f'muscle:{muscle}', 1.0 / len(muscles)))
+    if type_of_muscle:
+        features.append((f'type:{normalize(type_of_muscle)}', 0.5))
+    return features
+
+class RecommendationIndex:
+    """Precomputed NumPy matrices for one version of the exercise catalog
+
+    features is an exercises x features matrix of unit rows. similarity is a
+    features x features cosine matrix from co-occurrence in the catalog, so
+    training "chest" counts partly towards "triceps". level_fit holds one
+    difficulty-fit vector per experience level. A recommendation is then a
+    few matrix-vector products and a top-k selection.
+    """
+
+    def __init__(self, snapshot):
+        import numpy as np  # imported on first use to keep start-up light
+
+        self.snapshot = snapshot
+        self.version = snapshot.version
+        exercises = snapshot.exercises
+
+        self.columns = {}
+        rows = []
+        for exercise in exercises:
+            features = get_features(exercise.body_part, exercise.target_muscle_group, exercise.type_of_muscle)
+            rows.append([(self.columns.setdefault(name, len(self.columns)), weight) for name, weight in features])
+
+        features = np.zeros((len(exercises), max(len(self.columns), 1)), dtype=np.float32)
+        for position, row in enumerate(rows):
+            for column, weight in row:
+                features[position, column] += weight
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        self.features = np.divide(features, norms, out=np.zeros_like(features), where=norms > 0)
+
+        co_occurrence = self.features.T @ self.features
+        scale = np.sqrt(np.diag(co_occurrence))
+        outer = np.outer(scale, scale)
+        self.similarity = np.divide(co_occurrence, outer, out=np.zeros_like(co_occurrence), where=outer > 0)
+
+        difficulty = np.array([DIFFICULTY_LEVELS.get(normalize(e.difficulty_level), 0) for e in exercises])
+        self.level_fit = np.full((len(DIFFICULTY_LEVELS) + 1, len(exercises)), UNKNOWN_FIT, dtype=np.float32)
+        fit_by_offset = np.array([DIFFICULTY_FIT.get(step, 0.0) for step in range(-3, 4)], dtype=np.float32)
+        for level in DIFFICULTY_LEVELS.values():
+            fit = fit_by_offset[difficulty - level + 3]
+            self.level_fit[level] = np.where(difficulty > 0, fit, UNKNOWN_FIT)
+
+        self.positions_by_name = {normalize(exercise.name): position for position, exercise in enumerate(exercises)}
+
+    def get_history_vector(self, history):
+        """Feature totals over a user's logged exercises, weighted by sets"""
+        import numpy as np
+
+        vector = np.zeros(self.features.shape[1], dtype=np.float32)
+        recent = set()
+        for entry in history:
+            weight = entry.sets or 1
+            position = self.positions_by_name.get(normalize(entry.name_of_exercise))
+            if position is not None:
+                recent.add(position)
+                vector += weight * self.features[position]
+                continue
+            # Not in the catalog: use the muscles recorded on the log itself
+            for name, feature_weight in get_features(entry.body_part, entry.target_muscle_group, entry.type_of_muscle):
+                column = self.columns.get(name)
+                if column is not None:
+                    vector[column] += weight * feature_weight
+        return vector, recent
+
+    def recommend(self, experience_level, history, limit=5):
+        """Best (exercise, score) pairs for a user, under-trained areas first"""
+        import numpy as np
+
+        if not self.snapshot.exercises:
+            return []
+
+        trained, recent = self.get_history_vector(history)
+        if trained.any():
+            trained = trained @ self.similarity
+            deficit = 1.0 - trained / trained.max()
+        else:
+            deficit = np.ones_like(trained)
+
+        level = experience_level if experience_level in DIFFICULTY_LEVELS.values() else 1
+        scores = (self.features @ deficit) * self.level_fit[level]
+        if recent:
+            scores[list(recent)] = 0.0
+
+        count = min(limit, int(np.count_nonzero(scores > 0)))
+        if count == 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.snapshot.exercises[position], float(scores[position])) for position in top]
+
+class ExerciseRecommender:
+    """Exercise recommendations from a cached RecommendationIndex
+
+    The index is rebuilt only when the exercise catalog snapshot changes.
+    Each request loads the user's last RECOMMENDATION_HISTORY_DAYS of
+    exercise logs and scores the whole catalog with matrix products.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.index = None
+        self.lock = threading.Lock()
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read recommendation settings and register the recommender"""
+        self.app = app
+        self.history_days = app.config['RECOMMENDATION_HISTORY_DAYS']
+        app.extensions['exercise_recommender'] = self
+
+    def get_index(self):
+        """The index for the current catalog snapshot"""
+        snapshot = self.app.extensions['exercise_catalog'].get_snapshot()
+        index = self.index
+        if index is None or index.snapshot is not snapshot:
+            with self.lock:
+                if self.index is None or self.index.snapshot is not snapshot:
+                    self.index = RecommendationIndex(snapshot)
+                index = self.index
+        return index
+
+    def recommend(self, user, limit=5):
+        """Recommended exercises for a user with their scores"""
+        since = date.today() - timedelta(days=self.history_days)
+        history = HotQueries.exercise_logs_since(user.id, since)
+        return self.get_index().recommend(user.experience_level, history, limit)
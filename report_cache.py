@@ -0,0 +1,192 @@
+import hashlib
+import threading
+import time
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+from models import db, User, WorkoutLog, NutritionLog
+from report_storage import create_storage
+
+# Bump when ReportGenerator's output changes, so cached reports are redrawn
+REPORT_TEMPLATE_VERSION = 2
+
+REPORT_EXTENSIONS = {'pdf': 'pdf', 'excel': 'xlsx'}
+
+# Models whose rows appear in a user's reports
+REPORT_SOURCES = (User, WorkoutLog, NutritionLog)
+
+# User attributes drawn into reports; changes to the others keep cached reports
+REPORT_USER_ATTRIBUTES = ('username', 'email', 'age', 'gender', 'weight', 'height', 'bmi',
+                          'experience_level', 'fat_percentage')
+
+def get_data_version(user_id):
+    """Version of the data a user's reports are drawn from"""
+    version = db.session.execute(
+        select(User.report_data_version).where(User.id == user_id)
+    ).scalar()
+    return version or 0
+
+def get_data_versions(user_ids):
+    """get_data_version for several users in one query, keyed by user id"""
+    versions = dict.fromkeys(user_ids, 0)
+    rows = db.session.execute(
+        select(User.id, User.report_data_version).where(User.id.in_(user_ids))
+    )
+    for user_id, version in rows:
+        versions[user_id] = version
+    return versions
+
+def bump_data_versions(session, user_ids):
+    """Advance the report data version of users in the session's transaction
+
+    The version lives on the user's row, which exists before any of their
+    data does, so this is a single UPDATE that concurrent writers serialize
+    on rather than an insert that two of them could race to make.
+    """
+    session.execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(report_data_version=User.report_data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def has_report_changes(user):
+    """Whether a dirty user has changes to attributes their reports show"""
+    attrs = inspect(user).attrs
+    return any(attrs[name].history.has_changes() for name in REPORT_USER_ATTRIBUTES)
+
+class ReportCache:
+    """Rendered reports stored under a hash of everything they depend on
+
+    The key covers the user's data version, the date range, the format and
+    REPORT_TEMPLATE_VERSION, so an unchanged report is served from storage
+    instead of being drawn again, whether it was asked for on /generate_report
+    or by a scheduled email. Reports live in the REPORT_STORAGE backend, and
+    Report.storage_key holds their key there. Reports older than
+    REPORT_CACHE_MAX_AGE_DAYS are removed, then the least recently used ones
+    until the total is under REPORT_CACHE_MAX_MB: after each new render with
+    local storage, and nightly by the retention job with any backend.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.locks = {}  # key -> lock held while it renders
+        self.lock = threading.Lock()
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read cache settings, create the storage backend and register the cache"""
+        self.app = app
+        self.storage = create_storage(app)
+        self.max_bytes = app.config['REPORT_CACHE_MAX_MB'] * 1024 * 1024
+        self.max_age = app.config['REPORT_CACHE_MAX_AGE_DAYS'] * 86400
+        self.spool_size = app.config['REPORT_SPOOL_MAX_MB'] * 1024 * 1024
+        app.extensions['report_cache'] = self
+
+    def get_key(self, user_id, start_date, end_date, report_format, data_version=None):
+        """Content address of a report: a hash of its inputs"""
+        if data_version is None:
+            data_version = get_data_version(user_id)
+        parts = [user_id, data_version, start_date, end_date, report_format, REPORT_TEMPLATE_VERSION]
+        return hashlib.sha256(':'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+
+    def get_storage_key(self, user_id, start_date, end_date, report_format, data_version=None):
+        """Storage key a report is cached under"""
+        key = self.get_key(user_id, start_date, end_date, report_format, data_version)
+        return f"{key}.{REPORT_EXTENSIONS[report_format]}"
+
+    def store(self, source, storage_key, evict=True):
+        """Save a rendered report from a binary file object, then make room
+        for it unless the caller evicts once for many reports"""
+        self.storage.save(storage_key, source)
+        if evict and self.storage.evict_on_store:
+            self.evict(keep=storage_key)
+
+    def render(self, user, start_date, end_date, report_format, generator_factory=None):
+        """Storage key of the report, rendering it only if it isn't cached"""
+        storage_key, stream = self.open(user, start_date, end_date, report_format, generator_factory)
+        stream.close()
+        return storage_key
+
+    def open(self, user, start_date, end_date, report_format, generator_factory=None):
+        """(storage_key, stream) of the report, rendering it only if it isn't
+        cached. A fresh render is returned from its in-memory buffer after
+        being stored, so the caller never reads it back from storage."""
+        storage_key = self.get_storage_key(user.id, start_date, end_date, report_format)
+        stream = self.open_cached(storage_key)
+        if stream:
+            return storage_key, stream
+
+        # Concurrent requests for the same report wait for one render
+        with self.lock:
+            key_lock = self.locks.setdefault(storage_key, threading.Lock())
+        try:
+            with key_lock:
+                stream = self.open_cached(storage_key)
+                if stream is None:
+                    generator = (generator_factory or get_generator)(user, start_date, end_date,
+                                                                     spool_size=self.spool_size)
+                    stream = generator.render(report_format)
+                    try:
+                        self.store(stream, storage_key)
+                    except Exception:
+                        stream.close()
+                        raise
+                    stream.seek(0)
+        finally:
+            with self.lock:
+                self.locks.pop(storage_key, None)
+        return storage_key, stream
+
+    def open_cached(self, storage_key):
+        """Open a cached report; None if it isn't stored"""
+        try:
+            return self.storage.open(storage_key)
+        except FileNotFoundError:
+            return None
+
+    def touch(self, storage_key):
+        """Mark a cached report as recently used; False if it isn't stored"""
+        return self.storage.touch(storage_key)
+
+    def evict(self, keep=None):
+        """Remove expired reports, then the least recently used over the size
+        limit; returns how many were removed"""
+        now = time.time()
+        entries = sorted((used, size, key) for key, size, used in self.storage.list())
+
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for used, size, key in entries:
+            if key == keep or (now - used <= self.max_age and total <= self.max_bytes):
+                continue
+            try:
+                self.storage.delete(key)
+                removed += 1
+                total -= size
+            except Exception as e:
+                print(f"Error evicting cached report {key}: {e}")
+        return removed
+
+def get_download_name(report_type, end_date, report_format):
+    """File name a report is downloaded or attached as"""
+    return f"lifestyle_{report_type}_report_{end_date}.{REPORT_EXTENSIONS[report_format]}"
+
+def get_generator(user, start_date, end_date, **kwargs):
+    # reportlab and openpyxl load on first use
+    from report_generator import ReportGenerator
+    return ReportGenerator(user, start_date, end_date, **kwargs)
+
+@event.listens_for(Session, 'before_flush')
+def _bump_on_report_data_change(session, flush_context, instances):
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            if obj in session.dirty and not has_report_changes(obj):
+                continue  # logins, rehashed passwords and email preferences
+            user_ids.add(obj.id)
+        elif isinstance(obj, REPORT_SOURCES):
+            user_ids.add(obj.user_id)
+    user_ids.discard(None)  # users not yet inserted have no reports
+    if user_ids:
+        bump_data_versions(session, sorted(user_ids))
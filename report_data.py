@@ -0,0 +1,262 @@
+from __future__ import annotations
+import copy
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from flask import current_app
+from sqlalchemy import inspect, select
+from archive import ARCHIVED_TABLES, get_archiver, read_log_range, read_log_ranges
+from exports import get_export_columns, iter_archived_batches
+from models import db
+from summary_views import get_user_summary, get_user_summaries
+from utils import AnalyticsCalculator
+
+# pandas is imported where it is used, so booting the app doesn't load it
+if TYPE_CHECKING:
+    import pandas as pd
+
+WORKOUT_COLUMNS = ['workout_date', 'workout_type', 'session_duration', 'calories_burned',
+                   'max_bpm', 'avg_bpm', 'resting_bpm']
+NUTRITION_COLUMNS = ['log_date', 'daily_meals_frequency', 'calories', 'carbs', 'proteins', 'fats',
+                     'water_intake']
+REPORT_COLUMNS = {'workout_logs': WORKOUT_COLUMNS, 'nutrition_logs': NUTRITION_COLUMNS}
+NUMERIC_COLUMNS = ['session_duration', 'calories_burned', 'max_bpm', 'avg_bpm', 'resting_bpm',
+                   'daily_meals_frequency', 'calories', 'carbs', 'proteins', 'fats', 'water_intake']
+
+# Workout days per week that count as fully consistent
+TARGET_WORKOUT_DAYS = 5
+
+def get_report_range(report_type: str, end_date: date) -> tuple:
+    """(start_date, end_date) covered by a daily, weekly or monthly report"""
+    if report_type == 'daily':
+        return end_date, end_date
+    if report_type == 'weekly':
+        return end_date - timedelta(days=7), end_date
+    return end_date - timedelta(days=30), end_date
+
+class DailyTotals:
+    """Per-day totals over a report's date range and the scores drawn from
+    them; subclasses set daily and workout_types"""
+
+    @property
+    def range_days(self) -> int:
+        return (self.end_date - self.start_date).days + 1
+
+    def get_consistency_score(self) -> int:
+        """Workout consistency over the whole range"""
+        workout_days = int((self.daily['workouts'] > 0).sum())
+        target_days = max(1, round(self.range_days * TARGET_WORKOUT_DAYS / 7))
+        return AnalyticsCalculator.calculate_consistency_score(workout_days, target_days)
+
+    def get_most_common_type(self):
+        """The most logged workout type, the first by name on ties, or None"""
+        if self.workout_types.empty:
+            return None
+        return self.workout_types[self.workout_types == self.workout_types.max()].index.min()
+
+class ReportDataset(DailyTotals):
+    """One user's logs for a report's date range, loaded once
+
+    load() runs a fixed set of queries whatever the length of the range: the
+    workout and nutrition logs (reading through to archived months), the
+    archive rollups and the lifetime summaries. The logs are kept as
+    columnar frames and every PDF table and Excel sheet is derived from them,
+    so the two formats always agree and no section queries on its own.
+    """
+
+    def __init__(self, user, start_date: date, end_date: date, workouts: pd.DataFrame,
+                 nutrition: pd.DataFrame, workout_summary=None, nutrition_summary=None):
+        self.user = user
+        self.start_date = start_date
+        self.end_date = end_date
+        self.workouts = workouts
+        self.nutrition = nutrition
+        self.workout_summary = workout_summary
+        self.nutrition_summary = nutrition_summary
+        self.daily = self.build_daily()
+        self.workout_types = workouts['workout_type'].dropna().value_counts()
+
+    @classmethod
+    def load(cls, user, start_date: date, end_date: date) -> ReportDataset:
+        """Query everything a report needs for user between the two dates"""
+        archiver = get_archiver()
+        rollups = archiver.get_rollups(user.id, start_date, end_date) if archiver else []
+
+        workouts = read_log_range(user.id, 'workout_logs', start_date, end_date, rollups)
+        nutrition = read_log_range(user.id, 'nutrition_logs', start_date, end_date, rollups)
+        workout_summary, nutrition_summary = get_user_summary(user.id)
+        return cls(user, start_date, end_date, prepare_frame(workouts, WORKOUT_COLUMNS),
+                   prepare_frame(nutrition, NUTRITION_COLUMNS), workout_summary, nutrition_summary)
+
+    @classmethod
+    def load_many(cls, users: list, start_date: date, end_date: date) -> dict:
+        """load() for several users with the same fixed set of queries,
+        keyed by user id"""
+        user_ids = [user.id for user in users]
+        archiver = get_archiver()
+        rollups = archiver.get_user_rollups(user_ids, start_date, end_date) if archiver else {}
+
+        workouts = read_log_ranges(user_ids, 'workout_logs', start_date, end_date, rollups)
+        nutrition = read_log_ranges(user_ids, 'nutrition_logs', start_date, end_date, rollups)
+        summaries = get_user_summaries(user_ids)
+        return {
+            user.id: cls(user, start_date, end_date, prepare_frame(workouts[user.id], WORKOUT_COLUMNS),
+                         prepare_frame(nutrition[user.id], NUTRITION_COLUMNS), *summaries[user.id])
+            for user in users
+        }
+
+    def detach(self) -> ReportDataset:
+        """A copy holding plain values instead of ORM rows, so it can be
+        pickled to another process and rendered there without a session"""
+        dataset = copy.copy(self)
+        dataset.user = get_row_values(self.user)
+        dataset.workout_summary = get_row_values(self.workout_summary)
+        dataset.nutrition_summary = get_row_values(self.nutrition_summary)
+        return dataset
+
+    def build_daily(self) -> pd.DataFrame:
+        """Per-day totals over the whole range, including days with no logs"""
+        import pandas as pd
+
+        workouts = self.workouts.assign(day=pd.to_datetime(self.workouts['workout_date']))
+        nutrition = self.nutrition.assign(day=pd.to_datetime(self.nutrition['log_date']))
+
+        burned = workouts.groupby('day').agg(
+            calories_burned=('calories_burned', 'sum'),
+            workout_hours=('session_duration', 'sum'),
+            workouts=('workout_date', 'size')
+        )
+        consumed = nutrition.groupby('day').agg(
+            calories_consumed=('calories', 'sum'),
+            carbs=('carbs', 'sum'),
+            proteins=('proteins', 'sum'),
+            fats=('fats', 'sum'),
+            water_intake=('water_intake', 'sum'),
+            nutrition_logs=('log_date', 'size')
+        )
+        return build_daily(self.start_date, self.end_date, burned, consumed)
+
+class ReportTotals(DailyTotals):
+    """Per-day totals of logs added one row at a time
+
+    For reports that stream their logs instead of loading them: only a few
+    sums per day of the range are kept, so memory grows with the length of
+    the range but not with the number of logs. Call close() after the last
+    row to build daily and workout_types as ReportDataset has them.
+    """
+
+    def __init__(self, start_date: date, end_date: date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.burned = {}  # day -> [calories burned, workout hours, workouts]
+        self.consumed = {}  # day -> [calories, carbs, proteins, fats, water, nutrition logs]
+        self.types = {}  # workout type -> workouts
+        self.daily = None
+        self.workout_types = None
+
+    def add_workout(self, row: tuple):
+        """Add a row of WORKOUT_COLUMNS"""
+        workout_date, workout_type, session_duration, calories_burned = row[:4]
+        if is_missing(workout_date):
+            return
+        totals = self.burned.setdefault(workout_date, [0.0, 0.0, 0])
+        totals[0] += get_number(calories_burned)
+        totals[1] += get_number(session_duration)
+        totals[2] += 1
+        if not is_missing(workout_type):
+            self.types[workout_type] = self.types.get(workout_type, 0) + 1
+
+    def add_nutrition(self, row: tuple):
+        """Add a row of NUTRITION_COLUMNS"""
+        log_date, _, calories, carbs, proteins, fats, water_intake = row
+        if is_missing(log_date):
+            return
+        totals = self.consumed.setdefault(log_date, [0.0, 0.0, 0.0, 0.0, 0.0, 0])
+        for index, value in enumerate((calories, carbs, proteins, fats, water_intake)):
+            totals[index] += get_number(value)
+        totals[5] += 1
+
+    def close(self) -> ReportTotals:
+        """Build the daily frame and workout type counts from the totals"""
+        import pandas as pd
+
+        def by_day(totals, columns):
+            frame = pd.DataFrame(list(totals.values()), index=pd.to_datetime(list(totals)),
+                                 columns=columns, dtype=float)
+            return frame.groupby(level=0).sum()  # the same day may come as a date and a timestamp
+
+        burned = by_day(self.burned, ['calories_burned', 'workout_hours', 'workouts'])
+        consumed = by_day(self.consumed, ['calories_consumed', 'carbs', 'proteins', 'fats',
+                                          'water_intake', 'nutrition_logs'])
+        self.daily = build_daily(self.start_date, self.end_date, burned, consumed)
+        self.workout_types = pd.Series(self.types, dtype=int).sort_values(ascending=False, kind='stable')
+        return self
+
+def build_daily(start_date: date, end_date: date, burned: pd.DataFrame, consumed: pd.DataFrame) -> pd.DataFrame:
+    """Join per-day workout and nutrition totals over every day of the range,
+    with each day's caloric balance and trailing-week consistency"""
+    import pandas as pd
+
+    days = pd.date_range(start_date, end_date, freq='D')
+    daily = burned.join(consumed, how='outer').reindex(days).fillna(0)
+    daily.index.name = 'date'
+
+    daily['caloric_balance'] = daily['calories_consumed'] - daily['calories_burned']
+    # Consistency over the trailing week, scored against TARGET_WORKOUT_DAYS
+    active_days = (daily['workouts'] > 0).astype(int).rolling(7, min_periods=1).sum()
+    daily['consistency_score'] = (active_days / TARGET_WORKOUT_DAYS * 100).clip(upper=100).astype(int)
+    return daily
+
+def iter_report_logs(user_id: int, table: str, start_date: date, end_date: date, batch_size: int = None):
+    """Yield a user's workout or nutrition logs in a date range as tuples of
+    its REPORT_COLUMNS
+
+    Archived months come first, one file at a time as exports read them,
+    then the hot rows by date from a server-side cursor (yield_per), so no
+    more than a batch of rows is held at once.
+    """
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    columns = REPORT_COLUMNS[table]
+    positions = [get_export_columns(table).index(column) for column in columns]
+    for batch in iter_archived_batches(table, start_date, end_date, user_id, batch_size):
+        for row in batch:
+            yield tuple(row[position] for position in positions)
+
+    model, date_column = ARCHIVED_TABLES[table]
+    day = getattr(model, date_column)
+    statement = (
+        select(*(getattr(model, column) for column in columns))
+        .where(model.user_id == user_id, day >= start_date, day <= end_date)
+        .order_by(day, model.id)
+    )
+    for row in db.session.execute(statement.execution_options(yield_per=batch_size)):
+        yield tuple(row)
+
+def is_missing(value) -> bool:
+    return value is None or value != value  # NaN
+
+def get_number(value) -> float:
+    """A log value as a float, 0 for nulls"""
+    return 0.0 if is_missing(value) else float(value)
+
+def get_row_values(row):
+    """A row's column values as a namespace, or None"""
+    if row is None:
+        return None
+    return SimpleNamespace(**{attr.key: getattr(row, attr.key) for attr in inspect(row).mapper.column_attrs})
+
+def prepare_frame(frame: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """Keep the report columns, with floats for numbers and NaN for nulls
+
+    Hot rows come back with nullable dtypes and archived rows as objects, so
+    normalising here lets the rest of the report use plain vectorised maths.
+    """
+    import pandas as pd
+
+    frame = frame.reindex(columns=columns)
+    for column in columns:
+        if column in NUMERIC_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').astype(float)
+        else:
+            frame[column] = frame[column].astype(object).where(frame[column].notna(), None)
+    return frame.reset_index(drop=True)
@@ -4,77 +4,148 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.graphics.shapes import Drawing, Rect
+from reportlab.graphics.shapes import Drawing, Rect, String
 from reportlab.graphics.charts.linecharts import HorizontalLineChart
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
 from reportlab.graphics import renderPDF
 import openpyxl
 from openpyxl.chart import LineChart, BarChart, PieChart, Reference
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
 from datetime import datetime, date, timedelta
+from functools import lru_cache
+from types import MappingProxyType
 import os
 import json
+import tempfile
 from io import BytesIO
 import base64
+from report_data import ReportDataset, ReportTotals, REPORT_COLUMNS, iter_report_logs
+
+# Header colour, header text colour and body colour of each PDF table
+TABLE_COLORS = {
+    'user_summary': (colors.HexColor('#2c3e50'), colors.whitesmoke, colors.beige),
+    'workout_analysis': (colors.HexColor('#28a745'), colors.whitesmoke, colors.lightgreen),
+    'nutrition_analysis': (colors.HexColor('#17a2b8'), colors.whitesmoke, colors.lightblue),
+    'health_metrics': (colors.HexColor('#ffc107'), colors.black, colors.lightyellow)
+}
+
+CHART_COLORS = [colors.HexColor('#28a745'), colors.HexColor('#17a2b8'), colors.HexColor('#ffc107')]
+
+# Longer ranges are charted by week so the PDF line chart stays readable
+MAX_DAILY_POINTS = 62
+
+# Bytes a render buffer holds in memory before spilling to a temporary file
+SPOOL_SIZE = 16 * 1024 * 1024
+
+@lru_cache(maxsize=None)
+def get_report_styles():
+    """Paragraph styles for PDF reports, built once per process
+
+    Returned as a read-only mapping shared by every report; don't modify
+    the styles in it.
+    """
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#2c3e50')
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        spaceBefore=20,
+        textColor=colors.HexColor('#34495e')
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ReportBody',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceAfter=6,
+        alignment=TA_LEFT
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='MetricValue',
+        parent=styles['Normal'],
+        fontSize=14,
+        spaceAfter=6,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#2c3e50')
+    ))
+    return MappingProxyType({name: styles[name] for name in styles.byName})
+
+@lru_cache(maxsize=None)
+def get_table_style(name):
+    """The TableStyle of one of the TABLE_COLORS tables, built once per process"""
+    header, header_text, body = TABLE_COLORS[name]
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header),
+        ('TEXTCOLOR', (0, 0), (-1, 0), header_text),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), body),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
 
 class ReportGenerator:
     """Generate PDF and Excel reports for lifestyle analytics"""
     
-    def __init__(self, user, start_date, end_date):
+    def __init__(self, user, start_date, end_date, dataset=None, spool_size=SPOOL_SIZE):
         self.user = user
         self.start_date = start_date
         self.end_date = end_date
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
-    
-    def setup_custom_styles(self):
-        """Setup custom paragraph styles for reports"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#2c3e50')
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.HexColor('#34495e')
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='BodyText',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6,
-            alignment=TA_LEFT
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='MetricValue',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            spaceAfter=6,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#2c3e50')
-        ))
+        self._dataset = dataset
+        self.spool_size = spool_size
+        self.styles = get_report_styles()
+
+    @property
+    def dataset(self):
+        """The report's data, queried once and shared by every section"""
+        if self._dataset is None:
+            self._dataset = ReportDataset.load(self.user, self.start_date, self.end_date)
+        return self._dataset
+
+    def render(self, report_format):
+        """Render the report into a buffer rewound for reading
+
+        The buffer stays in memory up to spool_size bytes and spills to a
+        temporary file beyond, so it can be handed to a response or an email
+        attachment without a round trip through the filesystem.
+        """
+        buffer = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            if report_format == 'excel':
+                self.generate_excel_report(buffer)
+            else:
+                self.generate_pdf_report(buffer)
+        except Exception:
+            buffer.close()
+            raise
+        buffer.seek(0)
+        return buffer
 
     def generate_pdf_report(self, file_path):
-        """Generate PDF report"""
+        """Generate PDF report to a path or a binary file object"""
         doc = SimpleDocTemplate(file_path, pagesize=A4)
         story = []
         
         # Title
         story.append(Paragraph("Lifestyle Analytics Report", self.styles['CustomTitle']))
-        story.append(Paragraph(f"Generated for: {self.user.username}", self.styles['BodyText']))
-        story.append(Paragraph(f"Date Range: {self.start_date} to {self.end_date}", self.styles['BodyText']))
+        story.append(Paragraph(f"Generated for: {self.user.username}", self.styles['ReportBody']))
+        story.append(Paragraph(f"Date Range: {self.start_date} to {self.end_date}", self.styles['ReportBody']))
         story.append(Spacer(1, 20))
         
         # User Summary
@@ -95,6 +166,14 @@ class ReportGenerator:
         story.append(self.create_nutrition_analysis_table(nutrition_data))
         story.append(Spacer(1, 20))
         
+        # Trends
+        story.append(Paragraph("Trends", self.styles['SectionHeader']))
+        story.append(self.create_calorie_chart())
+        macro_chart = self.create_macro_chart()
+        if macro_chart:
+            story.append(macro_chart)
+        story.append(Spacer(1, 20))
+        
         # Health Metrics
         story.append(Paragraph("Health Metrics", self.styles['SectionHeader']))
         health_data = self.get_health_metrics_data()
@@ -105,56 +184,111 @@ class ReportGenerator:
         story.append(Paragraph("Personalized Recommendations", self.styles['SectionHeader']))
         recommendations = self.get_recommendations()
         for rec in recommendations:
-            story.append(Paragraph(f"• {rec}", self.styles['BodyText']))
+            story.append(Paragraph(f"• {rec}", self.styles['ReportBody']))
         
         story.append(Spacer(1, 20))
         story.append(Paragraph(f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 
-                              self.styles['BodyText']))
+                              self.styles['ReportBody']))
         
         doc.build(story)
         return file_path
 
     def generate_excel_report(self, file_path):
-        """Generate Excel report with multiple sheets"""
-        wb = openpyxl.Workbook()
-        
-        # Remove default sheet
-        wb.remove(wb.active)
+        """Generate Excel report with multiple sheets to a path or a binary
+        file object
+
+        The workbook is write-only and the log sheets are streamed. The logs
+        are read twice: once to total them and track the widest cell of each
+        column, since a write-only sheet needs its widths before its first
+        row, and once to write them. Unless the report was given a dataset,
+        both passes read from a server-side cursor, so memory grows with the
+        days in the range but not with the number of logs.
+        """
+        wb = openpyxl.Workbook(write_only=True)
+        totals, widths = self.total_logs()
         
         # User Profile Sheet
         self.create_user_profile_sheet(wb)
         
         # Workout Data Sheet
-        self.create_workout_data_sheet(wb)
+        self.create_workout_data_sheet(wb, widths['workout_logs'])
         
         # Nutrition Data Sheet
-        self.create_nutrition_data_sheet(wb)
+        self.create_nutrition_data_sheet(wb, widths['nutrition_logs'])
         
         # Daily Stats Sheet
-        self.create_daily_stats_sheet(wb)
+        daily_ws = self.create_daily_stats_sheet(wb, totals)
         
         # Summary Sheet
-        self.create_summary_sheet(wb)
+        self.create_summary_sheet(wb, totals)
         
         # Charts Sheet
-        self.create_charts_sheet(wb)
+        self.create_charts_sheet(wb, daily_ws, totals)
         
         wb.save(file_path)
         return file_path
 
+    def iter_logs(self, table):
+        """Yield the user's workout or nutrition logs in the range as tuples
+        of REPORT_COLUMNS, from the dataset if one was given and otherwise
+        streamed from the database"""
+        if self._dataset is not None:
+            frame = self._dataset.workouts if table == 'workout_logs' else self._dataset.nutrition
+            return frame.itertuples(index=False, name=None)
+        return iter_report_logs(self.user.id, table, self.start_date, self.end_date)
+
+    def iter_log_cells(self, table):
+        """Yield the logs of a table as rows of sheet cells"""
+        for row in self.iter_logs(table):
+            yield get_log_cells(table, row)
+
+    def total_logs(self):
+        """First pass over the logs: their per-day totals, and the running
+        widest cell of each column of the workout and nutrition sheets"""
+        totals = ReportTotals(self.start_date, self.end_date)
+        widths = {}
+        for table, add in (('workout_logs', totals.add_workout), ('nutrition_logs', totals.add_nutrition)):
+            widths[table] = [0] * len(REPORT_COLUMNS[table])
+            for row in self.iter_logs(table):
+                add(row)
+                track_widths(widths[table], get_log_cells(table, row))
+        return totals.close(), widths
+
+    def write_table_sheet(self, wb, title, headers, rows, header_color, max_width, widths=None):
+        """Write a header and rows into a new write-only sheet
+
+        Write-only sheets need their column widths before the first row, so
+        a stream of rows comes with the widest cell of each column, tracked
+        on an earlier pass; short lists of rows are measured here.
+        """
+        if widths is None:
+            rows = list(rows)
+            widths = [0] * len(headers)
+            for row in rows:
+                track_widths(widths, row)
+
+        ws = wb.create_sheet(title)
+        for column, (header, width) in enumerate(zip(headers, widths), 1):
+            width = max(len(str(header)), width)
+            ws.column_dimensions[get_column_letter(column)].width = min(width + 2, max_width)
+
+        font = Font(bold=True)
+        fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
+        alignment = Alignment(horizontal="center")
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font, cell.fill, cell.alignment = font, fill, alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for row in rows:
+            ws.append(row)
+        return ws
+
     def create_user_profile_sheet(self, wb):
         """Create user profile sheet"""
-        ws = wb.create_sheet("User Profile")
-        
-        # Headers
         headers = ["Metric", "Value", "Category", "Target Range"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # User data
         user_data = [
             ["Age", self.user.age or "N/A", "Demographics", "18-65"],
             ["Gender", self.user.gender or "N/A", "Demographics", "Male/Female/Other"],
@@ -164,165 +298,148 @@ class ReportGenerator:
             ["Body Fat %", f"{self.user.fat_percentage:.1f}%" if self.user.fat_percentage else "N/A", "Health", "10-25%"],
             ["Experience Level", self.get_experience_level_text(), "Fitness", "Beginner-Advanced"]
         ]
-        
-        for row, data in enumerate(user_data, 2):
-            for col, value in enumerate(data, 1):
-                ws.cell(row=row, column=col, value=value)
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-    def create_workout_data_sheet(self, wb):
-        """Create workout data sheet"""
-        ws = wb.create_sheet("Workout Data")
-        
-        # Headers
+        return self.write_table_sheet(wb, "User Profile", headers, user_data, "366092", 50)
+
+    def create_workout_data_sheet(self, wb, widths):
+        """Create workout data sheet, streaming the logs"""
         headers = ["Date", "Type", "Duration (min)", "Calories Burned", "Max BPM", "Avg BPM", "Resting BPM"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="28a745", end_color="28a745", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Sample workout data (in real implementation, fetch from database)
-        workout_data = self.get_sample_workout_data()
-        
-        for row, data in enumerate(workout_data, 2):
-            for col, value in enumerate(data, 1):
-                ws.cell(row=row, column=col, value=value)
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 30)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-    def create_nutrition_data_sheet(self, wb):
-        """Create nutrition data sheet"""
-        ws = wb.create_sheet("Nutrition Data")
-        
-        # Headers
+        return self.write_table_sheet(wb, "Workout Data", headers, self.iter_log_cells('workout_logs'),
+                                      "28a745", 30, widths)
+
+    def create_nutrition_data_sheet(self, wb, widths):
+        """Create nutrition data sheet, streaming the logs"""
         headers = ["Date", "Meals", "Calories", "Carbs (g)", "Proteins (g)", "Fats (g)", "Water (L)"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="17a2b8", end_color="17a2b8", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Sample nutrition data
-        nutrition_data = self.get_sample_nutrition_data()
-        
-        for row, data in enumerate(nutrition_data, 2):
-            for col, value in enumerate(data, 1):
-                ws.cell(row=row, column=col, value=value)
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 20)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-    def create_daily_stats_sheet(self, wb):
-        """Create daily stats sheet"""
-        ws = wb.create_sheet("Daily Stats")
-        
-        # Headers
+        return self.write_table_sheet(wb, "Nutrition Data", headers, self.iter_log_cells('nutrition_logs'),
+                                      "17a2b8", 20, widths)
+
+    def create_daily_stats_sheet(self, wb, totals):
+        """Create daily stats sheet, one row per day of the range"""
         headers = ["Date", "Calories Burned", "Calories Consumed", "Caloric Balance", "Workout Duration", "Water Intake", "Consistency Score"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="ffc107", end_color="ffc107", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Sample daily stats
-        daily_stats = self.get_sample_daily_stats()
-        
-        for row, data in enumerate(daily_stats, 2):
-            for col, value in enumerate(data, 1):
-                ws.cell(row=row, column=col, value=value)
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 20)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-    def create_summary_sheet(self, wb):
+        daily = totals.daily
+        rows = zip(
+            daily.index.date,
+            daily['calories_burned'],
+            daily['calories_consumed'],
+            daily['caloric_balance'],
+            (daily['workout_hours'] * 60).round(),
+            daily['water_intake'].round(2),
+            daily['consistency_score']
+        )
+        rows = ([cell_value(value) for value in row] for row in rows)
+        return self.write_table_sheet(wb, "Daily Stats", headers, rows, "ffc107", 20)
+
+    def create_summary_sheet(self, wb, totals):
         """Create summary sheet with key metrics"""
         ws = wb.create_sheet("Summary")
         
         # Title
-        ws.merge_cells('A1:D1')
-        ws['A1'] = f"Lifestyle Analytics Summary - {self.user.username}"
-        ws['A1'].font = Font(size=16, bold=True)
-        ws['A1'].alignment = Alignment(horizontal="center")
+        ws.merged_cells.add('A1:D1')
+        title = WriteOnlyCell(ws, value=f"Lifestyle Analytics Summary - {self.user.username}")
+        title.font = Font(size=16, bold=True)
+        title.alignment = Alignment(horizontal="center")
+        ws.append([title])
+        ws.append([])
         
         # Summary data
-        summary_data = self.get_summary_data()
+        summary_data = self.get_summary_data(totals)
         
-        row = 3
         for category, metrics in summary_data.items():
             # Category header
-            ws.cell(row=row, column=1, value=category).font = Font(bold=True, size=12)
-            row += 1
+            header = WriteOnlyCell(ws, value=category)
+            header.font = Font(bold=True, size=12)
+            ws.append([header])
             
             # Metrics
             for metric, value in metrics.items():
-                ws.cell(row=row, column=1, value=metric)
-                ws.cell(row=row, column=2, value=value)
-                row += 1
+                ws.append([metric, value])
             
-            row += 1  # Space between categories
+            ws.append([])  # Space between categories
+        return ws
+
+    def create_charts_sheet(self, wb, daily_ws, totals):
+        """Create charts sheet with native Excel charts
 
-    def create_charts_sheet(self, wb):
-        """Create charts sheet with visualizations"""
+        The charts reference cell ranges in the Daily Stats sheet and in two
+        small tables on this sheet. Excel draws them when the file is opened,
+        so nothing is rasterized here and the workbook stays small.
+        """
         ws = wb.create_sheet("Charts")
-        
-        # Add some sample charts (in real implementation, create actual charts)
-        ws['A1'] = "Charts and Visualizations"
-        ws['A1'].font = Font(size=16, bold=True)
-        
-        # This would contain actual chart creation code
-        # For now, just add placeholder text
-        ws['A3'] = "BMI Trend Chart"
-        ws['A4'] = "Calorie Balance Chart"
-        ws['A5'] = "Macro Distribution Chart"
-        ws['A6'] = "Workout Type Distribution Chart"
+        ws.column_dimensions['A'].width = 16
+        days = len(totals.daily)
+        
+        title = WriteOnlyCell(ws, value="Charts and Visualizations")
+        title.font = Font(size=16, bold=True)
+        ws.append([title])
+        ws.append([])
+        
+        # Source tables for the macro and workout type charts
+        macros = self.get_macro_totals(totals)
+        workout_types = self.get_workout_type_counts(totals)
+        ws.append(self.header_cells(ws, ["Macro", "Grams"]))
+        for name, grams in macros:
+            ws.append([name, grams])
+        ws.append([])
+        types_header_row = len(macros) + 5
+        ws.append(self.header_cells(ws, ["Workout Type", "Workouts"]))
+        for name, count in workout_types:
+            ws.append([name, count])
+        
+        # Calorie balance: burned, consumed and balance per day
+        chart = LineChart()
+        chart.title = "Calorie Balance"
+        chart.y_axis.title = "Calories"
+        chart.x_axis.number_format = 'yyyy-mm-dd'
+        chart.add_data(Reference(daily_ws, min_col=2, max_col=4, min_row=1, max_row=days + 1), titles_from_data=True)
+        chart.set_categories(Reference(daily_ws, min_col=1, min_row=2, max_row=days + 1))
+        chart.width, chart.height = 24, 8
+        ws.add_chart(chart, "D1")
+        
+        # Consistency trend: the trailing-week score per day
+        chart = LineChart()
+        chart.title = "Consistency Trend"
+        chart.y_axis.title = "Score"
+        chart.y_axis.scaling.min, chart.y_axis.scaling.max = 0, 100
+        chart.add_data(Reference(daily_ws, min_col=7, min_row=1, max_row=days + 1), titles_from_data=True)
+        chart.set_categories(Reference(daily_ws, min_col=1, min_row=2, max_row=days + 1))
+        chart.legend = None
+        chart.width, chart.height = 24, 8
+        ws.add_chart(chart, "D18")
+        
+        # Macro distribution
+        chart = PieChart()
+        chart.title = "Macro Distribution"
+        chart.add_data(Reference(ws, min_col=2, min_row=3, max_row=3 + len(macros)), titles_from_data=True)
+        chart.set_categories(Reference(ws, min_col=1, min_row=4, max_row=3 + len(macros)))
+        ws.add_chart(chart, "D35")
+        
+        # Workout type distribution
+        if workout_types:
+            chart = BarChart()
+            chart.title = "Workout Type Distribution"
+            chart.y_axis.title = "Workouts"
+            chart.add_data(Reference(ws, min_col=2, min_row=types_header_row,
+                                     max_row=types_header_row + len(workout_types)), titles_from_data=True)
+            chart.set_categories(Reference(ws, min_col=1, min_row=types_header_row + 1,
+                                           max_row=types_header_row + len(workout_types)))
+            chart.legend = None
+            ws.add_chart(chart, "N35")
+        return ws
+
+    @staticmethod
+    def header_cells(ws, headers):
+        """Bold cells for a table header on a write-only sheet"""
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        return cells
 
     # Helper methods for data retrieval
     def get_user_summary_data(self):
         """Get user summary data for PDF"""
+        workout_summary = self.dataset.workout_summary
+        nutrition_summary = self.dataset.nutrition_summary
         return {
             "Username": self.user.username,
             "Email": self.user.email,
@@ -331,27 +448,53 @@ class ReportGenerator:
             "Weight": f"{self.user.weight} kg" if self.user.weight else "N/A",
             "Height": f"{self.user.height} m" if self.user.height else "N/A",
             "BMI": f"{self.user.bmi:.1f}" if self.user.bmi else "N/A",
-            "Body Fat %": f"{self.user.fat_percentage:.1f}%" if self.user.fat_percentage else "N/A"
+            "Body Fat %": f"{self.user.fat_percentage:.1f}%" if self.user.fat_percentage else "N/A",
+            "Lifetime Workouts": workout_summary.total_workouts if workout_summary else "N/A",
+            "Lifetime Nutrition Logs": nutrition_summary.total_nutrition_logs if nutrition_summary else "N/A"
         }
 
-    def get_workout_analysis_data(self):
-        """Get workout analysis data"""
+    def get_workout_analysis_data(self, totals=None):
+        """Get workout analysis data from the dataset or streamed totals"""
+        totals = self.dataset if totals is None else totals
+        daily = totals.daily
+        count = int(daily['workouts'].sum())
+        if not count:
+            return {
+                "Total Workouts": "0",
+                "Total Calories Burned": "0",
+                "Average Duration": "N/A",
+                "Most Common Type": "N/A",
+                "Consistency Score": "0%"
+            }
+
         return {
-            "Total Workouts": "15",
-            "Total Calories Burned": "3,500",
-            "Average Duration": "45 minutes",
-            "Most Common Type": "Cardio",
-            "Consistency Score": "85%"
+            "Total Workouts": f"{count}",
+            "Total Calories Burned": f"{int(daily['calories_burned'].sum()):,}",
+            "Average Duration": f"{daily['workout_hours'].sum() / count * 60:.0f} minutes",
+            "Most Common Type": totals.get_most_common_type() or "N/A",
+            "Consistency Score": f"{totals.get_consistency_score()}%"
         }
 
-    def get_nutrition_analysis_data(self):
-        """Get nutrition analysis data"""
+    def get_nutrition_analysis_data(self, totals=None):
+        """Get nutrition analysis data, averaged over days with logs"""
+        totals = self.dataset if totals is None else totals
+        days = totals.daily[totals.daily['nutrition_logs'] > 0]
+        if days.empty:
+            return {
+                "Average Daily Calories": "N/A",
+                "Average Carbs": "N/A",
+                "Average Proteins": "N/A",
+                "Average Fats": "N/A",
+                "Average Water Intake": "N/A"
+            }
+
+        averages = days[['calories_consumed', 'carbs', 'proteins', 'fats', 'water_intake']].mean()
         return {
-            "Average Daily Calories": "2,100",
-            "Average Carbs": "250g",
-            "Average Proteins": "120g",
-            "Average Fats": "80g",
-            "Average Water Intake": "2.2L"
+            "Average Daily Calories": f"{averages['calories_consumed']:,.0f}",
+            "Average Carbs": f"{averages['carbs']:.0f}g",
+            "Average Proteins": f"{averages['proteins']:.0f}g",
+            "Average Fats": f"{averages['fats']:.0f}g",
+            "Average Water Intake": f"{averages['water_intake']:.1f}L"
         }
 
     def get_health_metrics_data(self):
@@ -403,61 +546,18 @@ class ReportGenerator:
         else:
             return "Obese"
 
-    def get_sample_workout_data(self):
-        """Get sample workout data for Excel"""
-        data = []
-        current_date = self.start_date
-        while current_date <= self.end_date:
-            if current_date.weekday() < 5:  # Weekdays
-                data.append([
-                    current_date.strftime('%Y-%m-%d'),
-                    'Cardio',
-                    45,
-                    350,
-                    160,
-                    140,
-                    70
-                ])
-            current_date += timedelta(days=1)
-        return data
-
-    def get_sample_nutrition_data(self):
-        """Get sample nutrition data for Excel"""
-        data = []
-        current_date = self.start_date
-        while current_date <= self.end_date:
-            data.append([
-                current_date.strftime('%Y-%m-%d'),
-                3,
-                2100,
-                250,
-                120,
-                80,
-                2.2
-            ])
-            current_date += timedelta(days=1)
-        return data
-
-    def get_sample_daily_stats(self):
-        """Get sample daily stats for Excel"""
-        data = []
-        current_date = self.start_date
-        while current_date <= self.end_date:
-            calories_burned = 300 + (current_date.weekday() * 50)
-            calories_consumed = 2100
-            data.append([
-                current_date.strftime('%Y-%m-%d'),
-                calories_burned,
-                calories_consumed,
-                calories_consumed - calories_burned,
-                45,
-                2.2,
-                85
-            ])
-            current_date += timedelta(days=1)
-        return data
-
-    def get_summary_data(self):
+    def get_macro_totals(self, totals=None):
+        """Get total grams of each macro over the range"""
+        daily = (self.dataset if totals is None else totals).daily
+        return [(name, cell_value(daily[column].sum()) or 0)
+                for name, column in (("Carbs", 'carbs'), ("Proteins", 'proteins'), ("Fats", 'fats'))]
+
+    def get_workout_type_counts(self, totals=None):
+        """Get the number of workouts of each type, most common first"""
+        counts = (self.dataset if totals is None else totals).workout_types
+        return [(name, int(count)) for name, count in counts.items()]
+
+    def get_summary_data(self, totals=None):
         """Get summary data for Excel"""
         return {
             "User Profile": {
@@ -472,93 +572,110 @@ class ReportGenerator:
                 "BMI": f"{self.user.bmi:.1f}" if self.user.bmi else "N/A",
                 "Body Fat %": f"{self.user.fat_percentage:.1f}%" if self.user.fat_percentage else "N/A"
             },
-            "Activity Summary": {
-                "Total Workouts": "15",
-                "Total Calories Burned": "3,500",
-                "Average Duration": "45 minutes",
-                "Consistency Score": "85%"
-            },
-            "Nutrition Summary": {
-                "Average Daily Calories": "2,100",
-                "Average Carbs": "250g",
-                "Average Proteins": "120g",
-                "Average Fats": "80g"
-            }
+            "Activity Summary": self.get_workout_analysis_data(totals),
+            "Nutrition Summary": self.get_nutrition_analysis_data(totals)
         }
 
     # Table creation methods for PDF
-    def create_user_summary_table(self, data):
-        """Create user summary table for PDF"""
+    def create_metric_table(self, data, style_name):
+        """Create a two-column metric table for PDF with a shared style"""
         table_data = [["Metric", "Value"]]
         for key, value in data.items():
             table_data.append([key, str(value)])
         
         table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table.setStyle(get_table_style(style_name))
         return table
 
+    def create_user_summary_table(self, data):
+        """Create user summary table for PDF"""
+        return self.create_metric_table(data, 'user_summary')
+
     def create_workout_analysis_table(self, data):
         """Create workout analysis table for PDF"""
-        table_data = [["Metric", "Value"]]
-        for key, value in data.items():
-            table_data.append([key, str(value)])
-        
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#28a745')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        return table
+        return self.create_metric_table(data, 'workout_analysis')
 
     def create_nutrition_analysis_table(self, data):
         """Create nutrition analysis table for PDF"""
-        table_data = [["Metric", "Value"]]
-        for key, value in data.items():
-            table_data.append([key, str(value)])
-        
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#17a2b8')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        return table
+        return self.create_metric_table(data, 'nutrition_analysis')
 
     def create_health_metrics_table(self, data):
         """Create health metrics table for PDF"""
-        table_data = [["Metric", "Value"]]
-        for key, value in data.items():
-            table_data.append([key, str(value)])
-        
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ffc107')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        return table
\ No newline at end of file
+        return self.create_metric_table(data, 'health_metrics')
+
+    # Vector charts for PDF
+    def create_calorie_chart(self):
+        """Line chart of calories burned and consumed, drawn as PDF vectors"""
+        series = self.dataset.daily[['calories_burned', 'calories_consumed']]
+        label_format = '%m-%d'
+        if len(series) > MAX_DAILY_POINTS:
+            series = series.resample('W').mean()
+            label_format = '%Y-%m-%d'
+        
+        drawing = Drawing(460, 210)
+        chart = HorizontalLineChart()
+        chart.x, chart.y, chart.width, chart.height = 45, 40, 400, 140
+        chart.data = [tuple(series['calories_burned']), tuple(series['calories_consumed'])]
+        step = max(1, len(series) // 8)
+        chart.categoryAxis.categoryNames = [
+            day.strftime(label_format) if position % step == 0 else ''
+            for position, day in enumerate(series.index)
+        ]
+        chart.categoryAxis.labels.fontSize = 7
+        chart.categoryAxis.labels.angle = 30
+        chart.categoryAxis.labels.boxAnchor = 'ne'
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.labels.fontSize = 7
+        for line, color in zip(chart.lines, CHART_COLORS):
+            line.strokeColor = color
+            line.strokeWidth = 1.5
+        drawing.add(chart)
+        
+        legend = Legend()
+        legend.x, legend.y = 60, 200
+        legend.fontSize = 8
+        legend.columnMaximum = 1
+        legend.colorNamePairs = [(CHART_COLORS[0], 'Calories burned'), (CHART_COLORS[1], 'Calories consumed')]
+        drawing.add(legend)
+        drawing.add(String(445, 200, 'Weekly average' if label_format == '%Y-%m-%d' else 'Daily total',
+                           fontSize=8, textAnchor='end'))
+        return drawing
+
+    def create_macro_chart(self):
+        """Pie chart of total macros, or None when nothing was logged"""
+        macros = [(name, grams) for name, grams in self.get_macro_totals() if grams]
+        if not macros:
+            return None
+        
+        drawing = Drawing(460, 170)
+        pie = Pie()
+        pie.x, pie.y, pie.width, pie.height = 150, 15, 140, 140
+        pie.data = [grams for _, grams in macros]
+        pie.labels = [f"{name} {grams:,}g" for name, grams in macros]
+        pie.slices.strokeColor = colors.white
+        pie.slices.fontSize = 8
+        for index, color in enumerate(CHART_COLORS[:len(macros)]):
+            pie.slices[index].fillColor = color
+        drawing.add(pie)
+        return drawing
+
+def cell_value(value):
+    """A frame value as a spreadsheet cell: None for gaps, ints for whole numbers"""
+    if value is None or value != value:  # NaN
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return getattr(value, 'item', lambda: value)()
+
+def get_log_cells(table, row):
+    """A row of REPORT_COLUMNS as sheet cells, with workout durations in minutes"""
+    cells = [cell_value(value) for value in row]
+    if table == 'workout_logs' and cells[2] is not None:
+        cells[2] = round(cells[2] * 60)
+    return cells
+
+def track_widths(widths, cells):
+    """Raise each column's running width to its cell in a row"""
+    for column, value in enumerate(cells):
+        if value is not None and len(str(value)) > widths[column]:
+            widths[column] = len(str(value))
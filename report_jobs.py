@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, User, Report
+from report_cache import get_generator
+
+class ReportQueueFull(Exception):
+    """Raised when too many reports are already rendering or waiting"""
+
+class ReportJobQueue:
+    """Render reports in the background on a bounded thread pool
+
+    generate_report only records a queued Report and hands its id to this
+    queue, so no request thread ever waits on ReportLab or openpyxl. Files
+    come from the ReportCache, so an unchanged report is not drawn twice. At most
+    REPORT_WORKERS reports render at once per process and REPORT_QUEUE_SIZE
+    wait; beyond that ReportQueueFull is raised. Rendering is mostly pure
+    Python and holds the GIL, so keep REPORT_WORKERS small next to the web
+    threads it shares the process with. Jobs only live in the process that
+    queued them, so a scheduled sweep recovers rows a recycled or crashed
+    worker left behind (recover_stale).
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.executor = None
+        self.pid = None
+        self.lock = threading.Lock()
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read report job settings and register the queue"""
+        self.app = app
+        self.workers = app.config['REPORT_WORKERS']
+        self.slots = threading.BoundedSemaphore(self.workers + app.config['REPORT_QUEUE_SIZE'])
+        self.stale_after = timedelta(minutes=app.config['REPORT_STALE_MINUTES'])
+        app.extensions['report_jobs'] = self
+
+    def submit(self, report_id):
+        """Queue a report for rendering and return its future"""
+        if not self.slots.acquire(blocking=False):
+            raise ReportQueueFull()
+        try:
+            future = self._get_executor().submit(self.render, report_id)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def render(self, report_id):
+        """Render one report, recording its progress and file on the row"""
+        with self.app.app_context():
+            write_queue = self.app.extensions['write_queue']
+            try:
+                report = db.session.get(Report, report_id)
+                user = db.session.get(User, report.user_id)
+                write_queue.submit(self._set_status, report_id, 'running')
+                storage_key = self.app.extensions['report_cache'].render(
+                    user, report.start_date, report.end_date, report.report_format, self.get_generator
+                )
+                write_queue.submit(self._set_status, report_id, 'ready',
+                                   storage_key=storage_key, completed_at=datetime.utcnow())
+            except Exception as e:
+                print(f"Error generating report {report_id}: {e}")
+                db.session.rollback()
+                write_queue.submit(self._set_status, report_id, 'failed', error=str(e)[:500])
+
+    def recover_stale(self, now=None):
+        """Requeue reports left queued and fail reports left running for
+        REPORT_STALE_MINUTES; returns how many were recovered
+
+        A queued report never started, so it is safe to render again. A
+        running one stopped mid-render, which may happen again, so it is
+        failed and the user can ask for it anew.
+        """
+        now = now or datetime.utcnow()
+        changed_at = func.coalesce(Report.status_changed_at, Report.created_at)
+        stale = Report.query.filter(
+            Report.status.in_(['queued', 'running']), changed_at < now - self.stale_after
+        ).order_by(Report.id).all()
+
+        recovered = 0
+        for report in stale:
+            if report.status == 'running':
+                report.status = 'failed'
+                report.error = 'Rendering was interrupted, please generate the report again'
+            else:
+                try:
+                    self.submit(report.id)
+                except ReportQueueFull:
+                    continue  # left for the next sweep
+            report.status_changed_at = now
+            recovered += 1
+        db.session.commit()
+        return recovered
+
+    get_generator = staticmethod(get_generator)
+
+    @staticmethod
+    def _set_status(report_id, status, error=None, completed_at=None, storage_key=None):
+        report = db.session.get(Report, report_id)
+        report.status = status
+        report.error = error
+        report.completed_at = completed_at
+        report.status_changed_at = datetime.utcnow()
+        if storage_key:
+            report.storage_key = storage_key
+        db.session.commit()
+
+    def _get_executor(self):
+        # Threads do not survive fork, so each worker builds its own pool.
+        if self.executor and self.pid == os.getpid():
+            return self.executor
+        with self.lock:
+            if not self.executor or self.pid != os.getpid():
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-renderer')
+                self.pid = os.getpid()
+        return self.executor
@@ -0,0 +1,174 @@
+import os
+import shutil
+import threading
+
+class LocalStorage:
+    """Reports stored as files in a folder
+
+    Fine for a single instance with a persistent disk. Reading a report
+    marks it as recently used, so eviction can go least recently used first.
+    """
+
+    evict_on_store = True  # listing a folder is cheap
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def get_path(self, key):
+        return os.path.join(self.folder, key)
+
+    def save(self, key, source):
+        """Write a binary file object under key, replacing it atomically"""
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with open(partial, 'wb') as f:
+                shutil.copyfileobj(source, f)
+            os.replace(partial, path)  # never serve a half-written file
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def open(self, key):
+        """Readable stream of a report; raises FileNotFoundError if missing"""
+        path = self.get_path(key)
+        stream = open(path, 'rb')
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # removed meanwhile; the open file is still readable
+        return stream
+
+    def touch(self, key):
+        """Mark a report as recently used; False if it doesn't exist"""
+        try:
+            os.utime(self.get_path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete(self, key):
+        try:
+            os.remove(self.get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self):
+        """(key, size, last used timestamp) of every stored report"""
+        try:
+            with os.scandir(self.folder) as scan:
+                for entry in scan:
+                    if entry.is_file() and not entry.name.endswith('.part'):
+                        stat = entry.stat()
+                        yield entry.name, stat.st_size, stat.st_mtime
+        except FileNotFoundError:
+            return
+
+    def get_download_url(self, key, download_name):
+        """Local reports are streamed by the app"""
+        return None
+
+class S3Storage:
+    """Reports stored as objects in an S3-compatible bucket
+
+    Shared by every instance and kept across deploys. endpoint_url points it
+    at MinIO or another S3-compatible server. With presigned downloads the
+    browser is redirected to a short-lived URL and fetches the file from the
+    bucket itself; otherwise the app streams the object through. Objects
+    can't be marked as used without rewriting them, so eviction goes by
+    upload time, and it runs from the retention job rather than after every
+    upload, as listing a bucket is slow. boto3 is only needed with this
+    backend and is imported on first use.
+    """
+
+    evict_on_store = False
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, access_key=None,
+                 secret_key=None, presigned=True, url_expiry=300):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.presigned = presigned
+        self.url_expiry = url_expiry
+        self._client = None
+        self.lock = threading.Lock()
+
+    @property
+    def client(self):
+        # boto3 clients are thread-safe, so one is shared
+        with self.lock:
+            if self._client is None:
+                import boto3
+                self._client = boto3.client(
+                    's3', endpoint_url=self.endpoint_url, region_name=self.region,
+                    aws_access_key_id=self.access_key, aws_secret_access_key=self.secret_key
+                )
+        return self._client
+
+    def save(self, key, source):
+        """Upload a binary file object under key; large files go in parts"""
+        self.client.upload_fileobj(source, self.bucket, self.prefix + key)
+
+    def open(self, key):
+        """Readable stream of a report; raises FileNotFoundError if missing"""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body']
+        except Exception as e:
+            if is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def touch(self, key):
+        """Whether a report exists"""
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except Exception as e:
+            if is_missing(e):
+                return False
+            raise
+        return True
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def list(self):
+        """(key, size, upload timestamp) of every stored report"""
+        pages = self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self.prefix)
+        for page in pages:
+            for item in page.get('Contents', []):
+                yield item['Key'][len(self.prefix):], item['Size'], item['LastModified'].timestamp()
+
+    def get_download_url(self, key, download_name):
+        """A pre-signed URL for the report, or None to stream it through the app"""
+        if not self.presigned:
+            return None
+        return self.client.generate_presigned_url('get_object', ExpiresIn=self.url_expiry, Params={
+            'Bucket': self.bucket,
+            'Key': self.prefix + key,
+            'ResponseContentDisposition': f'attachment; filename="{download_name}"'
+        })
+
+def is_missing(error):
+    """Whether a botocore error means the object doesn't exist"""
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in ('404', 'NoSuchKey', 'NotFound')
+
+def create_storage(app):
+    """The report storage backend chosen by REPORT_STORAGE"""
+    config = app.config
+    if config['REPORT_STORAGE'] == 's3':
+        return S3Storage(
+            bucket=config['REPORT_S3_BUCKET'],
+            prefix=config['REPORT_S3_PREFIX'],
+            endpoint_url=config['REPORT_S3_ENDPOINT_URL'],
+            region=config['REPORT_S3_REGION'],
+            access_key=config['REPORT_S3_ACCESS_KEY'],
+            secret_key=config['REPORT_S3_SECRET_KEY'],
+            presigned=config['REPORT_S3_PRESIGNED'],
+            url_expiry=config['REPORT_URL_EXPIRY_SECONDS']
+        )
+    return LocalStorage(os.path.join(app.root_path, config['REPORTS_FOLDER']))
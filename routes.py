@@ -1,8 +1,19 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, send_file
+from flask import (Blueprint, Response, render_template, request, jsonify, redirect, url_for, flash, send_file,
+                   current_app, abort, stream_with_context)
 from flask_login import login_required, current_user, login_user, logout_user
 from werkzeug.security import check_password_hash
-from models import db, User, WorkoutLog, NutritionLog, Meal, Exercise, DailyStats, Report
+from auth import HasherBusy
+from models import db, User, WorkoutLog, ExerciseLog, NutritionLog, Meal, Exercise, DailyStats, Report
 from utils import AnalyticsCalculator, DataProcessor, ChartDataGenerator, EmailTemplate
+from history import HistoryLoader
+from queries import HotQueries
+from exercise_catalog import INDEXED_FIELDS
+from exercise_search import search_exercises
+from report_cache import REPORT_EXTENSIONS, get_download_name
+from report_data import get_report_range
+from report_jobs import ReportQueueFull
+from archive import ARCHIVED_TABLES
+from exports import EXPORT_FORMATS, iter_export_batches, stream_export
 from datetime import datetime, date, timedelta
 import os
 import json
@@ -28,8 +39,12 @@ def register():
         if User.query.filter_by(email=email).first():
             return jsonify({'error': 'Email already registered'}), 400
         
-        user = User(username=username, email=email)
-        user.set_password(password)
+        try:
+            password_hash = current_app.extensions['password_hasher'].hash(password)
+        except HasherBusy:
+            return login_busy_response()
+
+        user = User(username=username, email=email, password_hash=password_hash)
         
         db.session.add(user)
         db.session.commit()
@@ -48,20 +63,32 @@ def login():
         password = data.get('password')
         
         user = User.query.filter_by(username=username).first()
-        
-        if user and user.check_password(password):
+        hasher = current_app.extensions['password_hasher']
+
+        try:
+            valid = hasher.verify(user.password_hash if user else None, password or '')
+            if valid and hasher.needs_rehash(user.password_hash):
+                user.password_hash = hasher.hash(password)
+                db.session.commit()
+        except HasherBusy:
+            return login_busy_response()
+
+        if valid:
             login_user(user)
-            user.last_login = datetime.utcnow()
-            db.session.commit()
+            current_app.extensions['login_recorder'].record(user.id)
             return jsonify({'success': True, 'redirect': url_for('main.dashboard')})
         else:
             return jsonify({'error': 'Invalid username or password'}), 401
     
     return render_template('login.html')
 
+def login_busy_response():
+    return jsonify({'error': 'Too many login attempts, please try again shortly'}), 503, {'Retry-After': '1'}
+
 @main.route('/logout')
 @login_required
 def logout():
+    current_app.extensions['user_cache'].invalidate(current_user.id)
     logout_user()
     return redirect(url_for('main.index'))
 
@@ -72,27 +99,18 @@ def index():
         return redirect(url_for('main.dashboard'))
     return render_template('index.html')
 
+@main.route('/healthz')
+def healthz():
+    """Liveness check for load balancers; touches no templates, session or database"""
+    return jsonify({'status': 'ok'})
+
 @main.route('/dashboard')
 @login_required
 def dashboard():
-    # Get user's recent data for dashboard
-    recent_workouts = WorkoutLog.query.filter_by(user_id=current_user.id)\
-        .order_by(WorkoutLog.workout_date.desc()).limit(5).all()
-    
-    recent_nutrition = NutritionLog.query.filter_by(user_id=current_user.id)\
-        .order_by(NutritionLog.log_date.desc()).limit(7).all()
-    
     # Calculate weekly summary
     week_start = date.today() - timedelta(days=7)
-    weekly_workouts = WorkoutLog.query.filter(
-        WorkoutLog.user_id == current_user.id,
-        WorkoutLog.workout_date >= week_start
-    ).all()
-    
-    weekly_nutrition = NutritionLog.query.filter(
-        NutritionLog.user_id == current_user.id,
-        NutritionLog.log_date >= week_start
-    ).all()
+    weekly_workouts = HotQueries.workouts_since(current_user.id, week_start)
+    weekly_nutrition = HotQueries.nutrition_since(current_user.id, week_start)
     
     # Calculate metrics
     total_calories_burned = sum(w.calories_burned or 0 for w in weekly_workouts)
@@ -151,60 +169,77 @@ def dashboard():
 @main.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
+    user = db.session.get(User, current_user.id)  # current_user is a read-only cached snapshot
+
     if request.method == 'POST':
         data = request.get_json() if request.is_json else request.form
 
         # Update user profile
-        current_user.age = int(data.get('age', 0)) or None
-        current_user.gender = data.get('gender')
-        current_user.weight = float(data.get('weight', 0)) or None
-        current_user.height = float(data.get('height', 0)) or None
-        current_user.experience_level = int(data.get('experience_level', 0)) or None
-        current_user.fat_percentage = float(data.get('fat_percentage', 0)) or None
+        user.age = int(data.get('age', 0)) or None
+        user.gender = data.get('gender')
+        user.weight = float(data.get('weight', 0)) or None
+        user.height = float(data.get('height', 0)) or None
+        user.experience_level = int(data.get('experience_level', 0)) or None
+        user.fat_percentage = float(data.get('fat_percentage', 0)) or None
 
         # Update email preferences
-        current_user.daily_reports = data.get('daily_reports', False) in ['true', True]
-        current_user.weekly_reports = data.get('weekly_reports', True) in ['true', True]
-        current_user.monthly_reports = data.get('monthly_reports', True) in ['true', True]
+        user.daily_reports = data.get('daily_reports', False) in ['true', True]
+        user.weekly_reports = data.get('weekly_reports', True) in ['true', True]
+        user.monthly_reports = data.get('monthly_reports', True) in ['true', True]
 
         # Calculate BMI
-        if current_user.weight and current_user.height:
-            current_user.bmi = AnalyticsCalculator.calculate_bmi(
-                current_user.weight, current_user.height
+        if user.weight and user.height:
+            user.bmi = AnalyticsCalculator.calculate_bmi(
+                user.weight, user.height
             )
 
         db.session.commit()
+        current_app.extensions['user_cache'].invalidate(user.id)
 
         if request.is_json:
-            return jsonify({'success': True, 'bmi': current_user.bmi})
+            return jsonify({'success': True, 'bmi': user.bmi})
         else:
             flash('Profile updated successfully!', 'success')
             return redirect(url_for('main.profile'))
 
-    return render_template('user_profile.html', user=current_user)
+    return render_template('user_profile.html', user=user)
 
 @main.route('/workout_tracker')
 @login_required
 def workout_tracker():
-    # Get recent workouts
-    recent_workouts = WorkoutLog.query.filter_by(user_id=current_user.id)\
-        .order_by(WorkoutLog.workout_date.desc()).limit(10).all()
-    
-    # Get available exercises
-    exercises = Exercise.query.all()
+    # Get recent workouts with their exercises
+    recent_workouts = HistoryLoader.get_workout_history(current_user.id, per_page=10)
     
+    # Exercise names are suggested from the in-memory catalog as the user
+    # types (see api_exercise_autocomplete), rather than shipped with the page.
     return render_template('workout_tracker.html', 
-                         workouts=recent_workouts, 
-                         exercises=exercises)
+                         workouts=[entry.workout for entry in recent_workouts],
+                         workout_exercises={entry.workout.id: entry.exercises for entry in recent_workouts})
 
 @main.route('/log_workout', methods=['POST'])
 @login_required
 def log_workout():
     data = request.get_json()
     
-    # Create workout log
-    workout = WorkoutLog(
-        user_id=current_user.id,
+    # Writes go through the write queue (a single writer thread on SQLite)
+    current_app.extensions['write_queue'].submit(save_workout, current_user.id, data)
+    
+    return jsonify({'success': True, 'message': 'Workout logged successfully!'})
+
+def save_workout(user_id, data):
+    """Create a workout log with its exercises"""
+    workout = build_workout(user_id, data)
+    db.session.add(workout)
+    db.session.flush()  # Get the workout ID
+    
+    db.session.add_all(build_exercises(workout.id, data))
+    db.session.commit()
+    return workout.id
+
+def build_workout(user_id, data):
+    """Build a workout log from request data"""
+    return WorkoutLog(
+        user_id=user_id,
         workout_type=data.get('workout_type'),
         session_duration=float(data.get('session_duration', 0)),
         calories_burned=int(data.get('calories_burned', 0)),
@@ -214,15 +249,12 @@ def log_workout():
         workout_frequency=int(data.get('workout_frequency', 0)) or None,
         workout_date=datetime.strptime(data.get('workout_date', date.today().isoformat()), '%Y-%m-%d').date()
     )
-    
-    db.session.add(workout)
-    db.session.flush()  # Get the workout ID
-    
-    # Add exercises if provided
-    exercises_data = data.get('exercises', [])
-    for exercise_data in exercises_data:
-        exercise = ExerciseLog(
-            workout_id=workout.id,
+
+def build_exercises(workout_id, data):
+    """Build the exercise logs for a workout from request data"""
+    return [
+        ExerciseLog(
+            workout_id=workout_id,
             name_of_exercise=exercise_data.get('name'),
             sets=int(exercise_data.get('sets', 0)) or None,
             reps=int(exercise_data.get('reps', 0)) or None,
@@ -234,25 +266,21 @@ def log_workout():
             body_part=exercise_data.get('body_part'),
             type_of_muscle=exercise_data.get('type_of_muscle')
         )
-        db.session.add(exercise)
-    
-    db.session.commit()
-    
-    return jsonify({'success': True, 'message': 'Workout logged successfully!'})
+        for exercise_data in data.get('exercises', [])
+    ]
 
 @main.route('/nutrition_tracker')
 @login_required
 def nutrition_tracker():
-    # Get recent nutrition logs
-    recent_nutrition = NutritionLog.query.filter_by(user_id=current_user.id)\
-        .order_by(NutritionLog.log_date.desc()).limit(10).all()
+    # Get recent nutrition logs with their meals
+    recent_nutrition = HistoryLoader.get_nutrition_history(current_user.id, per_page=10)
     
     # Get recent meals
-    recent_meals = Meal.query.filter_by(user_id=current_user.id)\
-        .order_by(Meal.meal_date.desc()).limit(20).all()
+    recent_meals = HotQueries.recent_meals(current_user.id, 20)
     
     return render_template('nutrition_tracker.html', 
-                         nutrition_logs=recent_nutrition,
+                         nutrition_logs=[entry.log for entry in recent_nutrition],
+                         nutrition_meals={entry.log.id: entry.meals for entry in recent_nutrition},
                          meals=recent_meals)
 
 @main.route('/log_nutrition', methods=['POST'])
@@ -260,9 +288,25 @@ def nutrition_tracker():
 def log_nutrition():
     data = request.get_json()
     
-    # Create nutrition log
-    nutrition = NutritionLog(
-        user_id=current_user.id,
+    # Writes go through the write queue (a single writer thread on SQLite)
+    current_app.extensions['write_queue'].submit(save_nutrition, current_user.id, data)
+    
+    return jsonify({'success': True, 'message': 'Nutrition logged successfully!'})
+
+def save_nutrition(user_id, data):
+    """Create a nutrition log with its meals"""
+    nutrition = build_nutrition(user_id, data)
+    db.session.add(nutrition)
+    db.session.flush()  # Get the nutrition log ID
+    
+    db.session.add_all(build_meals(user_id, nutrition, data))
+    db.session.commit()
+    return nutrition.id
+
+def build_nutrition(user_id, data):
+    """Build a nutrition log from request data"""
+    return NutritionLog(
+        user_id=user_id,
         daily_meals_frequency=int(data.get('daily_meals_frequency', 0)) or None,
         carbs=int(data.get('carbs', 0)) or None,
         proteins=int(data.get('proteins', 0)) or None,
@@ -271,15 +315,12 @@ def log_nutrition():
         water_intake=float(data.get('water_intake', 0)) or None,
         log_date=datetime.strptime(data.get('log_date', date.today().isoformat()), '%Y-%m-%d').date()
     )
-    
-    db.session.add(nutrition)
-    db.session.flush()  # Get the nutrition log ID
-    
-    # Add meals if provided
-    meals_data = data.get('meals', [])
-    for meal_data in meals_data:
-        meal = Meal(
-            user_id=current_user.id,
+
+def build_meals(user_id, nutrition, data):
+    """Build the meals for a nutrition log from request data"""
+    return [
+        Meal(
+            user_id=user_id,
             nutrition_log_id=nutrition.id,
             meal_name=meal_data.get('meal_name'),
             meal_type=meal_data.get('meal_type'),
@@ -298,11 +339,8 @@ def log_nutrition():
             is_healthy=meal_data.get('is_healthy', True),
             meal_date=nutrition.log_date
         )
-        db.session.add(meal)
-    
-    db.session.commit()
-    
-    return jsonify({'success': True, 'message': 'Nutrition logged successfully!'})
+        for meal_data in data.get('meals', [])
+    ]
 
 @main.route('/analytics')
 @login_required
@@ -379,21 +417,17 @@ def generate_report():
     report_format = data.get('format', 'pdf')  # pdf, excel
     email_recipients = data.get('email_recipients', [])
     
-    # Calculate date range
-    end_date = date.today()
-    if report_type == 'daily':
-        start_date = end_date
-    elif report_type == 'weekly':
-        start_date = end_date - timedelta(days=7)
-    else:  # monthly
-        start_date = end_date - timedelta(days=30)
+    start_date, end_date = get_report_range(report_type, date.today())
+    
+    if report_format not in REPORT_EXTENSIONS:
+        return jsonify({'error': 'Unsupported report format'}), 400
     
-    # Generate report (placeholder - would implement actual report generation)
+    # Record the report, then render it in the background
     report = Report(
         user_id=current_user.id,
         report_type=report_type,
         report_format=report_format,
-        file_path=f"reports/{current_user.id}_{report_type}_{end_date}.{report_format}",
+        status='queued',
         start_date=start_date,
         end_date=end_date,
         email_recipients=json.dumps(email_recipients)
@@ -402,34 +436,195 @@ def generate_report():
     db.session.add(report)
     db.session.commit()
     
+    try:
+        current_app.extensions['report_jobs'].submit(report.id)
+    except ReportQueueFull:
+        db.session.delete(report)
+        db.session.commit()
+        return jsonify({'error': 'Too many reports are being generated, please try again shortly'}), 503, {'Retry-After': '5'}
+    
     return jsonify({
         'success': True, 
-        'message': f'{report_type.title()} {report_format.upper()} report generated successfully!',
-        'report_id': report.id
-    })
+        'message': f'{report_type.title()} {report_format.upper()} report queued',
+        'report_id': report.id,
+        'status_url': url_for('main.api_report_status', report_id=report.id)
+    }), 202
+
+def get_user_report(report_id):
+    """A report of the current user, or 404"""
+    report = db.session.get(Report, report_id)
+    if report is None or report.user_id != current_user.id:
+        abort(404)
+    return report
+
+@main.route('/api/reports/<int:report_id>/status')
+@login_required
+def api_report_status(report_id):
+    """API endpoint for polling a report's rendering status"""
+    report = get_user_report(report_id)
+    data = {'report_id': report.id, 'status': report.status}
+    if report.status == 'ready':
+        data['download_url'] = url_for('main.download_report', report_id=report.id)
+    elif report.status == 'failed':
+        data['error'] = report.error
+    return jsonify(data)
+
+@main.route('/reports/<int:report_id>/download')
+@login_required
+def download_report(report_id):
+    report = get_user_report(report_id)
+    if report.status != 'ready':
+        return jsonify({'error': 'Report is not ready', 'status': report.status}), 409
+    
+    storage = current_app.extensions['report_cache'].storage
+    download_name = get_download_name(report.report_type, report.end_date, report.report_format)
+    try:
+        if not report.storage_key or not storage.touch(report.storage_key):
+            raise FileNotFoundError(report.storage_key)
+        url = storage.get_download_url(report.storage_key, download_name)
+        stream = None if url else storage.open(report.storage_key)
+    except FileNotFoundError:
+        # Evicted from report storage: draw it again
+        report_jobs = current_app.extensions['report_jobs']
+        report.status = 'queued'
+        report.status_changed_at = datetime.utcnow()
+        db.session.commit()
+        try:
+            report_jobs.submit(report.id)
+        except ReportQueueFull:
+            report.status = 'ready'
+            db.session.commit()
+            return jsonify({'error': 'Too many reports are being generated, please try again shortly'}), 503, {'Retry-After': '5'}
+        return jsonify({'error': 'Report is being generated again', 'status': report.status}), 409
+    
+    if url:
+        # Pre-signed URLs send the browser straight to the bucket
+        return redirect(url)
+    # send_file streams the file or object in blocks instead of reading it whole
+    return send_file(stream, as_attachment=True, download_name=download_name)
 
 @main.route('/api/dashboard_data')
 @login_required
 def api_dashboard_data():
     """API endpoint for dashboard data"""
     # Get recent data
-    recent_workouts = WorkoutLog.query.filter_by(user_id=current_user.id)\
-        .order_by(WorkoutLog.workout_date.desc()).limit(7).all()
-    
-    recent_nutrition = NutritionLog.query.filter_by(user_id=current_user.id)\
-        .order_by(NutritionLog.log_date.desc()).limit(7).all()
+    recent_workouts = HotQueries.recent_workouts(current_user.id, 7)
+    recent_nutrition = HotQueries.recent_nutrition(current_user.id, 7)
     
-    # Calculate metrics
+    return jsonify(get_dashboard_payload(current_user, recent_workouts, recent_nutrition))
+
+def get_dashboard_payload(user, recent_workouts, recent_nutrition):
+    """Dashboard API payload, shared with the async API tier"""
     total_calories_burned = sum(w.calories_burned or 0 for w in recent_workouts)
     total_calories_consumed = sum(n.calories or 0 for n in recent_nutrition)
     
-    return jsonify({
+    return {
         'total_workouts': len(recent_workouts),
         'total_calories_burned': total_calories_burned,
         'total_calories_consumed': total_calories_consumed,
         'calorie_balance': total_calories_consumed - total_calories_burned,
-        'bmi': current_user.bmi,
-        'bmi_category': AnalyticsCalculator.get_bmi_category(current_user.bmi or 0)
+        'bmi': user.bmi,
+        'bmi_category': AnalyticsCalculator.get_bmi_category(user.bmi or 0)
+    }
+
+@main.route('/api/exercises/autocomplete')
+@login_required
+def api_exercise_autocomplete():
+    """API endpoint for exercise name suggestions, optionally filtered"""
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    filters = {name: request.args.get(name) for name in INDEXED_FIELDS}
+    catalog = current_app.extensions['exercise_catalog']
+    exercises = catalog.autocomplete(request.args.get('q', ''), limit, **filters)
+    return jsonify({
+        'exercises': [exercise._asdict() for exercise in exercises],
+        'version': catalog.snapshot.version
+    })
+
+@main.route('/api/exercises/search')
+@login_required
+def api_exercise_search():
+    """API endpoint for ranked full-text exercise search"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    exercises, total = search_exercises(request.args.get('q', ''), page, per_page)
+    return jsonify({
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'exercises': [exercise._asdict() for exercise in exercises]
+    })
+
+@main.route('/api/exercises/recommendations')
+@login_required
+def api_exercise_recommendations():
+    """API endpoint for exercises that balance the user's recent training"""
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 50)
+    recommendations = current_app.extensions['exercise_recommender'].recommend(current_user, limit)
+    return jsonify({
+        'exercises': [dict(exercise._asdict(), score=round(score, 4)) for exercise, score in recommendations]
+    })
+
+def get_history_args():
+    """Parse pagination and date range arguments for history APIs"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    return {
+        'page': page,
+        'per_page': per_page,
+        'start_date': datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None,
+        'end_date': datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    }
+
+@main.route('/export/<table>.<export_format>')
+@login_required
+def export_logs(table, export_format):
+    """Stream the user's raw logs of one table as CSV or Parquet"""
+    if table not in ARCHIVED_TABLES or export_format not in EXPORT_FORMATS:
+        abort(404)
+    try:
+        args = get_history_args()
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    
+    batches = iter_export_batches(table, args['start_date'], args['end_date'], current_user.id)
+    return Response(
+        stream_with_context(stream_export(table, export_format, batches)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={table}.{export_format}'}
+    )
+
+@main.route('/api/workouts')
+@login_required
+def api_workouts():
+    """API endpoint for workout history with exercises"""
+    try:
+        args = get_history_args()
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    
+    workouts = HistoryLoader.get_workout_history(current_user.id, **args)
+    return jsonify({
+        'page': args['page'],
+        'per_page': args['per_page'],
+        'workouts': HistoryLoader.serialize_workouts(workouts)
+    })
+
+@main.route('/api/nutrition')
+@login_required
+def api_nutrition():
+    """API endpoint for nutrition history with meals"""
+    try:
+        args = get_history_args()
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    
+    nutrition_logs = HistoryLoader.get_nutrition_history(current_user.id, **args)
+    return jsonify({
+        'page': args['page'],
+        'per_page': args['per_page'],
+        'nutrition_logs': HistoryLoader.serialize_nutrition(nutrition_logs)
     })
 
 @main.route('/api/chart_data/<chart_type>')
@@ -442,23 +637,26 @@ def api_chart_data(chart_type):
         return jsonify(ChartDataGenerator.generate_calorie_balance_data(current_user.id))
     elif chart_type == 'macro_breakdown':
         # Get recent nutrition data for macro breakdown
-        recent_nutrition = NutritionLog.query.filter_by(user_id=current_user.id)\
-            .order_by(NutritionLog.log_date.desc()).limit(7).all()
+        recent_nutrition = HotQueries.recent_nutrition(current_user.id, 7)
         
         if recent_nutrition:
-            total_carbs = sum(n.carbs or 0 for n in recent_nutrition)
-            total_proteins = sum(n.proteins or 0 for n in recent_nutrition)
-            total_fats = sum(n.fats or 0 for n in recent_nutrition)
-            
-            return jsonify({
-                'labels': ['Carbs', 'Proteins', 'Fats'],
-                'data': [total_carbs, total_proteins, total_fats],
-                'backgroundColor': [
-                    'rgba(255, 99, 132, 0.6)',
-                    'rgba(54, 162, 235, 0.6)',
-                    'rgba(255, 205, 86, 0.6)'
-                ],
-                'title': 'Macro Nutrient Distribution (Last 7 Days)'
-            })
-    
-    return jsonify({'error': 'Invalid chart type'}), 400
\ No newline at end of file
+            return jsonify(get_macro_breakdown_payload(recent_nutrition))
+    
+    return jsonify({'error': 'Invalid chart type'}), 400
+
+def get_macro_breakdown_payload(recent_nutrition):
+    """Macro breakdown chart payload, shared with the async API tier"""
+    total_carbs = sum(n.carbs or 0 for n in recent_nutrition)
+    total_proteins = sum(n.proteins or 0 for n in recent_nutrition)
+    total_fats = sum(n.fats or 0 for n in recent_nutrition)
+    
+    return {
+        'labels': ['Carbs', 'Proteins', 'Fats'],
+        'data': [total_carbs, total_proteins, total_fats],
+        'backgroundColor': [
+            'rgba(255, 99, 132, 0.6)',
+            'rgba(54, 162, 235, 0.6)',
+            'rgba(255, 205, 86, 0.6)'
+        ],
+        'title': 'Macro Nutrient Distribution (Last 7 Days)'
+    }
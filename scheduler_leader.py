@@ -0,0 +1,209 @@
+import os
+import socket
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from models import db, JobExecution
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def get_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class AdvisoryLock:
+    """Session-level database lock held on a dedicated connection
+
+    PostgreSQL uses pg_try_advisory_lock and MySQL uses GET_LOCK. Both are
+    released by the server when the holding connection drops, so a dead
+    leader frees the lock without any cleanup.
+    """
+
+    def __init__(self, engine, name):
+        self.engine = engine
+        self.name = name
+        self.key = zlib.crc32(name.encode())
+        self.connection = None
+
+    def acquire(self):
+        connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            if self.engine.dialect.name == 'postgresql':
+                acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': self.key}).scalar()
+            else:
+                acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {'name': self.name}).scalar() == 1
+        except Exception:
+            connection.close()
+            raise
+
+        if acquired:
+            self.connection = connection
+        else:
+            connection.close()
+        return bool(acquired)
+
+    def is_held(self):
+        """Check the holding connection is still alive"""
+        if self.connection is None:
+            return False
+        try:
+            self.connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            self.connection.invalidate()
+            self.connection = None
+            return False
+
+    def release(self):
+        if self.connection is not None:
+            # Closing the session releases the lock on the server
+            self.connection.invalidate()
+            self.connection = None
+
+class FileLock:
+    """Exclusive lock on a file, for SQLite and other single-host setups
+
+    The operating system releases the lock when the holding process exits.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def acquire(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self.fd = fd
+        return True
+
+    def is_held(self):
+        return self.fd is not None
+
+    def release(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def create_leader_lock(app, engine):
+    """Pick the lock type for the configured database"""
+    name = app.config['SCHEDULER_LOCK_NAME']
+    if engine.dialect.name in ('postgresql', 'mysql'):
+        return AdvisoryLock(engine, name)
+
+    # Keep the lock file next to a SQLite database so every process using
+    # that file contends for the same lock.
+    database = engine.url.database if engine.dialect.name == 'sqlite' else None
+    if database and database != ':memory:':
+        folder = os.path.dirname(os.path.abspath(database))
+    else:
+        folder = app.instance_path
+    os.makedirs(folder, exist_ok=True)
+    return FileLock(os.path.join(folder, f'{name}.lock'))
+
+class SchedulerLeader:
+    """Elect a single process to run scheduled jobs
+
+    Every process serving the app (each gunicorn worker, from post_fork)
+    starts its scheduler paused and keeps trying for the leader lock. The
+    holder resumes its scheduler; if it dies or is recycled, its lock is
+    freed and another worker takes over on its next attempt. If a leader
+    loses its lock, it pauses its scheduler again. The lock is only taken
+    after the fork, so no worker shares the master's lock connection.
+    """
+
+    def __init__(self, app, on_elected, on_deposed):
+        self.app = app
+        self.on_elected = on_elected
+        self.on_deposed = on_deposed
+        self.interval = app.config['SCHEDULER_LEADER_INTERVAL']
+        self.is_leader = False
+        self.stopped = threading.Event()
+        self.pid = os.getpid()
+
+        with app.app_context():
+            self.lock = create_leader_lock(app, db.engine)
+
+    def start(self):
+        """Campaign for leadership in the background"""
+        thread = threading.Thread(target=self._run, name='scheduler-leader', daemon=True)
+        thread.start()
+
+    def _run(self):
+        # The first attempt is made off the start-up path, so booting never
+        # waits on the database.
+        self.check()
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """Acquire or confirm leadership"""
+        try:
+            if self.is_leader:
+                if not self.lock.is_held():
+                    self.is_leader = False
+                    print(f"Scheduler leadership lost by {get_worker_name()}")
+                    self.on_deposed()
+            elif self.lock.acquire():
+                self.is_leader = True
+                print(f"Scheduler leader elected: {get_worker_name()}")
+                self.on_elected()
+        except Exception as e:
+            print(f"Error in scheduler leader election: {e}")
+
+    def stop(self):
+        """Stop campaigning and give up leadership"""
+        # Forked children inherit this object but not the lock's ownership;
+        # only the process that took the lock may release it.
+        if os.getpid() != self.pid:
+            return
+        self.stopped.set()
+        if self.is_leader:
+            self.is_leader = False
+            self.lock.release()
+
+def get_scheduled_time(trigger, now, grace):
+    """The most recent fire time of trigger within grace of now
+
+    A run that starts late, for example after a failover, still maps to
+    the slot it was scheduled for. Falls back to the current minute.
+    """
+    slot = None
+    fire_time = trigger.get_next_fire_time(None, now - grace)
+    while fire_time and fire_time <= now:
+        slot = fire_time
+        fire_time = trigger.get_next_fire_time(fire_time, fire_time + timedelta(microseconds=1))
+    return slot or now.replace(second=0, microsecond=0)
+
+def claim_job_run(job_id, scheduled_for):
+    """Record the start of a job run, or return None if the slot already ran"""
+    execution = JobExecution(job_id=job_id, scheduled_for=scheduled_for, worker=get_worker_name())
+    db.session.add(execution)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None
+    return execution
+
+def finish_job_run(execution, error=None):
+    """Record the outcome of a job run"""
+    execution.status = 'failed' if error else 'succeeded'
+    execution.error = error
+    execution.finished_at = datetime.utcnow()
+    db.session.commit()
+
+def to_utc(moment):
+    """Naive UTC datetime, as stored in the database"""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,109 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from sqlalchemy import event
+from models import db
+
+class SQLiteProfile:
+    """Production settings for single-node SQLite deployments
+
+    Every new connection gets WAL journaling, synchronous=NORMAL, a memory map,
+    a larger page cache and a busy timeout, so readers never block the writer
+    and concurrent writers wait instead of failing with "database is locked".
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Apply the SQLite profile and set up the write queue"""
+        self.app = app
+
+        with app.app_context():
+            engine = db.engine
+
+        enabled = self.apply(engine)
+        app.extensions['sqlite_profile'] = self
+        app.extensions['write_queue'] = WriteQueue(
+            app, enabled=enabled and app.config['SQLITE_WRITE_QUEUE']
+        )
+
+    def apply(self, engine):
+        """Apply the pragmas to an engine's connections, if it is SQLite"""
+        enabled = engine.dialect.name == 'sqlite' and self.app.config['SQLITE_PRODUCTION_PROFILE']
+        if enabled:
+            event.listen(engine, 'connect', self.set_pragmas)
+        return enabled
+
+    def set_pragmas(self, dbapi_connection, connection_record):
+        """Apply pragmas to a new DBAPI connection"""
+        config = self.app.config
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+        cursor.execute(f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}")
+        cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+        cursor.close()
+
+class WriteQueue:
+    """Funnel writes through a single thread per process
+
+    SQLite allows one writer at a time. Running every write on one thread
+    means request threads in the same worker never contend for the write
+    lock; contention between worker processes is handled by busy_timeout.
+    When disabled, submit() simply runs the function inline.
+    """
+
+    def __init__(self, app, enabled=True):
+        self.app = app
+        self.enabled = enabled
+        self.timeout = app.config['SQLITE_WRITE_TIMEOUT']
+        self.queue = queue.Queue(maxsize=app.config['SQLITE_WRITE_QUEUE_SIZE'])
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Run func on the writer thread and return its result
+
+        func runs inside its own app context and session, so it must not touch
+        request-bound objects such as current_user; pass plain values instead.
+        """
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        self._ensure_started()
+        future = Future()
+        self.queue.put((future, func, args, kwargs), timeout=self.timeout)
+        return future.result(timeout=self.timeout)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so a preloaded app starts its writer
+        # lazily in each worker process.
+        if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+                return
+            if self.pid != os.getpid():
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            future, func, args, kwargs = self.queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self.app.app_context():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except Exception as e:
+                    db.session.rollback()
+                    future.set_exception(e)
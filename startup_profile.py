@@ -0,0 +1,76 @@
+"""Startup profiling
+
+Set STARTUP_PROFILE=true to print, once the app is created, how long each
+package took to import and how long each create_app phase took. Import this
+module before anything else so the import timer sees every import.
+"""
+
+import builtins
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+ENABLED = os.environ.get('STARTUP_PROFILE', 'false').lower() in ['true', 'on', '1']
+
+_started = time.perf_counter()
+_import_times = defaultdict(float)  # top-level package -> seconds spent in its own modules
+_phases = []  # (phase, seconds)
+_stack = []  # time spent in nested imports, per active import
+_original_import = builtins.__import__
+_reported = False
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    if level:
+        package = (globals or {}).get('__package__') or ''
+    else:
+        package = name
+
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = _stack.pop()
+        _import_times[package.partition('.')[0] or name] += elapsed - nested
+        if _stack:
+            _stack[-1] += elapsed
+
+if ENABLED:
+    builtins.__import__ = _timed_import
+
+@contextmanager
+def phase(name):
+    """Time a named phase of app start-up"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+def report(limit=15):
+    """Print the import and phase breakdown, once per process"""
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    builtins.__import__ = _original_import
+
+    total_imports = sum(_import_times.values())
+    print("STARTUP PROFILE")
+    print("=" * 50)
+    print(f"Imports: {total_imports * 1000:.0f} ms")
+    for package, seconds in sorted(_import_times.items(), key=lambda item: item[1], reverse=True)[:limit]:
+        print(f"  {package:<30}{seconds * 1000:>10.1f} ms")
+    print("Init phases:")
+    for name, seconds in _phases:
+        print(f"  {name:<30}{seconds * 1000:>10.1f} ms")
+    print(f"Total since profiling started: {(time.perf_counter() - _started) * 1000:.0f} ms")
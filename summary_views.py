@@ -0,0 +1,192 @@
+from datetime import datetime
+from sqlalchemy import text, select, insert, delete, func, literal
+from models import (db, summary_metadata, User, WorkoutLog, NutritionLog, MonthlyRollup, UserWorkoutSummary,
+                    UserNutritionSummary)
+
+# Archived months are only left as monthly_rollups rows, so lifetime totals
+# add those to the hot logs. Averages divide by the logs with a value, with
+# archived logs all counted.
+# PostgreSQL definitions. Keep in sync with database_schema_postgresql.sql.
+POSTGRES_VIEWS = {
+    'user_workout_summary': """
+        SELECT
+            u.id as user_id,
+            u.username,
+            COALESCE(wl.workouts, 0) + COALESCE(mr.workouts, 0) as total_workouts,
+            COALESCE(wl.duration, 0) + COALESCE(mr.duration, 0) as total_duration_hours,
+            COALESCE(wl.calories, 0) + COALESCE(mr.calories, 0) as total_calories_burned,
+            (COALESCE(wl.calories, 0) + COALESCE(mr.calories, 0))::float
+                / NULLIF(COALESCE(wl.calorie_logs, 0) + COALESCE(mr.workouts, 0), 0) as avg_calories_per_workout,
+            (now() AT TIME ZONE 'utc') as refreshed_at
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, COUNT(id) as workouts, SUM(session_duration) as duration,
+                   SUM(calories_burned) as calories, COUNT(calories_burned) as calorie_logs
+            FROM workout_logs GROUP BY user_id
+        ) wl ON u.id = wl.user_id
+        LEFT JOIN (
+            SELECT user_id, SUM(workout_count) as workouts, SUM(total_workout_duration) as duration,
+                   SUM(total_calories_burned) as calories
+            FROM monthly_rollups GROUP BY user_id
+        ) mr ON u.id = mr.user_id
+    """,
+    'user_nutrition_summary': """
+        SELECT
+            u.id as user_id,
+            u.username,
+            COALESCE(nl.logs, 0) + COALESCE(mr.logs, 0) as total_nutrition_logs,
+            (COALESCE(nl.calories, 0) + COALESCE(mr.calories, 0))::float
+                / NULLIF(COALESCE(nl.calorie_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_calories,
+            (COALESCE(nl.carbs, 0) + COALESCE(mr.carbs, 0))::float
+                / NULLIF(COALESCE(nl.carb_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_carbs,
+            (COALESCE(nl.proteins, 0) + COALESCE(mr.proteins, 0))::float
+                / NULLIF(COALESCE(nl.protein_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_proteins,
+            (COALESCE(nl.fats, 0) + COALESCE(mr.fats, 0))::float
+                / NULLIF(COALESCE(nl.fat_logs, 0) + COALESCE(mr.logs, 0), 0) as avg_daily_fats,
+            (now() AT TIME ZONE 'utc') as refreshed_at
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, COUNT(id) as logs,
+                   SUM(calories) as calories, COUNT(calories) as calorie_logs,
+                   SUM(carbs) as carbs, COUNT(carbs) as carb_logs,
+                   SUM(proteins) as proteins, COUNT(proteins) as protein_logs,
+                   SUM(fats) as fats, COUNT(fats) as fat_logs
+            FROM nutrition_logs GROUP BY user_id
+        ) nl ON u.id = nl.user_id
+        LEFT JOIN (
+            SELECT user_id, SUM(nutrition_log_count) as logs, SUM(total_calories_consumed) as calories,
+                   SUM(total_carbs) as carbs, SUM(total_proteins) as proteins, SUM(total_fats) as fats
+            FROM monthly_rollups GROUP BY user_id
+        ) mr ON u.id = mr.user_id
+    """
+}
+
+# Stored as each view's comment; views built from older definitions are
+# dropped and recreated by create_summary_views()
+POSTGRES_VIEWS_VERSION = 'lifestyle summary v2'
+
+def is_postgresql(engine):
+    """Materialized views are only available on PostgreSQL"""
+    return engine.dialect.name == 'postgresql'
+
+def create_summary_views(engine=None):
+    """Create the summary views (PostgreSQL) or their plain-table fallback"""
+    engine = engine or db.engine
+
+    if not is_postgresql(engine):
+        summary_metadata.create_all(engine)
+        return
+
+    with engine.begin() as conn:
+        for name, definition in POSTGRES_VIEWS.items():
+            relkind, comment = conn.execute(
+                text("SELECT relkind, obj_description(oid, 'pg_class') FROM pg_class WHERE relname = :name"),
+                {'name': name}
+            ).first() or (None, None)
+            # Older schemas shipped these as plain views, or without archived months
+            if relkind == 'v':
+                conn.execute(text(f"DROP VIEW {name}"))
+            elif relkind == 'm' and comment != POSTGRES_VIEWS_VERSION:
+                conn.execute(text(f"DROP MATERIALIZED VIEW {name}"))
+
+            conn.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {definition}"))
+            conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{name}_user ON {name}(user_id)"))
+            conn.execute(text(f"COMMENT ON MATERIALIZED VIEW {name} IS '{POSTGRES_VIEWS_VERSION}'"))
+
+def refresh_summary_views(engine=None):
+    """Refresh the summary views without blocking readers"""
+    engine = engine or db.engine
+
+    with engine.begin() as conn:
+        if is_postgresql(engine):
+            for name in POSTGRES_VIEWS:
+                conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}"))
+            return
+
+        # Plain-table fallback: rebuild both tables in a single transaction
+        refreshed_at = datetime.utcnow()
+
+        workout_summary = UserWorkoutSummary.__table__
+        conn.execute(delete(workout_summary))
+        conn.execute(insert(workout_summary).from_select(
+            [c.name for c in workout_summary.columns], select_workout_summaries(refreshed_at)
+        ))
+
+        nutrition_summary = UserNutritionSummary.__table__
+        conn.execute(delete(nutrition_summary))
+        conn.execute(insert(nutrition_summary).from_select(
+            [c.name for c in nutrition_summary.columns], select_nutrition_summaries(refreshed_at)
+        ))
+
+def select_workout_summaries(refreshed_at):
+    """The user_workout_summary query for the plain-table fallback"""
+    hot = select(
+        WorkoutLog.user_id,
+        func.count(WorkoutLog.id).label('workouts'),
+        func.sum(WorkoutLog.session_duration).label('duration'),
+        func.sum(WorkoutLog.calories_burned).label('calories'),
+        func.count(WorkoutLog.calories_burned).label('calorie_logs')
+    ).group_by(WorkoutLog.user_id).subquery()
+    archived = select(
+        MonthlyRollup.user_id,
+        func.sum(MonthlyRollup.workout_count).label('workouts'),
+        func.sum(MonthlyRollup.total_workout_duration).label('duration'),
+        func.sum(MonthlyRollup.total_calories_burned).label('calories')
+    ).group_by(MonthlyRollup.user_id).subquery()
+
+    calories = _total(hot.c.calories, archived.c.calories)
+    return select(
+        User.id,
+        User.username,
+        _total(hot.c.workouts, archived.c.workouts),
+        _total(hot.c.duration, archived.c.duration),
+        calories,
+        _average(calories, _total(hot.c.calorie_logs, archived.c.workouts)),
+        literal(refreshed_at, db.DateTime)
+    ).select_from(User).outerjoin(hot, hot.c.user_id == User.id).outerjoin(archived, archived.c.user_id == User.id)
+
+def select_nutrition_summaries(refreshed_at):
+    """The user_nutrition_summary query for the plain-table fallback"""
+    nutrients = {'calories': 'total_calories_consumed', 'carbs': 'total_carbs',
+                 'proteins': 'total_proteins', 'fats': 'total_fats'}
+    hot = select(
+        NutritionLog.user_id,
+        func.count(NutritionLog.id).label('logs'),
+        *(func.sum(getattr(NutritionLog, name)).label(name) for name in nutrients),
+        *(func.count(getattr(NutritionLog, name)).label(f'{name}_logs') for name in nutrients)
+    ).group_by(NutritionLog.user_id).subquery()
+    archived = select(
+        MonthlyRollup.user_id,
+        func.sum(MonthlyRollup.nutrition_log_count).label('logs'),
+        *(func.sum(getattr(MonthlyRollup, total)).label(name) for name, total in nutrients.items())
+    ).group_by(MonthlyRollup.user_id).subquery()
+
+    return select(
+        User.id,
+        User.username,
+        _total(hot.c.logs, archived.c.logs),
+        *(_average(_total(hot.c[name], archived.c[name]), _total(hot.c[f'{name}_logs'], archived.c.logs))
+          for name in nutrients),
+        literal(refreshed_at, db.DateTime)
+    ).select_from(User).outerjoin(hot, hot.c.user_id == User.id).outerjoin(archived, archived.c.user_id == User.id)
+
+def _total(hot, archived):
+    return func.coalesce(hot, 0) + func.coalesce(archived, 0)
+
+def _average(total, count):
+    return total * 1.0 / func.nullif(count, 0)
+
+def get_user_summary(user_id):
+    """Get the precomputed lifetime workout and nutrition summary for a user"""
+    return (
+        db.session.get(UserWorkoutSummary, user_id),
+        db.session.get(UserNutritionSummary, user_id)
+    )
+
+def get_user_summaries(user_ids):
+    """get_user_summary for several users with one query per view, keyed by user id"""
+    workouts = {summary.user_id: summary for summary in
+                UserWorkoutSummary.query.filter(UserWorkoutSummary.user_id.in_(user_ids))}
+    nutrition = {summary.user_id: summary for summary in
+                 UserNutritionSummary.query.filter(UserNutritionSummary.user_id.in_(user_ids))}
+    return {user_id: (workouts.get(user_id), nutrition.get(user_id)) for user_id in user_ids}
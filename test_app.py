@@ -1,30 +1,19 @@
 import unittest
 import os
 import tempfile
-from app import create_app
+from testing import AppTestCase
 from models import db, User
 
-class LifestyleAnalyticsTestCase(unittest.TestCase):
+class LifestyleAnalyticsTestCase(AppTestCase):
     """Test cases for Lifestyle Analytics Platform"""
     
     def setUp(self):
         """Set up test environment"""
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        super().setUp()
         self.app.config['WTF_CSRF_ENABLED'] = False
         
         self.client = self.app.test_client()
         
-        with self.app.app_context():
-            db.create_all()
-    
-    def tearDown(self):
-        """Clean up after tests"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-    
     def test_app_creation(self):
         """Test app creation"""
         self.assertIsNotNone(self.app)
@@ -36,6 +25,54 @@ class LifestyleAnalyticsTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Lifestyle Data Analytics', response.data)
     
+    def test_healthz(self):
+        """Test health check endpoint"""
+        response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'status': 'ok'})
+        self.assertNotIn('Set-Cookie', response.headers)
+
+    def test_init_db_command(self):
+        """Test the init-db command seeds the exercise library once"""
+        from models import Exercise
+        runner = self.app.test_cli_runner()
+
+        result = runner.invoke(args=['init-db'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with self.app.app_context():
+            self.assertEqual(Exercise.query.count(), 5)
+
+        result = runner.invoke(args=['seed-db'])
+        self.assertIn('already exist', result.output)
+        with self.app.app_context():
+            self.assertEqual(Exercise.query.count(), 5)
+    
+    def test_init_db_adds_missing_columns(self):
+        """Test init-db upgrades tables created before their newer columns"""
+        from sqlalchemy import inspect, text
+        from models import db, Report, User
+
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(text("INSERT INTO users (id, username, email, password_hash) "
+                                        "VALUES (1, 'old', 'old@example.com', 'x')"))
+                connection.execute(text("INSERT INTO reports (user_id, report_type) VALUES (1, 'weekly')"))
+                for column in ('status', 'error', 'completed_at', 'status_changed_at'):
+                    connection.execute(text(f'ALTER TABLE reports DROP COLUMN {column}'))
+                connection.execute(text('ALTER TABLE users DROP COLUMN report_data_version'))
+
+        result = self.app.test_cli_runner().invoke(args=['init-db', '--no-seed'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Added column reports.status_changed_at', result.output)
+        with self.app.app_context():
+            columns = {column['name'] for column in inspect(db.engine).get_columns('reports')}
+            self.assertTrue({'status', 'error', 'completed_at', 'status_changed_at'} <= columns)
+            self.assertEqual(db.session.get(Report, 1).status, 'ready')
+            self.assertEqual(db.session.get(User, 1).report_data_version, 0)
+
+        result = self.app.test_cli_runner().invoke(args=['init-db', '--no-seed'])
+        self.assertNotIn('Added column', result.output)
+
     def test_register_page(self):
         """Test registration page"""
         response = self.client.get('/register')
@@ -0,0 +1,166 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+from app import create_app
+from testing import AppTestCase
+from models import db, User, WorkoutLog, ExerciseLog, NutritionLog, Meal, MonthlyRollup
+from archive import read_log_range
+from history import HistoryLoader
+
+class LogArchiverTestCase(AppTestCase):
+    """Test cases for cold-storage archival and read-through"""
+
+    def setUp(self):
+        """Set up test environment with a year-old month and a recent month of logs"""
+        super().setUp()
+        self.app.config['ARCHIVE_ENABLED'] = True
+        self.app.config['ARCHIVE_FOLDER'] = tempfile.mkdtemp()
+        self.archiver = self.app.extensions['log_archiver']
+        self.today = date(2025, 3, 15)
+
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+
+            for day in (date(2024, 1, 5), date(2024, 1, 20), date(2025, 3, 1)):
+                workout = WorkoutLog(user_id=user.id, workout_type='Cardio', session_duration=0.5,
+                                     calories_burned=300, workout_date=day)
+                db.session.add(workout)
+                db.session.flush()
+                db.session.add(ExerciseLog(workout_id=workout.id, name_of_exercise='Burpees', sets=3))
+
+                nutrition = NutritionLog(user_id=user.id, calories=2000, carbs=200, log_date=day)
+                db.session.add(nutrition)
+                db.session.flush()
+                db.session.add(Meal(user_id=user.id, nutrition_log_id=nutrition.id,
+                                    meal_name='Lunch', calories=700, meal_date=day))
+            db.session.commit()
+            self.user_id = user.id
+
+    def tearDown(self):
+        """Clean up after tests"""
+        shutil.rmtree(self.app.config['ARCHIVE_FOLDER'], ignore_errors=True)
+        super().tearDown()
+
+    def test_archive_moves_old_months(self):
+        """Test old rows move to Parquet and leave a rollup"""
+        with self.app.app_context():
+            self.assertEqual(self.archiver.archive_old_logs(self.today), 1)
+
+            self.assertEqual(WorkoutLog.query.count(), 1)
+            self.assertEqual(ExerciseLog.query.count(), 1)
+            self.assertEqual(NutritionLog.query.count(), 1)
+            self.assertEqual(Meal.query.count(), 1)
+
+            rollup = MonthlyRollup.query.one()
+            self.assertEqual(rollup.month, date(2024, 1, 1))
+            self.assertEqual(rollup.workout_count, 2)
+            self.assertEqual(rollup.exercise_count, 2)
+            self.assertEqual(rollup.total_calories_burned, 600)
+            self.assertEqual(rollup.total_calories_consumed, 4000)
+            self.assertEqual(rollup.meal_count, 2)
+
+    def test_meals_stay_with_hot_logs(self):
+        """Test a meal dated in an archived month stays hot with its hot log"""
+        with self.app.app_context():
+            hot_log = NutritionLog.query.filter_by(log_date=date(2025, 3, 1)).one()
+            db.session.add(Meal(user_id=self.user_id, nutrition_log_id=hot_log.id, meal_name='Leftovers',
+                                calories=400, meal_date=date(2024, 1, 6)))
+            db.session.add(Meal(user_id=self.user_id, meal_name='Snack', calories=200, meal_date=date(2024, 1, 7)))
+            db.session.commit()
+
+            self.archiver.archive_old_logs(self.today)
+            self.assertEqual(sorted(meal.meal_name for meal in Meal.query), ['Leftovers', 'Lunch'])
+            self.assertEqual(MonthlyRollup.query.one().meal_count, 3)  # two lunches and the snack
+
+    def test_unreadable_archive_keeps_rows(self):
+        """Test rows stay in the database when their archive file can't be read back"""
+        with self.app.app_context():
+            with mock.patch.object(self.archiver, 'write_frame', side_effect=lambda path, frame: frame):
+                self.assertEqual(self.archiver.archive_old_logs(self.today), 0)
+            self.assertEqual(WorkoutLog.query.count(), 3)
+            self.assertEqual(MonthlyRollup.query.count(), 0)
+
+    def test_archival_job_is_opt_in(self):
+        """Test the nightly archival job is only scheduled with ARCHIVE_ENABLED"""
+        for enabled in (False, True):
+            app = create_app({
+                'TESTING': True,
+                'SQLALCHEMY_DATABASE_URI': self.app.config['SQLALCHEMY_DATABASE_URI'],
+                'ARCHIVE_ENABLED': enabled
+            })
+            job = app.extensions['email_service'].scheduler.get_job('archive_old_logs')
+            self.assertEqual(job is not None, enabled)
+
+    def test_rearchiving_merges_late_rows(self):
+        """Test rows added to an archived month are merged on the next run"""
+        with self.app.app_context():
+            self.archiver.archive_old_logs(self.today)
+            db.session.add(WorkoutLog(user_id=self.user_id, calories_burned=100,
+                                      workout_date=date(2024, 1, 25)))
+            db.session.commit()
+
+            self.archiver.archive_old_logs(self.today)
+            rollup = MonthlyRollup.query.one()
+            self.assertEqual(rollup.workout_count, 3)
+            self.assertEqual(rollup.total_calories_burned, 700)
+
+    def test_read_log_range_reads_through(self):
+        """Test range reads combine hot and archived rows"""
+        with self.app.app_context():
+            self.archiver.archive_old_logs(self.today)
+            workouts = read_log_range(self.user_id, 'workout_logs', date(2024, 1, 10), date(2025, 3, 31))
+
+        self.assertEqual(workouts['workout_date'].tolist(), [date(2024, 1, 20), date(2025, 3, 1)])
+        self.assertEqual(int(workouts['calories_burned'].sum()), 600)
+
+    def test_excel_reads_through(self):
+        """Test streamed Excel logs include archived months before hot ones"""
+        from report_generator import ReportGenerator
+
+        with self.app.app_context():
+            self.archiver.archive_old_logs(self.today)
+            generator = ReportGenerator(db.session.get(User, self.user_id), date(2024, 1, 10), date(2025, 3, 31))
+            rows = list(generator.iter_log_cells('workout_logs'))
+            totals, _ = generator.total_logs()
+
+        self.assertEqual([row[0] for row in rows], [date(2024, 1, 20), date(2025, 3, 1)])
+        self.assertEqual(int(totals.daily['calories_consumed'].sum()), 4000)
+
+    def test_history_reads_through(self):
+        """Test history pages continue into archived months"""
+        with self.app.app_context():
+            self.archiver.archive_old_logs(self.today)
+
+            first_page = HistoryLoader.get_workout_history(self.user_id, per_page=2)
+            second_page = HistoryLoader.get_workout_history(self.user_id, page=2, per_page=2)
+            nutrition = HistoryLoader.get_nutrition_history(self.user_id)
+
+        self.assertEqual([e.workout.workout_date for e in first_page], [date(2025, 3, 1), date(2024, 1, 20)])
+        self.assertEqual([e.workout.workout_date for e in second_page], [date(2024, 1, 5)])
+        self.assertEqual(second_page[0].exercises[0].name_of_exercise, 'Burpees')
+        self.assertEqual(len(nutrition), 3)
+        self.assertEqual(nutrition[2].meals[0].calories, 700)
+        self.assertEqual(HistoryLoader.serialize_workouts(second_page)[0]['workout_date'], '2024-01-05')
+
+    def test_history_merges_back_dated_rows(self):
+        """Test a hot log older than archived ones is paged after them"""
+        with self.app.app_context():
+            self.archiver.archive_old_logs(self.today)
+            db.session.add(WorkoutLog(user_id=self.user_id, calories_burned=100, workout_date=date(2023, 6, 1)))
+            db.session.commit()
+
+            first_page = HistoryLoader.get_workout_history(self.user_id, per_page=2)
+            second_page = HistoryLoader.get_workout_history(self.user_id, page=2, per_page=2)
+
+        self.assertEqual([e.workout.workout_date for e in first_page], [date(2025, 3, 1), date(2024, 1, 20)])
+        self.assertEqual([e.workout.workout_date for e in second_page], [date(2024, 1, 5), date(2023, 6, 1)])
+        self.assertEqual(second_page[0].exercises[0].name_of_exercise, 'Burpees')
+        self.assertEqual(second_page[1].exercises, [])
+
+if __name__ == '__main__':
+    unittest.main()
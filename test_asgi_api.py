@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from flask import Flask
+from starlette.testclient import TestClient
+from asgi_api import create_asgi_app
+from config import Config
+from models import db, User, WorkoutLog, ExerciseLog, NutritionLog
+from sqlite_profile import SQLiteProfile
+
+class AsgiApiTestCase(unittest.TestCase):
+    """Test cases for the async API tier"""
+
+    def setUp(self):
+        """Set up a file-backed SQLite app shared by Flask and the ASGI tier"""
+        self.db_dir = tempfile.mkdtemp()
+        self.flask_app = Flask(__name__)
+        self.flask_app.config.from_object(Config)
+        self.flask_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.db_dir, 'test.db')}"
+        db.init_app(self.flask_app)
+        SQLiteProfile(self.flask_app)
+
+        with self.flask_app.app_context():
+            db.create_all()
+            user = User(username='testuser', email='test@example.com', bmi=22.5)
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+        self.client = TestClient(create_asgi_app(self.flask_app))
+        self.client.__enter__()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.client.__exit__(None, None, None)
+        with self.flask_app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+
+    def login(self):
+        """Sign a Flask session cookie for the test user"""
+        serializer = self.flask_app.session_interface.get_signing_serializer(self.flask_app)
+        self.client.cookies.set(self.flask_app.config['SESSION_COOKIE_NAME'],
+                                serializer.dumps({'_user_id': str(self.user_id), '_fresh': True}))
+
+    def test_requires_flask_session(self):
+        """Test requests without a valid Flask session are rejected"""
+        self.assertEqual(self.client.get('/api/dashboard_data').status_code, 401)
+
+        self.client.cookies.set(self.flask_app.config['SESSION_COOKIE_NAME'], 'forged')
+        self.assertEqual(self.client.get('/api/dashboard_data').status_code, 401)
+
+    def test_log_workout_and_dashboard(self):
+        """Test writes through the async tier are visible to the shared models"""
+        self.login()
+        response = self.client.post('/log_workout', json={
+            'workout_type': 'Strength',
+            'session_duration': 1,
+            'calories_burned': 300,
+            'exercises': [{'name': 'Squats', 'sets': 3, 'reps': 10}]
+        })
+        self.assertEqual(response.status_code, 200)
+
+        data = self.client.get('/api/dashboard_data').json()
+        self.assertEqual(data['total_workouts'], 1)
+        self.assertEqual(data['total_calories_burned'], 300)
+        self.assertEqual(data['bmi'], 22.5)
+
+        with self.flask_app.app_context():
+            workout = WorkoutLog.query.one()
+            self.assertEqual(workout.user_id, self.user_id)
+            self.assertEqual(ExerciseLog.query.one().workout_id, workout.id)
+
+    def test_macro_breakdown(self):
+        """Test chart data is served from the async tier"""
+        self.login()
+        self.client.post('/log_nutrition', json={'carbs': 200, 'proteins': 100, 'fats': 50, 'calories': 2000})
+
+        data = self.client.get('/api/chart_data/macro_breakdown').json()
+        self.assertEqual(data['data'], [200, 100, 50])
+        self.assertEqual(self.client.get('/api/chart_data/unknown').status_code, 400)
+
+        with self.flask_app.app_context():
+            self.assertEqual(NutritionLog.query.count(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
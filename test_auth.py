@@ -0,0 +1,65 @@
+import threading
+import unittest
+from werkzeug.security import generate_password_hash
+from testing import AppTestCase
+from models import db, User
+
+class AuthTestCase(AppTestCase):
+    """Test cases for password hashing and login recording"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+        self.hasher = self.app.extensions['password_hasher']
+        self.recorder = self.app.extensions['login_recorder']
+
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com',
+                        password_hash=generate_password_hash('password123', 'pbkdf2:sha256:1000', 8))
+            db.session.add(user)
+            db.session.commit()
+
+    def login(self, password='password123', username='testuser'):
+        return self.client.post('/login', data={'username': username, 'password': password})
+
+    def get_user(self):
+        with self.app.app_context():
+            return User.query.filter_by(username='testuser').first()
+
+    def test_rehash_on_login(self):
+        """Test a hash made with old parameters is upgraded on login"""
+        self.assertTrue(self.hasher.needs_rehash(self.get_user().password_hash))
+
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+
+        password_hash = self.get_user().password_hash
+        self.assertTrue(password_hash.startswith(self.hasher.get_current_prefix() + '$'))
+        self.assertFalse(self.hasher.needs_rehash(password_hash))
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_invalid_credentials(self):
+        """Test wrong passwords and unknown users are rejected"""
+        self.assertEqual(self.login(password='wrong').status_code, 401)
+        self.assertEqual(self.login(username='nobody').status_code, 401)
+        self.assertTrue(self.hasher.needs_rehash(self.get_user().password_hash))
+
+    def test_busy_hasher_sheds_logins(self):
+        """Test logins are refused with 503 when the verification pool is full"""
+        self.hasher.slots = threading.BoundedSemaphore(0)
+        response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_last_login_batched(self):
+        """Test last_login is written on flush rather than during the login"""
+        self.assertEqual(self.login().status_code, 200)
+        self.assertIsNone(self.get_user().last_login)
+
+        self.assertEqual(self.recorder.flush(), 1)
+        self.assertIsNotNone(self.get_user().last_login)
+        self.assertEqual(self.recorder.flush(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+from testing import AppTestCase
+from models import db, User, WorkoutLog, Report
+from report_storage import LocalStorage
+from summary_views import create_summary_views
+
+class BulkReportsTestCase(AppTestCase):
+    """Test cases for bulk scheduled reports"""
+
+    def setUp(self):
+        """Set up test environment with three opted-in users"""
+        super().setUp()
+        self.app.config['MAIL_USERNAME'] = 'reports@example.com'
+        self.bulk = self.app.extensions['bulk_reports']
+        self.bulk.workers = 2
+        self.bulk.batch_size = 2  # more users than one batch
+        self.cache = self.app.extensions['report_cache']
+        self.cache.storage = LocalStorage(tempfile.mkdtemp())
+
+        with self.app.app_context():
+            create_summary_views()
+            for name in ('alice', 'bob', 'carol', 'dave'):
+                db.session.add(User(username=name, email=f'{name}@example.com', password_hash='x',
+                                    weekly_reports=name != 'dave'))
+            db.session.flush()
+            alice = User.query.filter_by(username='alice').one()
+            for offset in range(5):
+                db.session.add(WorkoutLog(user_id=alice.id, workout_type='Cardio', session_duration=0.5,
+                                          calories_burned=300, workout_date=date.today() - timedelta(days=offset)))
+            db.session.commit()
+
+        self.smtp = mock.patch('email_service.smtplib.SMTP').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        shutil.rmtree(self.cache.storage.folder, ignore_errors=True)
+        super().tearDown()
+
+    def send(self, report_format='pdf'):
+        with self.app.app_context():
+            return self.bulk.send('weekly', User.query.filter_by(weekly_reports=True), report_format)
+
+    def test_send_reports(self):
+        """Test every opted-in user gets a rendered report over one connection"""
+        run = self.send()
+        self.assertEqual((run.total, run.rendered, run.cached, run.sent), (3, 3, 0, 3))
+        self.assertEqual(run.failures, {})
+        self.assertEqual(self.smtp.call_count, 1)
+
+        server = self.smtp.return_value
+        recipients = sorted(call.args[1][0] for call in server.sendmail.call_args_list)
+        self.assertEqual(recipients, ['alice@example.com', 'bob@example.com', 'carol@example.com'])
+        self.assertIn('Content-Disposition: attachment', server.sendmail.call_args_list[0].args[2])
+
+        with self.app.app_context():
+            reports = Report.query.all()
+            self.assertEqual(len(reports), 3)
+            self.assertTrue(all(report.email_sent and report.status == 'ready' for report in reports))
+            self.assertEqual(reports[0].end_date - reports[0].start_date, timedelta(days=7))
+
+    def test_single_report(self):
+        """Test a one-off email attaches the report under a readable name"""
+        email_service = self.app.extensions['email_service']
+        with self.app.app_context():
+            user = User.query.filter_by(username='alice').one()
+            success, message = email_service.send_email_report(user, 'weekly', [user.email])
+        self.assertTrue(success, message)
+        sent = self.smtp.return_value.sendmail.call_args.args[2]
+        self.assertIn(f'filename= lifestyle_weekly_report_{date.today()}.pdf', sent)
+
+    def test_cached_reports(self):
+        """Test a second run sends the cached files without rendering"""
+        self.send()
+        run = self.send()
+        self.assertEqual((run.rendered, run.cached, run.sent), (0, 3, 3))
+
+    def test_excel_reports(self):
+        """Test the requested format is attached and logged, cached or not"""
+        for expected in ((3, 0), (0, 3)):
+            run = self.send('excel')
+            self.assertEqual((run.rendered, run.cached), expected)
+        for call in self.smtp.return_value.sendmail.call_args_list:
+            self.assertIn(f'filename= lifestyle_weekly_report_{date.today()}.xlsx', call.args[2])
+        with self.app.app_context():
+            self.assertEqual({report.report_format for report in Report.query.all()}, {'excel'})
+
+    def test_user_failures(self):
+        """Test a failed send is recorded and doesn't stop the run"""
+        def sendmail(sender, recipients, message):
+            if recipients == ['bob@example.com']:
+                raise OSError('mailbox unavailable')
+        self.smtp.return_value.sendmail.side_effect = sendmail
+
+        run = self.send()
+        self.assertEqual(run.sent, 2)
+        with self.app.app_context():
+            bob = User.query.filter_by(username='bob').one()
+            self.assertEqual(run.failures, {bob.id: 'mailbox unavailable'})
+            self.assertEqual(Report.query.count(), 2)
+        self.assertEqual(self.smtp.call_count, 2)  # reconnected after the failure
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import time
+import unittest
+from testing import AppTestCase
+from cli import seed_exercises
+from exercise_catalog import CatalogExercise, CatalogSnapshot, get_version, seed_version
+from models import db, User, Exercise, CatalogVersion
+
+def make_exercise(id, name, body_part='Arms', difficulty_level='Beginner',
+                  type_of_muscle='Upper', equipment_needed='None'):
+    return CatalogExercise(id=id, name=name, benefit=None, burns_calories_per_30min=None,
+                           target_muscle_group=None, equipment_needed=equipment_needed,
+                           difficulty_level=difficulty_level, body_part=body_part,
+                           type_of_muscle=type_of_muscle)
+
+class CatalogSnapshotTestCase(unittest.TestCase):
+    """Test cases for catalog indexes and search"""
+
+    def setUp(self):
+        self.snapshot = CatalogSnapshot(1, [
+            make_exercise(1, 'Push-ups'),
+            make_exercise(2, 'Dumbbell Bench Press', body_part='Chest', equipment_needed='Dumbbells, Bench'),
+            make_exercise(3, 'Barbell Bench Press', body_part='Chest', difficulty_level='Intermediate',
+                          equipment_needed='Barbell, Bench'),
+            make_exercise(4, 'Squats', body_part='Legs', type_of_muscle='Lower'),
+            make_exercise(5, 'Overhead Press', difficulty_level='Intermediate', equipment_needed='Barbell')
+        ])
+
+    def names(self, *args, **kwargs):
+        return [exercise.name for exercise in self.snapshot.autocomplete(*args, **kwargs)]
+
+    def test_prefix_search(self):
+        """Test every query word must prefix a word of the name"""
+        self.assertEqual(self.names('ben pr'), ['Barbell Bench Press', 'Dumbbell Bench Press'])
+        self.assertEqual(self.names('PUSH'), ['Push-ups'])
+        self.assertEqual(self.names('pr', limit=2), ['Barbell Bench Press', 'Dumbbell Bench Press'])
+
+    def test_filters(self):
+        """Test inverted index filters combine with search"""
+        self.assertEqual(self.names('bench', equipment='barbell'), ['Barbell Bench Press'])
+        self.assertEqual(self.names('', body_part='chest', difficulty_level='Beginner'), ['Dumbbell Bench Press'])
+        self.assertEqual(self.names('', type_of_muscle='Lower'), ['Squats'])
+        self.assertEqual(self.names('', equipment='rowing machine'), [])
+
+    def test_trigram_fallback(self):
+        """Test misspelt and mid-word queries fall back to trigram matches"""
+        self.assertEqual(self.names('sqauts')[:1], ['Squats'])
+        self.assertIn('Overhead Press', self.names('head'))
+
+class ExerciseCatalogTestCase(AppTestCase):
+    """Test cases for the versioned per-process catalog"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+        self.catalog = self.app.extensions['exercise_catalog']
+
+        with self.app.app_context():
+            seed_exercises()
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+    def test_autocomplete_api(self):
+        """Test the autocomplete endpoint filters and searches the catalog"""
+        response = self.client.get('/api/exercises/autocomplete?q=p&body_part=Core')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['name'] for e in response.get_json()['exercises']], ['Plank'])
+
+        response = self.client.get('/api/exercises/autocomplete?difficulty_level=Intermediate')
+        self.assertEqual([e['name'] for e in response.get_json()['exercises']], ['Burpees', 'Mountain Climbers'])
+
+    def test_version_bump_reloads(self):
+        """Test ORM changes to exercises bump the version and refresh the catalog"""
+        with self.app.app_context():
+            self.assertEqual(get_version(), 1)  # seeding
+            self.assertEqual(self.catalog.autocomplete('lunge'), [])
+
+            db.session.add(Exercise(name='Walking Lunges', body_part='Legs'))
+            db.session.commit()
+            self.assertEqual(get_version(), 2)
+            self.assertEqual([e.name for e in self.catalog.autocomplete('lunge')], ['Walking Lunges'])
+
+            # Unrelated writes leave the version alone
+            db.session.add(User(username='other', email='other@example.com', password_hash='x'))
+            db.session.commit()
+            self.assertEqual(get_version(), 2)
+
+    def test_bump_only_updates(self):
+        """Test seeding keeps the version row and a bump never inserts one"""
+        with self.app.app_context():
+            seed_version()
+            self.assertEqual(get_version(), 1)
+
+            db.session.execute(CatalogVersion.__table__.delete())
+            db.session.commit()
+            db.session.add(Exercise(name='Walking Lunges', body_part='Legs'))
+            db.session.commit()
+            self.assertEqual(CatalogVersion.query.count(), 0)
+
+    def test_cached_between_checks(self):
+        """Test the snapshot is reused until the check interval passes"""
+        with self.app.app_context():
+            snapshot = self.catalog.get_snapshot()
+            db.session.execute(Exercise.__table__.delete())  # bypasses the ORM bump
+            db.session.commit()
+            self.assertIs(self.catalog.get_snapshot(), snapshot)
+
+            self.catalog.checked_at = time.monotonic() - self.catalog.check_interval
+            self.assertIs(self.catalog.get_snapshot(), snapshot)  # version unchanged
+
+if __name__ == '__main__':
+    unittest.main()
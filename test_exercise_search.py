@@ -0,0 +1,74 @@
+import unittest
+from testing import AppTestCase
+from cli import seed_exercises
+from exercise_search import create_search_index, search_exercises, _search_like
+from models import db, User, Exercise
+
+class ExerciseSearchTestCase(AppTestCase):
+    """Test cases for full-text exercise search"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            seed_exercises()  # indexed by the rebuild below
+            create_search_index()
+            db.session.add(Exercise(name='Plank Jacks', target_muscle_group='Core',
+                                    instructions='From a plank, jump feet out and in'))
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+    def names(self, query, **kwargs):
+        with self.app.app_context():
+            exercises, total = search_exercises(query, **kwargs)
+        return [exercise.name for exercise in exercises], total
+
+    def test_ranked_prefix_search(self):
+        """Test name matches outrank matches in other columns"""
+        names, total = self.names('plank')
+        self.assertEqual(total, 5)  # also in Push-ups, Burpees and Mountain Climbers instructions
+        self.assertEqual(set(names[:2]), {'Plank', 'Plank Jacks'})
+
+        names, total = self.names('shoulder core')
+        self.assertEqual(total, 3)
+        self.assertEqual(names[0], 'Plank')  # both words in its target muscle group
+        self.assertEqual(self.names('squ'), (['Squats', 'Burpees'], 2))
+
+    def test_index_follows_updates(self):
+        """Test the triggers keep the index in step with the table"""
+        with self.app.app_context():
+            exercise = Exercise.query.filter_by(name='Plank Jacks').first()
+            exercise.name = 'Star Jumps'
+            db.session.commit()
+        self.assertEqual(self.names('star jump')[0], ['Star Jumps'])
+        self.assertNotIn('Plank Jacks', self.names('plank')[0])
+
+    def test_query_syntax_is_ignored(self):
+        """Test operators and quotes in user input are treated as plain words"""
+        self.assertEqual(self.names('"plank" OR NOT*')[1], 0)
+        self.assertEqual(self.names('  -*()  '), ([], 0))
+        self.assertEqual(self.names('mountain"')[0], ['Mountain Climbers'])
+
+    def test_pagination_api(self):
+        """Test the search endpoint pages through ranked results"""
+        response = self.client.get('/api/exercises/search?q=plank&per_page=3&page=2')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual((data['page'], data['per_page'], data['total']), (2, 3, 5))
+        self.assertEqual(len(data['exercises']), 2)
+
+    def test_like_fallback(self):
+        """Test the fallback for backends without a full-text index"""
+        with self.app.app_context():
+            rows, total = _search_like(['plank'], 10, 0)
+        self.assertEqual(total, 5)
+        self.assertEqual({row.name for row in rows[:2]}, {'Plank', 'Plank Jacks'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import csv
+import io
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from testing import AppTestCase
+from models import db, User, WorkoutLog, ExerciseLog, NutritionLog, Meal
+from exports import iter_export_batches, stream_export
+
+class ExportTestCase(AppTestCase):
+    """Test cases for streamed raw log exports"""
+
+    def setUp(self):
+        """Set up test environment with two users' logs, one month of them archived"""
+        super().setUp()
+        self.app.config['ARCHIVE_ENABLED'] = True
+        self.app.config['ARCHIVE_FOLDER'] = tempfile.mkdtemp()
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            users = []
+            for name in ('testuser', 'otheruser'):
+                user = User(username=name, email=f'{name}@example.com')
+                user.set_password('password123')
+                db.session.add(user)
+                users.append(user)
+            db.session.flush()
+
+            for user in users:
+                for day in (date(2024, 1, 5), date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 3)):
+                    workout = WorkoutLog(user_id=user.id, workout_type='Cardio', session_duration=0.5,
+                                         calories_burned=300, workout_date=day)
+                    db.session.add(workout)
+                    db.session.flush()
+                    db.session.add(ExerciseLog(workout_id=workout.id, name_of_exercise='Burpees', sets=3))
+
+                    nutrition = NutritionLog(user_id=user.id, calories=2000, log_date=day)
+                    db.session.add(nutrition)
+                    db.session.flush()
+                    db.session.add(Meal(user_id=user.id, nutrition_log_id=nutrition.id,
+                                        meal_name='Lunch', calories=700, meal_date=day))
+            db.session.commit()
+            self.user_id = users[0].id
+
+            self.app.extensions['log_archiver'].archive_old_logs(date(2025, 3, 15))
+
+    def tearDown(self):
+        """Clean up after tests"""
+        shutil.rmtree(self.app.config['ARCHIVE_FOLDER'], ignore_errors=True)
+        super().tearDown()
+
+    def login(self):
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+    def test_csv_export(self):
+        """Test the CSV export holds the user's hot and archived rows in range"""
+        self.login()
+        response = self.client.get('/export/workout_logs.csv?start_date=2024-01-01&end_date=2025-03-02')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('workout_logs.csv', response.headers['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual([row['workout_date'] for row in rows], ['2024-01-05', '2025-03-01', '2025-03-02'])
+        self.assertEqual({row['user_id'] for row in rows}, {str(self.user_id)})
+
+    def test_exercise_export(self):
+        """Test exercises are exported by their workout's user and date"""
+        self.login()
+        response = self.client.get('/export/exercise_logs.csv?start_date=2024-01-01&end_date=2024-12-31')
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['name_of_exercise'], 'Burpees')
+
+    def test_parquet_row_groups(self):
+        """Test Parquet is written one row group per batch and reads back"""
+        import pyarrow.parquet as pq
+
+        with self.app.test_request_context():
+            batches = iter_export_batches('meals', user_id=self.user_id, batch_size=2)
+            data = b''.join(stream_export('meals', 'parquet', batches))
+
+        parquet = pq.ParquetFile(io.BytesIO(data))
+        self.assertEqual(parquet.metadata.num_rows, 4)
+        # the archived month, then three hot rows in batches of two
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        table = parquet.read()
+        self.assertEqual(table.column('meal_date').to_pylist(),
+                         [date(2024, 1, 5), date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 3)])
+        self.assertEqual(set(table.column('user_id').to_pylist()), {self.user_id})
+
+    def test_meals_across_archive_boundary(self):
+        """Test a back-dated meal of a hot log is exported once, from the hot rows"""
+        with self.app.app_context():
+            hot_log = NutritionLog.query.filter_by(user_id=self.user_id, log_date=date(2025, 3, 1)).one()
+            db.session.add(Meal(user_id=self.user_id, nutrition_log_id=hot_log.id, meal_name='Leftovers',
+                                calories=400, meal_date=date(2024, 1, 6)))
+            db.session.commit()
+            self.app.extensions['log_archiver'].archive_old_logs(date(2025, 3, 15))
+            self.assertEqual(Meal.query.filter_by(meal_name='Leftovers').count(), 1)
+
+        self.login()
+        response = self.client.get('/export/meals.csv?start_date=2024-01-01&end_date=2025-03-31')
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(sorted(row['meal_date'] for row in rows),
+                         ['2024-01-05', '2024-01-06', '2025-03-01', '2025-03-02', '2025-03-03'])
+        self.assertEqual([row['meal_name'] for row in rows if row['meal_date'] == '2024-01-06'], ['Leftovers'])
+
+    def test_all_users_export(self):
+        """Test exports without a user cover everyone"""
+        with self.app.test_request_context():
+            rows = [row for batch in iter_export_batches('nutrition_logs') for row in batch]
+        self.assertEqual(len(rows), 8)
+
+    def test_export_errors(self):
+        """Test unknown tables or formats and bad dates are rejected"""
+        self.login()
+        self.assertEqual(self.client.get('/export/users.csv').status_code, 404)
+        self.assertEqual(self.client.get('/export/meals.json').status_code, 404)
+        self.assertEqual(self.client.get('/export/meals.csv?start_date=yesterday').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from datetime import date, timedelta
+from sqlalchemy import event
+from testing import AppTestCase
+from models import db, User, WorkoutLog, ExerciseLog, NutritionLog, Meal
+from history import HistoryLoader
+
+class HistoryLoaderTestCase(AppTestCase):
+    """Test cases for batched workout and nutrition history loading"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+
+            for day in range(50):
+                workout = WorkoutLog(user_id=user.id, workout_type='Strength',
+                                     calories_burned=300, workout_date=date(2024, 1, 1) + timedelta(days=day))
+                db.session.add(workout)
+                db.session.flush()
+                db.session.add_all([
+                    ExerciseLog(workout_id=workout.id, name_of_exercise='Squats', sets=3, reps=10),
+                    ExerciseLog(workout_id=workout.id, name_of_exercise='Plank', sets=3, reps=1)
+                ])
+
+            nutrition = NutritionLog(user_id=user.id, calories=2000, log_date=date(2024, 1, 1))
+            db.session.add(nutrition)
+            db.session.flush()
+            db.session.add(Meal(user_id=user.id, nutrition_log_id=nutrition.id,
+                                meal_name='Breakfast', calories=500, meal_date=date(2024, 1, 1)))
+            db.session.commit()
+            self.user_id = user.id
+
+    def get_statements(self, func):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            return func(), statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    def test_workout_page_costs_two_queries(self):
+        """Test a 50-workout page loads parents and children in two queries"""
+        with self.app.app_context():
+            history, statements = self.get_statements(
+                lambda: HistoryLoader.get_workout_history(self.user_id, per_page=50)
+            )
+
+        self.assertEqual(len(statements), 2)
+        self.assertNotIn('monthly_rollups', ' '.join(statements))
+        self.assertEqual(len(history), 50)
+        self.assertEqual(history[0].workout.workout_date, date(2024, 2, 19))
+        self.assertEqual([e.name_of_exercise for e in history[0].exercises], ['Squats', 'Plank'])
+
+    def test_archived_months_looked_up_when_enabled(self):
+        """Test history looks up archived months first only with ARCHIVE_ENABLED"""
+        self.app.config['ARCHIVE_ENABLED'] = True
+        with self.app.app_context():
+            _, statements = self.get_statements(
+                lambda: HistoryLoader.get_workout_history(self.user_id, per_page=50)
+            )
+        self.assertEqual(len(statements), 3)
+        self.assertIn('monthly_rollups', statements[0])
+
+    def test_workout_history_date_range(self):
+        """Test workout history honours the date range"""
+        with self.app.app_context():
+            history = HistoryLoader.get_workout_history(
+                self.user_id, start_date=date(2024, 1, 1), end_date=date(2024, 1, 5)
+            )
+        self.assertEqual(len(history), 5)
+
+    def test_history_apis(self):
+        """Test the JSON history endpoints"""
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+        response = self.client.get('/api/workouts?per_page=10&page=2')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data['workouts']), 10)
+        self.assertEqual(len(data['workouts'][0]['exercises']), 2)
+
+        response = self.client.get('/api/nutrition')
+        data = response.get_json()
+        self.assertEqual(data['nutrition_logs'][0]['log_date'], '2024-01-01')
+        self.assertEqual(data['nutrition_logs'][0]['meals'][0]['meal_name'], 'Breakfast')
+
+        response = self.client.get('/api/workouts?start_date=01-01-2024')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from datetime import date, timedelta
+from testing import AppTestCase
+from models import db, User, WorkoutLog, NutritionLog
+from queries import HotQueries
+
+class HotQueriesTestCase(AppTestCase):
+    """Test cases for the cached hot query registry"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+
+        with self.app.app_context():
+            for name in ('alice', 'bob'):
+                user = User(username=name, email=f'{name}@example.com')
+                user.set_password('password123')
+                db.session.add(user)
+            db.session.commit()
+
+            today = date.today()
+            for user_id in (1, 2):
+                for days_ago in range(10):
+                    db.session.add(WorkoutLog(user_id=user_id, workout_type='Cardio',
+                                              calories_burned=100 * user_id,
+                                              workout_date=today - timedelta(days=days_ago)))
+                    db.session.add(NutritionLog(user_id=user_id, calories=2000,
+                                                log_date=today - timedelta(days=days_ago)))
+            db.session.commit()
+
+    def test_bound_parameters(self):
+        """Test closure values are bound per call rather than baked into the cached statement"""
+        with self.app.app_context():
+            first = HotQueries.recent_workouts(1, 5)
+            second = HotQueries.recent_workouts(2, 3)
+            since = HotQueries.nutrition_since(2, date.today() - timedelta(days=3))
+
+        self.assertEqual(len(first), 5)
+        self.assertTrue(all(w.user_id == 1 for w in first))
+        self.assertEqual(len(second), 3)
+        self.assertTrue(all(w.user_id == 2 for w in second))
+        self.assertEqual(first[0].workout_date, date.today())
+        self.assertEqual(len(since), 4)
+
+    def test_compile_cache_hits_reported(self):
+        """Test repeated hot queries are served from the compile cache"""
+        instrumentation = self.app.extensions['query_instrumentation']
+
+        with self.app.app_context():
+            HotQueries.recent_nutrition(1, 7)
+
+        with self.app.test_request_context('/'):
+            instrumentation.start_request()
+            HotQueries.recent_nutrition(2, 7)
+            HotQueries.recent_nutrition(1, 3)
+            stats = instrumentation.get_stats()
+
+        self.assertEqual(stats['cache_misses'], 0)
+        self.assertEqual(stats['cache_hits'], 2)
+        self.assertEqual(stats['cache_hit_rate'], 100.0)
+        self.assertGreater(instrumentation.get_cache_stats()['cache_hits'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
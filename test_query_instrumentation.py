@@ -0,0 +1,44 @@
+import unittest
+from flask import g
+from testing import AppTestCase
+from models import db, User
+
+class QueryInstrumentationTestCase(AppTestCase):
+    """Test cases for per-request query instrumentation"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+
+    def test_server_timing_header(self):
+        """Test database time and query count are reported per request"""
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+        response = self.client.get('/api/dashboard_data')
+
+        server_timing = response.headers.get_all('Server-Timing')
+        self.assertTrue(any(value.startswith('db;dur=') for value in server_timing))
+        self.assertTrue(any('queries' in value for value in server_timing))
+
+    def test_repeated_statements_flagged(self):
+        """Test identical statements above the threshold are reported as N+1"""
+        instrumentation = self.app.extensions['query_instrumentation']
+        threshold = self.app.config['QUERY_N_PLUS_ONE_THRESHOLD']
+
+        with self.app.test_request_context('/'):
+            instrumentation.start_request()
+            for user_id in range(threshold):
+                db.session.get(User, user_id + 100)
+            stats = instrumentation.get_stats()
+
+        self.assertEqual(stats['queries'], threshold)
+        self.assertEqual(list(stats['repeated_statements'].values()), [threshold])
+
+if __name__ == '__main__':
+    unittest.main()
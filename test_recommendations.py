@@ -0,0 +1,68 @@
+import unittest
+from datetime import date
+from testing import AppTestCase
+from cli import seed_exercises
+from models import db, User, WorkoutLog, ExerciseLog, Exercise
+
+class RecommendationsTestCase(AppTestCase):
+    """Test cases for exercise recommendations"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+        self.recommender = self.app.extensions['exercise_recommender']
+
+        with self.app.app_context():
+            seed_exercises()
+            user = User(username='testuser', email='test@example.com', experience_level=1)
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+    def log_exercises(self, *exercises):
+        with self.app.app_context():
+            workout = WorkoutLog(user_id=self.user_id, workout_type='Strength', workout_date=date.today())
+            db.session.add(workout)
+            db.session.flush()
+            for name, sets in exercises:
+                db.session.add(ExerciseLog(workout_id=workout.id, name_of_exercise=name, sets=sets))
+            db.session.commit()
+
+    def recommend(self, limit=5):
+        response = self.client.get(f'/api/exercises/recommendations?limit={limit}')
+        self.assertEqual(response.status_code, 200)
+        return [exercise['name'] for exercise in response.get_json()['exercises']]
+
+    def test_without_history_prefers_level(self):
+        """Test a new beginner is offered beginner exercises first"""
+        names = self.recommend()
+        self.assertEqual(set(names[:3]), {'Push-ups', 'Squats', 'Plank'})
+        self.assertEqual(len(names), 5)
+
+    def test_favors_under_trained_areas(self):
+        """Test recently trained exercises are skipped and untrained areas lead"""
+        self.log_exercises(('Push-ups', 4), ('Plank', 3))
+        names = self.recommend()
+        self.assertNotIn('Push-ups', names)
+        self.assertNotIn('Plank', names)
+        self.assertEqual(names[0], 'Squats')
+
+    def test_index_cached_per_catalog_version(self):
+        """Test the index is reused until the catalog changes"""
+        with self.app.app_context():
+            index = self.recommender.get_index()
+            self.assertIs(self.recommender.get_index(), index)
+
+            db.session.add(Exercise(name='Glute Bridge', body_part='Legs', difficulty_level='Beginner',
+                                    target_muscle_group='Glutes, Hamstrings', type_of_muscle='Lower'))
+            db.session.commit()
+            rebuilt = self.recommender.get_index()
+            self.assertIsNot(rebuilt, index)
+            self.assertEqual(rebuilt.features.shape[0], 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from testing import AppTestCase
+from models import db, User, WorkoutLog
+from report_storage import LocalStorage
+from summary_views import create_summary_views
+
+class ReportCacheTestCase(AppTestCase):
+    """Test cases for the content-addressed report cache"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.cache = self.app.extensions['report_cache']
+        self.cache.storage = LocalStorage(tempfile.mkdtemp())
+        self.end = date(2025, 3, 31)
+        self.start = self.end - timedelta(days=7)
+        self.renders = 0
+
+        with self.app.app_context():
+            create_summary_views()
+            user = User(username='testuser', email='test@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+    def tearDown(self):
+        """Clean up after tests"""
+        shutil.rmtree(self.cache.storage.folder, ignore_errors=True)
+        super().tearDown()
+
+    def get_generator(self, user, start_date, end_date, spool_size):
+        test = self
+
+        class Generator:
+            def render(self, report_format):
+                test.renders += 1
+                return io.BytesIO(b'%PDF' + b'0' * 1024)
+        return Generator()
+
+    def render(self, start_date=None):
+        user = db.session.get(User, self.user_id)
+        storage_key = self.cache.render(user, start_date or self.start, self.end, 'pdf', self.get_generator)
+        return self.cache.storage.get_path(storage_key)
+
+    def test_cache_hit(self):
+        """Test an unchanged report is rendered once"""
+        with self.app.app_context():
+            first = self.render()
+            second = self.render()
+        self.assertEqual(first, second)
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(os.listdir(self.cache.storage.folder), [os.path.basename(first)])
+
+    def test_fresh_render_stream(self):
+        """Test a fresh render is returned from memory and a hit from disk"""
+        with self.app.app_context():
+            user = db.session.get(User, self.user_id)
+            storage_key, stream = self.cache.open(user, self.start, self.end, 'pdf', self.get_generator)
+            with stream:
+                self.assertIsInstance(stream, io.BytesIO)
+                self.assertTrue(stream.read().startswith(b'%PDF'))
+            _, stream = self.cache.open(user, self.start, self.end, 'pdf', self.get_generator)
+            with stream:
+                self.assertEqual(stream.name, self.cache.storage.get_path(storage_key))
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(os.listdir(self.cache.storage.folder), [storage_key])  # no .part left
+
+    def test_data_change(self):
+        """Test new logs give the report a new key"""
+        with self.app.app_context():
+            first = self.render()
+            db.session.add(WorkoutLog(user_id=self.user_id, workout_type='Cardio', workout_date=self.end))
+            db.session.commit()
+            second = self.render()
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.renders, 2)
+
+    def test_bookkeeping_keeps_cache(self):
+        """Test logins, passwords and email preferences don't invalidate reports"""
+        from report_cache import get_data_version
+
+        with self.app.app_context():
+            user = db.session.get(User, self.user_id)
+            user.last_login = datetime.utcnow()
+            user.set_password('another password')
+            user.daily_reports = True
+            db.session.commit()
+            self.assertEqual(get_data_version(self.user_id), 0)
+
+            user.weight = 70.0
+            db.session.commit()
+            self.assertEqual(get_data_version(self.user_id), 1)
+
+    def test_data_versions(self):
+        """Test data versions are kept on the user's row and every bump counts"""
+        from report_cache import get_data_version, get_data_versions, bump_data_versions
+
+        with self.app.app_context():
+            self.assertEqual(get_data_version(self.user_id), 0)
+            for _ in range(2):  # the first bump updates an existing row too
+                bump_data_versions(db.session, [self.user_id])
+                db.session.commit()
+            self.assertEqual(get_data_versions([self.user_id, 999]), {self.user_id: 2, 999: 0})
+            self.assertEqual(db.session.get(User, self.user_id).report_data_version, 2)
+
+    def test_date_range(self):
+        """Test different ranges are cached separately"""
+        with self.app.app_context():
+            weekly = self.render()
+            monthly = self.render(self.end - timedelta(days=30))
+        self.assertNotEqual(weekly, monthly)
+
+    def test_eviction(self):
+        """Test expired and least recently used reports are evicted"""
+        with self.app.app_context():
+            expired = self.render()
+            os.utime(expired, (0, 0))
+            old = self.render(self.end - timedelta(days=1))
+            self.assertFalse(os.path.exists(expired))
+
+            self.cache.max_bytes = 1500  # room for one report
+            stamp = time.time() - 60
+            os.utime(old, (stamp, stamp))
+            new = self.render(self.end - timedelta(days=2))
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+
+if __name__ == '__main__':
+    unittest.main()
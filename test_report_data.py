@@ -0,0 +1,216 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from datetime import date, timedelta
+from sqlalchemy import event
+from testing import AppTestCase
+from models import db, User, WorkoutLog, NutritionLog
+from report_data import ReportDataset
+from report_generator import ReportGenerator, get_table_style
+from summary_views import create_summary_views
+
+class ReportDatasetTestCase(AppTestCase):
+    """Test cases for the shared report dataset"""
+
+    def setUp(self):
+        """Set up test environment with two months of logs"""
+        super().setUp()
+        self.end = date(2025, 3, 31)
+        self.start = self.end - timedelta(days=59)
+
+        with self.app.app_context():
+            create_summary_views()
+            user = User(username='testuser', email='test@example.com', bmi=22.5)
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+
+            for offset in range(0, 60, 2):
+                day = self.start + timedelta(days=offset)
+                db.session.add(WorkoutLog(user_id=user.id, workout_type='Cardio' if offset % 4 else 'Strength',
+                                          session_duration=0.5, calories_burned=300, workout_date=day))
+                db.session.add(NutritionLog(user_id=user.id, calories=2000, carbs=200, proteins=100,
+                                            fats=70, water_intake=2.0, log_date=day))
+            db.session.add(NutritionLog(user_id=user.id, calories=500, log_date=self.start))
+            db.session.commit()
+            self.user_id = user.id
+
+    def count_queries(self, func):
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return len(statements)
+
+    def test_fixed_query_count(self):
+        """Test a report queries the same few times whatever its range"""
+        with self.app.app_context():
+            user = db.session.get(User, self.user_id)
+            counts = []
+            for days in (1, 60):
+                generator = ReportGenerator(user, self.end - timedelta(days=days - 1), self.end)
+                counts.append(self.count_queries(lambda: (
+                    generator.get_user_summary_data(), generator.get_summary_data(),
+                    generator.generate_excel_report(io.BytesIO())
+                )))
+            self.assertEqual(counts[0], counts[1])
+            self.assertLessEqual(counts[1], 5)
+
+    def test_load_many(self):
+        """Test several users' datasets load with the same few queries as one"""
+        with self.app.app_context():
+            other = User(username='other', email='other@example.com', password_hash='x')
+            db.session.add(other)
+            db.session.commit()
+            users = [db.session.get(User, self.user_id), other]
+            other_id = other.id  # loads the committed row before counting
+
+            datasets = {}
+            count = self.count_queries(lambda: datasets.update(ReportDataset.load_many(users, self.start, self.end)))
+            single = ReportDataset.load(users[0], self.start, self.end)
+        self.assertLessEqual(count, 5)
+        self.assertTrue(datasets[self.user_id].workouts.equals(single.workouts))
+        self.assertTrue(datasets[self.user_id].daily.equals(single.daily))
+        self.assertTrue(datasets[other_id].workouts.empty)
+        self.assertEqual(datasets[other_id].daily['workouts'].sum(), 0)
+
+        detached = datasets[self.user_id].detach()
+        self.assertEqual(detached.user.username, 'testuser')
+        self.assertNotIsInstance(detached.user, User)
+
+    def test_daily_frame(self):
+        """Test daily totals cover every day of the range"""
+        with self.app.app_context():
+            dataset = ReportDataset.load(db.session.get(User, self.user_id), self.start, self.end)
+        daily = dataset.daily
+        self.assertEqual(len(daily), 60)
+        self.assertEqual(daily['calories_consumed'].iloc[0], 2500)
+        self.assertEqual(daily['caloric_balance'].iloc[0], 2200)
+        self.assertEqual(daily['calories_burned'].iloc[1], 0)
+        self.assertEqual(daily['consistency_score'].iloc[-1], 60)  # 3 of 5 days in the last week
+        self.assertEqual(dataset.get_consistency_score(), 69)  # 30 of 43 target days
+
+    def test_sections_agree(self):
+        """Test PDF tables and Excel sheets are derived from the same data"""
+        with self.app.app_context():
+            generator = ReportGenerator(db.session.get(User, self.user_id), self.start, self.end)
+            workouts = generator.get_workout_analysis_data()
+            nutrition = generator.get_nutrition_analysis_data()
+            self.assertEqual(workouts['Total Workouts'], '30')
+            self.assertEqual(workouts['Total Calories Burned'], '9,000')
+            self.assertEqual(workouts['Average Duration'], '30 minutes')
+            self.assertEqual(nutrition['Average Daily Calories'], '2,017')
+            self.assertEqual(generator.get_summary_data()['Activity Summary'], workouts)
+
+            totals, widths = generator.total_logs()
+            self.assertEqual(generator.get_summary_data(totals), generator.get_summary_data())
+            self.assertTrue(totals.daily.equals(generator.dataset.daily))
+            self.assertEqual(widths['workout_logs'][:4], [10, 8, 2, 3])
+
+            rows = list(generator.iter_log_cells('workout_logs'))
+            self.assertEqual(rows[0], [self.start, 'Strength', 30, 300, None, None, None])
+            self.assertEqual(len(list(generator.iter_log_cells('nutrition_logs'))), 31)
+
+    def test_streamed_rows(self):
+        """Test the Excel logs come from a cursor in batches, not a dataset"""
+        from report_data import iter_report_logs
+
+        with self.app.app_context():
+            generator = ReportGenerator(db.session.get(User, self.user_id), self.start, self.end)
+            generator.generate_excel_report(io.BytesIO())
+            self.assertIsNone(generator._dataset)  # nothing was loaded into frames
+
+            rows = iter_report_logs(self.user_id, 'nutrition_logs', self.start, self.end, batch_size=4)
+            self.assertEqual([row[0] for row in rows][:3], [self.start, self.start, self.start + timedelta(days=2)])
+
+    def test_streamed_excel(self):
+        """Test the write-only workbook keeps every row and sizes columns"""
+        import openpyxl
+
+        with self.app.app_context():
+            generator = ReportGenerator(db.session.get(User, self.user_id), self.start, self.end)
+            handle, path = tempfile.mkstemp(suffix='.xlsx')
+            os.close(handle)
+            try:
+                generator.generate_excel_report(path)
+                wb = openpyxl.load_workbook(path)
+            finally:
+                os.remove(path)
+
+        self.assertEqual(wb.sheetnames, ['User Profile', 'Workout Data', 'Nutrition Data',
+                                         'Daily Stats', 'Summary', 'Charts'])
+        workouts = wb['Workout Data']
+        self.assertEqual(workouts.max_row, 31)
+        self.assertTrue(workouts['A1'].font.bold)
+        self.assertEqual(workouts['B2'].value, 'Strength')
+        self.assertEqual(workouts.column_dimensions['A'].width, 12)  # a date plus padding
+        self.assertEqual(workouts.column_dimensions['D'].width, 17)  # the header
+        self.assertEqual(wb['Daily Stats'].max_row, 61)
+        self.assertIn('A1:D1', wb['Summary'].merged_cells)
+        self.assertEqual(workouts['A2'].number_format, 'yyyy-mm-dd')
+
+    def test_native_charts(self):
+        """Test the Charts sheet holds Excel charts over the data ranges"""
+        import openpyxl
+
+        with self.app.app_context():
+            generator = ReportGenerator(db.session.get(User, self.user_id), self.start, self.end)
+            handle, path = tempfile.mkstemp(suffix='.xlsx')
+            os.close(handle)
+            try:
+                generator.generate_excel_report(path)
+                with zipfile.ZipFile(path) as archive:
+                    names = sorted(archive.namelist())
+                    charts = [archive.read(name).decode() for name in names if name.startswith('xl/charts/')]
+                ws = openpyxl.load_workbook(path)['Charts']
+            finally:
+                os.remove(path)
+
+        self.assertEqual(len(charts), 4)
+        self.assertIn("'Daily Stats'!$B$2:$B$61", charts[0])  # calories burned
+        self.assertIn("'Daily Stats'!$G$2:$G$61", charts[1])  # consistency
+        self.assertIn("'Charts'!$B$4:$B$6", charts[2])  # macro totals
+        self.assertIn("'Charts'!$B$9:$B$10", charts[3])  # workout types
+        self.assertEqual([row for row in ws.iter_rows(min_row=4, max_row=6, max_col=2, values_only=True)],
+                         [('Carbs', 6000), ('Proteins', 3000), ('Fats', 2100)])
+        self.assertEqual({ws['A9'].value, ws['A10'].value}, {'Cardio', 'Strength'})
+        self.assertFalse([name for name in names if name.startswith('xl/media/')])  # nothing rasterized
+
+    def test_render_in_memory(self):
+        """Test reports render into a buffer that spills to disk only when large"""
+        with self.app.app_context():
+            user = db.session.get(User, self.user_id)
+            with ReportGenerator(user, self.start, self.end).render('pdf') as buffer:
+                self.assertFalse(buffer._rolled)  # still in memory
+                self.assertTrue(buffer.read().startswith(b'%PDF'))
+            with ReportGenerator(user, self.start, self.end, spool_size=1024).render('excel') as buffer:
+                self.assertTrue(buffer._rolled)  # spilled to a temporary file
+                self.assertTrue(buffer.read().startswith(b'PK'))
+
+    def test_pdf_styles_shared(self):
+        """Test PDF styles are built once and charts are vector drawings"""
+        from reportlab.graphics.shapes import Drawing
+
+        with self.app.app_context():
+            user = db.session.get(User, self.user_id)
+            first = ReportGenerator(user, self.start, self.end)
+            second = ReportGenerator(user, self.start, self.end)
+            self.assertIs(first.styles, second.styles)
+            with self.assertRaises(TypeError):
+                first.styles['ReportBody'] = None
+
+            self.assertIs(get_table_style('workout_analysis'), get_table_style('workout_analysis'))
+
+            chart = first.create_calorie_chart()
+            self.assertIsInstance(chart, Drawing)
+            self.assertEqual(len(chart.contents[0].data[0]), 60)  # one point per day
+            self.assertIsInstance(first.create_macro_chart(), Drawing)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta
+from testing import AppTestCase
+from models import db, User, Report
+from report_storage import LocalStorage
+from summary_views import create_summary_views
+
+class ReportJobsTestCase(AppTestCase):
+    """Test cases for background report generation"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+        self.jobs = self.app.extensions['report_jobs']
+        self.paths = []
+        self.storage = self.app.extensions['report_cache'].storage = LocalStorage(tempfile.mkdtemp())
+
+        # Keep the futures so tests can wait for renders to finish
+        self.futures = []
+        submit = self.jobs.submit
+        self.jobs.submit = lambda report_id: self.futures.append(submit(report_id)) or self.futures[-1]
+
+        with self.app.app_context():
+            create_summary_views()
+            user = User(username='testuser', email='test@example.com', bmi=22.5)
+            user.set_password('password123')
+            other = User(username='other', email='other@example.com', password_hash='x')
+            db.session.add_all([user, other])
+            db.session.commit()
+            self.other_id = other.id
+
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+    def tearDown(self):
+        """Clean up after tests"""
+        shutil.rmtree(self.storage.folder, ignore_errors=True)
+        super().tearDown()
+
+    def generate(self, report_format):
+        response = self.client.post('/generate_report', json={'type': 'weekly', 'format': report_format})
+        if response.status_code == 202:
+            for future in self.futures:
+                future.result(timeout=60)
+            with self.app.app_context():
+                report = db.session.get(Report, response.get_json()['report_id'])
+                if report.storage_key:
+                    self.paths.append(self.storage.get_path(report.storage_key))
+        return response
+
+    def test_pdf_report(self):
+        """Test a PDF report renders in the background and downloads"""
+        response = self.generate('pdf')
+        self.assertEqual(response.status_code, 202)
+        status = self.client.get(response.get_json()['status_url']).get_json()
+        self.assertEqual(status['status'], 'ready')
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(download.get_data().startswith(b'%PDF'))
+        self.assertIn('attachment', download.headers['Content-Disposition'])
+        download.close()
+
+    def test_excel_report(self):
+        """Test Excel reports are written as .xlsx workbooks"""
+        response = self.generate('excel')
+        status = self.client.get(response.get_json()['status_url']).get_json()
+        self.assertTrue(status['download_url'])
+
+        download = self.client.get(status['download_url'])
+        self.assertTrue(download.get_data().startswith(b'PK'))
+        self.assertTrue(self.paths[0].endswith('.xlsx'))
+        download.close()
+
+    def test_failed_render(self):
+        """Test rendering errors are recorded on the report"""
+        def broken_generator(*args, **kwargs):
+            raise RuntimeError('renderer unavailable')
+        self.jobs.get_generator = broken_generator
+
+        response = self.generate('pdf')
+        status = self.client.get(response.get_json()['status_url']).get_json()
+        self.assertEqual(status['status'], 'failed')
+        self.assertIn('renderer unavailable', status['error'])
+        self.assertEqual(self.client.get(f"/reports/{status['report_id']}/download").status_code, 409)
+
+    def test_evicted_report(self):
+        """Test downloading an evicted report renders it again"""
+        response = self.generate('pdf')
+        status = self.client.get(response.get_json()['status_url']).get_json()
+        os.remove(self.paths[0])
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 409)
+        self.assertEqual(download.get_json()['status'], 'queued')
+        for future in self.futures:
+            future.result(timeout=60)
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        download.close()
+
+    def test_queue_full(self):
+        """Test reports beyond the queue limit are refused, not queued"""
+        self.jobs.slots = threading.BoundedSemaphore(1)
+        self.jobs.slots.acquire()
+        response = self.generate('pdf')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '5')
+        with self.app.app_context():
+            self.assertEqual(Report.query.count(), 0)
+
+    def test_recover_stale_reports(self):
+        """Test reports lost with their worker are requeued or failed by the sweep"""
+        long_ago = datetime.utcnow() - timedelta(hours=1)
+        with self.app.app_context():
+            user_id = User.query.filter_by(username='testuser').one().id
+            reports = [Report(user_id=user_id, report_type='weekly', report_format='pdf', status=status,
+                              start_date=date.today() - timedelta(days=7), end_date=date.today(),
+                              status_changed_at=changed_at)
+                       for status, changed_at in (('queued', long_ago), ('running', long_ago),
+                                                  ('queued', datetime.utcnow()))]
+            db.session.add_all(reports)
+            db.session.commit()
+            lost, interrupted, waiting = [report.id for report in reports]
+
+            self.assertEqual(self.jobs.recover_stale(), 2)
+            for future in self.futures:
+                future.result(timeout=60)
+            db.session.expire_all()
+            self.assertEqual(db.session.get(Report, lost).status, 'ready')
+            self.assertEqual(db.session.get(Report, interrupted).status, 'failed')
+            self.assertEqual(db.session.get(Report, waiting).status, 'queued')
+
+    def test_other_users_reports(self):
+        """Test reports of other users are not visible"""
+        with self.app.app_context():
+            report = Report(user_id=self.other_id, report_type='weekly', report_format='pdf', status='ready')
+            db.session.add(report)
+            db.session.commit()
+            report_id = report.id
+        self.assertEqual(self.client.get(f'/api/reports/{report_id}/status').status_code, 404)
+        self.assertEqual(self.client.get(f'/reports/{report_id}/download').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
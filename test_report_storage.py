@@ -0,0 +1,122 @@
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date
+from testing import AppTestCase
+from models import db, User, Report
+from report_storage import LocalStorage, S3Storage
+
+class PresignedStorage(LocalStorage):
+    """Local storage that hands out download URLs, like S3Storage"""
+
+    def get_download_url(self, key, download_name):
+        return f'https://reports.example.com/{key}?filename={download_name}'
+
+class ReportStorageTestCase(AppTestCase):
+    """Test cases for report storage backends"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+        self.cache = self.app.extensions['report_cache']
+        self.storage = self.cache.storage = LocalStorage(tempfile.mkdtemp())
+
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+    def tearDown(self):
+        """Clean up after tests"""
+        shutil.rmtree(self.storage.folder, ignore_errors=True)
+        super().tearDown()
+
+    def add_report(self, storage_key):
+        with self.app.app_context():
+            report = Report(user_id=self.user_id, report_type='weekly', report_format='pdf', status='ready',
+                            storage_key=storage_key, end_date=date(2025, 3, 31))
+            db.session.add(report)
+            db.session.commit()
+            return report.id
+
+    def test_local_storage(self):
+        """Test reports are saved, read, listed and deleted by key"""
+        self.storage.save('a.pdf', io.BytesIO(b'%PDF-a'))
+        with self.storage.open('a.pdf') as stream:
+            self.assertEqual(stream.read(), b'%PDF-a')
+        self.assertEqual([(key, size) for key, size, _ in self.storage.list()], [('a.pdf', 6)])
+
+        self.storage.delete('a.pdf')
+        self.assertFalse(self.storage.touch('a.pdf'))
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open('a.pdf')
+
+    def test_streamed_download(self):
+        """Test local reports are streamed by the app"""
+        self.storage.save('a.pdf', io.BytesIO(b'%PDF-a'))
+        response = self.client.get(f"/reports/{self.add_report('a.pdf')}/download")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(), b'%PDF-a')
+        self.assertIn('lifestyle_weekly_report_2025-03-31.pdf', response.headers['Content-Disposition'])
+        response.close()
+
+    def test_presigned_download(self):
+        """Test backends with download URLs redirect instead of streaming"""
+        self.storage = self.cache.storage = PresignedStorage(self.storage.folder)
+        self.storage.save('a.pdf', io.BytesIO(b'%PDF-a'))
+        response = self.client.get(f"/reports/{self.add_report('a.pdf')}/download")
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.headers['Location'].startswith('https://reports.example.com/a.pdf'))
+
+    def test_retention_job(self):
+        """Test the retention job removes expired reports only"""
+        self.storage.save('old.pdf', io.BytesIO(b'%PDF-old'))
+        self.storage.save('new.pdf', io.BytesIO(b'%PDF-new'))
+        expired = time.time() - self.cache.max_age - 60
+        os.utime(self.storage.get_path('old.pdf'), (expired, expired))
+
+        self.app.extensions['email_service'].apply_report_retention()
+        self.assertEqual(sorted(key for key, _, _ in self.storage.list()), ['new.pdf'])
+
+@unittest.skipUnless(importlib.util.find_spec('boto3') and importlib.util.find_spec('moto'),
+                     'boto3 and moto are needed for the S3 stand-in')
+class S3StorageTestCase(unittest.TestCase):
+    """Test cases for S3 storage against a local S3-compatible server"""
+
+    def setUp(self):
+        """Start a local S3 server and create a bucket"""
+        from moto.server import ThreadedMotoServer
+        self.server = ThreadedMotoServer(port=0)
+        self.server.start()
+        host, port = self.server.get_host_and_port()
+        self.storage = S3Storage('reports', prefix='reports/', endpoint_url=f'http://{host}:{port}',
+                                 region='us-east-1', access_key='test', secret_key='test')
+        self.storage.client.create_bucket(Bucket='reports')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_s3_storage(self):
+        """Test reports round trip through the bucket"""
+        self.storage.save('a.pdf', io.BytesIO(b'%PDF-a'))
+        self.assertTrue(self.storage.touch('a.pdf'))
+        self.assertEqual(self.storage.open('a.pdf').read(), b'%PDF-a')
+        self.assertEqual([(key, size) for key, size, _ in self.storage.list()], [('a.pdf', 6)])
+        self.assertIn('response-content-disposition', self.storage.get_download_url('a.pdf', 'report.pdf'))
+
+        self.storage.delete('a.pdf')
+        self.assertFalse(self.storage.touch('a.pdf'))
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open('a.pdf')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from apscheduler.triggers.cron import CronTrigger
+from app import create_app
+from testing import AppTestCase
+from models import db, User, JobExecution, ScheduledReport
+from scheduler_leader import FileLock, SchedulerLeader, get_scheduled_time
+
+class SchedulerLeaderTestCase(AppTestCase):
+    """Test cases for scheduler leader election and job execution records"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.lock_dir = tempfile.mkdtemp()
+
+    def create_leader(self, events):
+        leader = SchedulerLeader(self.app, on_elected=lambda: events.append('elected'),
+                                 on_deposed=lambda: events.append('deposed'))
+        leader.lock = FileLock(os.path.join(self.lock_dir, 'scheduler.lock'))
+        return leader
+
+    def test_single_leader_with_failover(self):
+        """Test only one candidate leads and another takes over when it stops"""
+        first_events, second_events = [], []
+        first = self.create_leader(first_events)
+        second = self.create_leader(second_events)
+
+        first.check()
+        second.check()
+        self.assertTrue(first.is_leader)
+        self.assertFalse(second.is_leader)
+        self.assertEqual(first_events, ['elected'])
+        self.assertEqual(second_events, [])
+
+        first.stop()
+        second.check()
+        self.assertTrue(second.is_leader)
+        self.assertEqual(second_events, ['elected'])
+        second.stop()
+
+    def create_scheduler_app(self, **config):
+        return create_app(dict({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': self.app.config['SQLALCHEMY_DATABASE_URI']
+        }, **config))
+
+    def test_scheduler_starts_in_serving_process(self):
+        """Test creating the app starts no scheduler; the first request does"""
+        app = self.create_scheduler_app(SCHEDULER_LEADER_ELECTION=False)
+        email_service = app.extensions['email_service']
+        self.assertFalse(email_service.scheduler.running)
+
+        app.test_client().get('/healthz')
+        self.assertTrue(email_service.scheduler.running)
+        self.assertEqual(email_service.pid, os.getpid())
+        email_service.shutdown()
+
+    def test_disabled_scheduler_not_loaded(self):
+        """Test an app with the scheduler off never imports APScheduler"""
+        config = {'TESTING': True, 'SCHEDULER_ENABLED': False,
+                  'SQLALCHEMY_DATABASE_URI': self.app.config['SQLALCHEMY_DATABASE_URI']}
+        code = (f"import sys; from app import create_app; create_app({config!r}); "
+                "print(any(name.startswith('apscheduler') for name in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(result.stdout.split()[-1], 'False')
+        self.assertIsNone(self.app.extensions['email_service'].scheduler)
+
+    def test_scheduled_time_for_late_run(self):
+        """Test a late run maps back to the slot it was scheduled for"""
+        trigger = CronTrigger(hour=8, minute=0)
+        now = datetime.now().astimezone().replace(hour=8, minute=3, second=20, microsecond=0)
+
+        slot = get_scheduled_time(trigger, now, timedelta(minutes=5))
+        self.assertEqual((slot.hour, slot.minute, slot.second), (8, 0, 0))
+
+    def test_job_runs_once_per_slot(self):
+        """Test a second run of the same slot is skipped and recorded runs are kept"""
+        app = self.create_scheduler_app(SCHEDULER_MISFIRE_GRACE_SECONDS=3600)
+        email_service = app.extensions['email_service']
+        calls = []
+        email_service.add_job(func=calls.append, trigger='cron', minute=0,
+                              id='test_job', name='Test job', args=['run'])
+
+        email_service.run_job('test_job', calls.append, 'run')
+        email_service.run_job('test_job', calls.append, 'run')
+        email_service.scheduler.remove_job('test_job')
+
+        self.assertEqual(calls, ['run'])
+        with app.app_context():
+            execution = JobExecution.query.filter_by(job_id='test_job').one()
+            self.assertEqual(execution.status, 'succeeded')
+            self.assertIsNotNone(execution.finished_at)
+
+    def test_user_schedules_reach_leader(self):
+        """Test a report scheduled through one worker is run by the leader's scheduler"""
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        worker = self.create_scheduler_app().extensions['email_service']
+        leader = self.create_scheduler_app().extensions['email_service']
+
+        worker.schedule_user_reports(user_id, 'weekly', ['a@example.com'], 'weekly')
+        worker.schedule_user_reports(user_id, 'weekly', ['b@example.com'], 'weekly')
+        self.assertIsNone(worker.scheduler.get_job(f'user_{user_id}_weekly_weekly'))
+        with self.app.app_context():
+            self.assertEqual(ScheduledReport.query.one().recipients, 'b@example.com')
+
+        leader.sync_user_reports()
+        job = leader.scheduler.get_job(f'user_{user_id}_weekly_weekly')
+        self.assertEqual(job.args[2:], (user_id, 'weekly', ['b@example.com']))
+        self.assertEqual([report['id'] for report in worker.get_scheduled_reports(user_id)],
+                         [f'user_{user_id}_weekly_weekly'])
+
+        self.assertTrue(worker.cancel_user_reports(user_id, 'weekly', 'weekly')[0])
+        leader.sync_user_reports()
+        self.assertIsNone(leader.scheduler.get_job(f'user_{user_id}_weekly_weekly'))
+        self.assertEqual(worker.get_scheduled_reports(user_id), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import threading
+import unittest
+from flask import Flask
+from sqlalchemy import text
+from testing import AppTestCase
+from config import Config
+from models import db, User, WorkoutLog
+from sqlite_profile import SQLiteProfile
+
+class SQLiteProfileTestCase(unittest.TestCase):
+    """Test cases for the SQLite production profile and write queue"""
+
+    def setUp(self):
+        """Set up a file-backed SQLite app"""
+        self.db_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config.from_object(Config)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.db_dir, 'test.db')}"
+        db.init_app(self.app)
+        SQLiteProfile(self.app)
+
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+
+    def test_pragmas_applied(self):
+        """Test every connection gets the production pragmas"""
+        with self.app.app_context():
+            self.assertEqual(db.session.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+            self.assertEqual(db.session.execute(text('PRAGMA synchronous')).scalar(), 1)  # NORMAL
+            self.assertEqual(db.session.execute(text('PRAGMA busy_timeout')).scalar(),
+                             self.app.config['SQLITE_BUSY_TIMEOUT_MS'])
+            self.assertEqual(db.session.execute(text('PRAGMA cache_size')).scalar(),
+                             self.app.config['SQLITE_CACHE_SIZE'])
+
+    def test_write_queue_serializes_writes(self):
+        """Test concurrent submits all land through the single writer thread"""
+        write_queue = self.app.extensions['write_queue']
+        self.assertTrue(write_queue.enabled)
+        writer_threads = set()
+
+        def add_user(index):
+            writer_threads.add(threading.current_thread().name)
+            user = User(username=f'user{index}', email=f'user{index}@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+        threads = [threading.Thread(target=write_queue.submit, args=(add_user, i)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(writer_threads, {'sqlite-writer'})
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 20)
+
+    def test_write_queue_propagates_errors(self):
+        """Test a failing write raises in the caller and is rolled back"""
+        write_queue = self.app.extensions['write_queue']
+
+        def add_duplicates():
+            db.session.add(User(username='dup', email='a@example.com', password_hash='x'))
+            db.session.add(User(username='dup', email='b@example.com', password_hash='x'))
+            db.session.commit()
+
+        with self.assertRaises(Exception):
+            write_queue.submit(add_duplicates)
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 0)
+
+class LogEndpointsTestCase(AppTestCase):
+    """Test the log endpoints write through the write queue"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+
+    def test_log_workout(self):
+        """Test logging a workout with exercises"""
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+        response = self.client.post('/log_workout', json={
+            'workout_type': 'Strength',
+            'session_duration': 1,
+            'calories_burned': 400,
+            'workout_date': '2024-01-01',
+            'exercises': [{'name': 'Squats', 'sets': 3, 'reps': 10}]
+        })
+        self.assertEqual(response.status_code, 200)
+
+        with self.app.app_context():
+            workout = WorkoutLog.query.one()
+            self.assertEqual(workout.calories_burned, 400)
+            self.assertEqual(workout.exercises.count(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
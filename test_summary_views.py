@@ -0,0 +1,86 @@
+import unittest
+from datetime import date
+from testing import AppTestCase
+from models import db, User, WorkoutLog, NutritionLog, MonthlyRollup, UserWorkoutSummary
+from summary_views import create_summary_views, refresh_summary_views, get_user_summary
+
+class SummaryViewsTestCase(AppTestCase):
+    """Test cases for the summary views plain-table fallback"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+
+        with self.app.app_context():
+            create_summary_views()
+
+            user = User(username='testuser', email='test@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+
+            db.session.add_all([
+                WorkoutLog(user_id=user.id, workout_type='Cardio', session_duration=1.0,
+                           calories_burned=300, workout_date=date(2024, 1, 1)),
+                WorkoutLog(user_id=user.id, workout_type='HIIT', session_duration=0.5,
+                           calories_burned=500, workout_date=date(2024, 1, 2)),
+                NutritionLog(user_id=user.id, calories=2000, carbs=250, proteins=100,
+                             fats=70, log_date=date(2024, 1, 1))
+            ])
+            db.session.commit()
+            self.user_id = user.id
+
+    def test_refresh_populates_summaries(self):
+        """Test refresh aggregates workout and nutrition logs"""
+        with self.app.app_context():
+            refresh_summary_views()
+            workout_summary, nutrition_summary = get_user_summary(self.user_id)
+
+            self.assertEqual(workout_summary.total_workouts, 2)
+            self.assertEqual(workout_summary.total_calories_burned, 800)
+            self.assertAlmostEqual(workout_summary.avg_calories_per_workout, 400)
+            self.assertEqual(nutrition_summary.total_nutrition_logs, 1)
+            self.assertAlmostEqual(nutrition_summary.avg_daily_calories, 2000)
+            self.assertIsNotNone(workout_summary.refreshed_at)
+
+    def test_summaries_include_archived_months(self):
+        """Test lifetime totals add the rollups of archived months"""
+        with self.app.app_context():
+            db.session.add(MonthlyRollup(user_id=self.user_id, month=date(2023, 1, 1), workout_count=3,
+                                         total_workout_duration=2.0, total_calories_burned=900,
+                                         nutrition_log_count=2, total_calories_consumed=3000))
+            db.session.commit()
+            refresh_summary_views()
+            workout_summary, nutrition_summary = get_user_summary(self.user_id)
+
+            self.assertEqual(workout_summary.total_workouts, 5)
+            self.assertEqual(workout_summary.total_calories_burned, 1700)
+            self.assertAlmostEqual(workout_summary.total_duration_hours, 3.5)
+            self.assertAlmostEqual(workout_summary.avg_calories_per_workout, 340)
+            self.assertEqual(nutrition_summary.total_nutrition_logs, 3)
+            self.assertAlmostEqual(nutrition_summary.avg_daily_calories, 5000 / 3)
+
+    def test_refresh_replaces_stale_rows(self):
+        """Test a second refresh picks up new logs"""
+        with self.app.app_context():
+            refresh_summary_views()
+            db.session.add(WorkoutLog(user_id=self.user_id, workout_type='Strength',
+                                      calories_burned=200, workout_date=date(2024, 1, 3)))
+            db.session.commit()
+
+            refresh_summary_views()
+            db.session.expire_all()
+            workout_summary, _ = get_user_summary(self.user_id)
+            self.assertEqual(workout_summary.total_workouts, 3)
+            self.assertEqual(UserWorkoutSummary.query.count(), 1)
+
+    def test_summaries_are_read_only(self):
+        """Test summary rows cannot be written through the ORM"""
+        with self.app.app_context():
+            db.session.add(UserWorkoutSummary(user_id=999, username='nobody'))
+            with self.assertRaises(RuntimeError):
+                db.session.flush()
+            db.session.rollback()
+
+if __name__ == '__main__':
+    unittest.main()
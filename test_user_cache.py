@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+from testing import AppTestCase
+from models import db, User
+from user_cache import CachedUser
+
+class UserCacheTestCase(AppTestCase):
+    """Test cases for the per-process user cache"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.client = self.app.test_client()
+        self.cache = self.app.extensions['user_cache']
+
+        with self.app.app_context():
+            user = User(username='testuser', email='test@example.com', weight=80, height=2.0, bmi=20.0)
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+
+    def test_repeat_requests_skip_user_query(self):
+        """Test the user row is loaded once across authenticated requests"""
+        self.client.get('/api/dashboard_data')
+        with mock.patch('user_cache.db.session.get', side_effect=AssertionError('user reloaded')):
+            response = self.client.get('/api/dashboard_data')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['bmi'], 20.0)
+        with self.app.app_context():
+            self.assertIsInstance(self.cache.get(self.user_id), CachedUser)
+
+    def test_profile_update_invalidates(self):
+        """Test a profile update is visible on the next request"""
+        self.client.get('/api/dashboard_data')
+        response = self.client.post('/profile', json={'weight': 100, 'height': 2.0})
+        self.assertEqual(response.get_json()['bmi'], 25.0)
+
+        response = self.client.get('/api/dashboard_data')
+        self.assertEqual(response.get_json()['bmi'], 25.0)
+
+    def test_logout_invalidates(self):
+        """Test logging out drops the user's entry"""
+        self.client.get('/api/dashboard_data')
+        self.assertEqual(self.cache.get_stats()['size'], 1)
+
+        self.client.get('/logout')
+        self.assertEqual(self.cache.get_stats()['size'], 0)
+
+    def test_ttl_and_size_bound(self):
+        """Test entries expire and the least recently used are evicted"""
+        with self.app.app_context():
+            self.cache.get(self.user_id)
+            with mock.patch('user_cache.time.monotonic', return_value=10 ** 9):
+                self.cache.get(self.user_id)
+            self.assertEqual(self.cache.get_stats()['misses'], 2)
+
+            other = User(username='other', email='other@example.com', password_hash='x')
+            db.session.add(other)
+            db.session.commit()
+            self.cache.max_size = 1
+            self.cache.get(other.id)
+            self.assertEqual(list(self.cache.entries), [other.id])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app
+from models import db
+
+class AppTestCase(unittest.TestCase):
+    """Base for tests of the full app on a throwaway SQLite database
+
+    The database lives in a temporary folder, whatever DATABASE_URL says,
+    and the scheduler is off, so tests never touch a real database or
+    leave lock files behind.
+    """
+
+    def setUp(self):
+        """Create the app and its tables"""
+        self.db_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.db_dir, 'test.db')}",
+            'SCHEDULER_ENABLED': False
+        })
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """Write pending logins while the database exists, then remove it"""
+        self.app.extensions['login_recorder'].flush()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        shutil.rmtree(self.db_dir, ignore_errors=True)
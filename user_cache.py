@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from models import db, User
+
+class CachedUser(UserMixin):
+    """Detached, read-only snapshot of a user's identity and profile
+
+    This is what current_user is on ordinary requests. It carries no
+    session or password hash; views that change the user load the User
+    row themselves and invalidate the cache afterwards.
+    """
+
+    FIELDS = ('id', 'username', 'email', 'age', 'gender', 'weight', 'height', 'bmi',
+              'experience_level', 'fat_percentage', 'daily_reports', 'weekly_reports',
+              'monthly_reports')
+
+    __slots__ = FIELDS
+
+    def __init__(self, user):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(user, field))
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+class UserCache:
+    """Per-process TTL cache behind the Flask-Login user loader
+
+    Authenticated requests otherwise load the user row on every call,
+    chart APIs included. Entries expire after USER_CACHE_TTL seconds and the
+    least recently used are evicted past USER_CACHE_SIZE. Invalidation only
+    reaches the current process, so other workers may serve a stale profile
+    for up to the TTL.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.entries = OrderedDict()  # user id -> (expires at, CachedUser)
+        self.lock = threading.Lock()
+        self.version = 0  # bumped on invalidation so in-flight loads are not stored
+        self.hits = 0
+        self.misses = 0
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read cache settings and register the cache"""
+        self.app = app
+        self.enabled = app.config['USER_CACHE']
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.max_size = app.config['USER_CACHE_SIZE']
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id):
+        """Return the user for a session, from the cache when fresh"""
+        if not self.enabled:
+            return db.session.get(User, user_id)
+
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self.version
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            self.invalidate(user_id)
+            return None
+
+        cached = CachedUser(user)
+        with self.lock:
+            if version == self.version:
+                self.entries[user_id] = (now + self.ttl, cached)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id):
+        """Drop a user's entry, e.g. after a profile update or logout"""
+        with self.lock:
+            self.version += 1
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
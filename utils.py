@@ -1,5 +1,3 @@
-import pandas as pd
-import numpy as np
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Tuple, Optional
 import json
@@ -168,6 +166,7 @@ class ChartDataGenerator:
     @staticmethod
     def generate_bmi_trend_data(user_id: int, days: int = 30) -> Dict:
         """Generate BMI trend data for charts"""
+        import numpy as np  # imported on first use to keep start-up light
         # This would query actual BMI data from database
         # For now, returning sample data
         dates = [(date.today() - timedelta(days=i)).strftime('%Y-%m-%d') 
@@ -183,6 +182,7 @@ class ChartDataGenerator:
     @staticmethod
     def generate_calorie_balance_data(user_id: int, days: int = 7) -> Dict:
         """Generate calorie balance data for charts"""
+        import numpy as np
         dates = [(date.today() - timedelta(days=i)).strftime('%Y-%m-%d') 
                 for i in range(days, 0, -1)]
         consumed = [2100 + np.random.randint(-200, 200) for _ in range(days)]
@@ -0,0 +1,19 @@
+"""WSGI entrypoint for production servers
+
+Run with: gunicorn --config gunicorn.conf.py wsgi:app
+
+The heavy libraries are imported here, before gunicorn forks, so with
+preload_app every worker shares their pages copy-on-write instead of
+importing its own copy. The app itself imports them lazily, so only
+processes that need them pay for them.
+"""
+
+import startup_profile  # noqa: F401  (first, so STARTUP_PROFILE times every import)
+import numpy  # noqa: F401
+import pandas  # noqa: F401
+import openpyxl  # noqa: F401
+import reportlab.platypus  # noqa: F401
+import report_generator  # noqa: F401
+from app import create_app
+
+app = create_app()